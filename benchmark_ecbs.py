@@ -0,0 +1,81 @@
+"""Benchmark of ECBS against the advanced players on the larger teams.
+
+The agents of the 4, 8 and 10-player maps headlessly collect a number of
+goals each, new goals being drawn at random among the free cells. The number
+of epochs and the processor time are reported for the advanced players and
+for the ECBS planner under several suboptimality bounds, along with the
+constraint tree nodes extended by ECBS.
+
+Usage: python benchmark_ecbs.py [goals] [node limit] [time limit]
+"""
+
+import random
+import sys
+import time
+
+from benchmark_node_memory import MAPS, load_agents
+from benchmark_true_distance import load_walls
+from coop.advanced_players import AdvancedPlayer
+from coop.cbs import ECBSPlanner
+from coop.world import World
+
+BOUNDS = [1.0, 1.2, 1.5, 2.0]
+
+
+def run(name, nb_goals, bound=None, node_limit=None, time_limit=None, seed=0,
+        max_epochs=3000):
+    random.seed(seed)
+    nb_rows, nb_columns, walls = load_walls(name)
+    world = World(nb_rows, nb_columns, walls)
+    initial_positions, goals = load_agents(name)
+    occupied = set(walls)
+    free = [(x, y) for x in range(nb_rows) for y in range(nb_columns)
+            if (x, y) not in occupied]
+    nb_players = len(initial_positions)
+
+    start = time.process_time()
+    if bound is None:
+        players = [AdvancedPlayer(init, [goal], world)
+                   for init, goal in zip(initial_positions, goals)]
+        world.set_pathfinding_frequence(6)
+        world.set_search_epochs()
+        planner = None
+    else:
+        planner = ECBSPlanner(initial_positions, [[goal] for goal in goals],
+                              world, bound, node_limit, time_limit)
+    current_goals = list(goals)
+    scores = [0] * nb_players
+    nb_nodes = 0
+
+    epoch = 0
+    while min(scores) < nb_goals and epoch < max_epochs:
+        epoch += 1
+        for j in range(nb_players):
+            if planner is None:
+                position = players[j].next()
+            else:
+                position = planner.next()
+                if j == 0 and planner.clock == 1:
+                    nb_nodes += planner.nb_nodes
+            if position == current_goals[j]:
+                scores[j] += 1
+                current_goals[j] = random.choice(free)
+                if planner is None:
+                    players[j].add_goal(current_goals[j])
+                else:
+                    planner.add_goal(j, current_goals[j])
+    return epoch, time.process_time() - start, nb_nodes
+
+
+if __name__ == '__main__':
+    nb_goals = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    node_limit = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    time_limit = float(sys.argv[3]) if len(sys.argv) > 3 else 0.5
+
+    print(f'{"map":<22}{"planner":<14}{"epochs":>8}{"cpu (s)":>10}{"CT nodes":>10}')
+    for name in MAPS:
+        epochs, cpu, _ = run(name, nb_goals)
+        print(f'{name:<22}{"advanced":<14}{epochs:>8}{cpu:>10.3f}{"-":>10}')
+        for bound in BOUNDS:
+            epochs, cpu, nb_nodes = run(name, nb_goals, bound, node_limit, time_limit)
+            print(f'{name:<22}{f"ecbs w={bound}":<14}{epochs:>8}{cpu:>10.3f}{nb_nodes:>10}')
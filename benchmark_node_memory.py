@@ -0,0 +1,68 @@
+"""Memory benchmark of the nodes allocated by space-time A*.
+
+Every agent of the 4, 8 and 10-player maps plans a window towards its first
+goal, in turn, through the shared reservation table. The peak memory traced
+during the searches is divided by the number of expanded nodes, for the
+compact :class:`coop.advanced_players.TimeNode` and for a subclass regaining
+an instance dictionary, i.e. the node as it was before.
+
+Usage: python benchmark_node_memory.py [window]
+"""
+
+import sys
+import tracemalloc
+
+from benchmark_true_distance import load_walls
+from coop.advanced_players import TimeAStar, TimeNode
+from coop.maps import load_map
+from coop.world import World
+
+MAPS = ['pathfinding4players', 'pathfinding8players', 'pathfinding10players']
+
+
+class DictTimeNode(TimeNode):
+    """The space-time node with a per-instance dictionary."""
+
+
+class DictTimeAStar(TimeAStar):
+    """Space-time A* rooted at a dictionary-based node."""
+
+    def __init__(self, initial_state, goal_state, initial_epoch, *args, **kwargs):
+        super().__init__(initial_state, goal_state, initial_epoch, *args, **kwargs)
+        self.initial_state = DictTimeNode(self, *initial_state, t=initial_epoch)
+        self.goal_state = DictTimeNode(self, *goal_state)
+        self.open_set = []
+        self.add_to_open_set([self.initial_state])
+
+
+def load_agents(name):
+    map_data = load_map(name)
+    return map_data.initial_positions, map_data.goals[:len(map_data.initial_positions)]
+
+
+def bench(engine, world, initial_positions, goals, window):
+    world.set_pathfinding_frequence(window)
+    tracemalloc.start()
+    searches = []
+    for player_id, (init, goal) in enumerate(zip(initial_positions, goals)):
+        search = engine(init, goal, 0, player_id, world, None)
+        search.run()
+        # the searches are kept alive, as the agents keep theirs
+        searches.append(search)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, world.nb_iters
+
+
+if __name__ == '__main__':
+    window = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+
+    print(f'{"map":<22}{"node":<14}{"expanded":>10}{"peak (B)":>12}{"B/node":>9}')
+    for name in MAPS:
+        nb_rows, nb_columns, walls = load_walls(name)
+        initial_positions, goals = load_agents(name)
+        for label, engine in [('dict', DictTimeAStar), ('slots', TimeAStar)]:
+            world = World(nb_rows, nb_columns, walls)
+            peak, expanded = bench(engine, world, initial_positions, goals, window)
+            print(f'{name:<22}{label:<14}{expanded:>10}{peak:>12}'
+                  f'{peak / max(expanded, 1):>9.1f}')
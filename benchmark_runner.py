@@ -0,0 +1,383 @@
+"""Parallel runner of the benchmark trials.
+
+A trial is a headless run of one strategy on one map: the agents collect a
+number of vials each, a collected vial being replaced by the next one of the
+agent's sequence. The trials are independent, so they are fanned out across
+a process pool, each one with its own :class:`coop.world.World` and a seed
+derived from the map, the number of vials and the iteration. The seed
+determines a scenario, i.e. the sequence of vials of every agent, which is
+written to a scenario file beforehand and replayed identically for every
+strategy compared.
+
+The results are appended to a CSV file as soon as a trial is over. Running
+the same sweep again skips the trials already in the file, so that an
+interrupted sweep resumes where it stopped.
+
+Usage: python benchmark_runner.py [results] [iterations] [workers] [map] [agents]
+
+The map is either the name of a map of the `Cartes` directory or the path,
+absolute or relative to `Cartes`, of a movingai `.scen` file whose map file
+lies in the same directory.
+"""
+
+import csv
+import os
+import sys
+import zlib
+from collections import defaultdict, namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from coop.advanced_players import AdvancedPlayer
+from coop.cbs import CBSPlanner
+from coop.maps import load_map
+from coop.planner import CoopPlanner
+from coop.players import CoopPlayer
+from coop.priorities import PrioritizedPlanner
+from coop.scenarios import Scenario, generate_scenario
+from coop.simulation import Observer, Simulation
+from coop.strategies import AverageGroupDurationStrategy, GroupLengthStrategy
+from coop.world import World
+
+STRATEGIES = ['splicing', 'planner', 'advanced', 'cbs', 'prioritized',
+              'planner-average', 'planner-length']
+
+Trial = namedtuple('Trial', ['strategy', 'map_name', 'nb_vials', 'iteration', 'seed',
+                             'window', 'interval', 'nb_agents', 'node_limit', 'time_limit'],
+                defaults=(None, 6, None, 1000, 300))
+
+KEY_FIELDS = list(Trial._fields)
+RESULT_FIELDS = ['cpu_time', 'epochs', 'makespan', 'expansions', 'conflicts',
+                 'failed_searches', 'solved']
+
+
+def trial_seed(map_name, nb_vials, iteration, base_seed=0):
+    """Derives the seed of a trial, independently of the strategy.
+
+    Parameters
+    ----------
+    map_name : str
+        The name of the map in the `Cartes` directory.
+    nb_vials : int
+        The number of vials each agent must collect.
+    iteration : int
+        The index of the run among the identical ones.
+    base_seed : int, optional
+        The seed of the whole sweep.
+
+    Returns
+    -------
+    int
+        A seed which is stable across processes and interpreter runs.
+
+    """
+    return zlib.crc32(f'{base_seed}:{map_name}:{nb_vials}:{iteration}'.encode())
+
+
+def make_trials(strategies, map_names, vials, iterations, base_seed=0, **options):
+    """Lists the trials of a sweep.
+
+    Parameters
+    ----------
+    strategies : iterable of str
+        The strategies among :data:`STRATEGIES`.
+    map_names : iterable of str
+        The names of the maps in the `Cartes` directory, or the paths of
+        movingai `.scen` files.
+    vials : iterable of int
+        The numbers of vials each agent must collect.
+    iterations : int
+        The number of runs per combination.
+    base_seed : int, optional
+        The seed of the whole sweep.
+    **options
+        The `window` and `interval` of the advanced players, the number of
+        agents `nb_agents` kept from the map, the number of constraint tree
+        nodes `node_limit` after which a CBS search gives up, and the
+        processor time in seconds `time_limit` after which a search or the
+        whole run is given up, the latter being recorded as unsolved.
+
+    Returns
+    -------
+    list of Trial
+        One trial per (strategy, map, vials, iteration) combination.
+
+    """
+    return [Trial(strategy, map_name, int(nb_vials), iteration,
+                  trial_seed(map_name, int(nb_vials), iteration, base_seed), **options)
+            for strategy in strategies for map_name in map_names
+            for nb_vials in vials for iteration in range(iterations)]
+
+
+def make_agents(trial, world, initial_positions, goal_positions):
+    if trial.strategy == 'splicing':
+        world.set_cut_off_limit(5)
+        return [CoopPlayer(init, goals, world)
+                for init, goals in zip(initial_positions, goal_positions)]
+    if trial.strategy.startswith('planner'):
+        world.set_cut_off_limit(5)
+        sorting = AverageGroupDurationStrategy if trial.strategy == 'planner-average' \
+            else GroupLengthStrategy
+        return CoopPlanner(initial_positions, goal_positions, world, sorting)
+    if trial.strategy == 'cbs':
+        return CBSPlanner(initial_positions, goal_positions, world,
+                          node_limit=trial.node_limit, time_limit=trial.time_limit)
+    if trial.strategy == 'prioritized':
+        return PrioritizedPlanner(initial_positions, goal_positions, world,
+                                  time_limit=trial.time_limit)
+    if trial.strategy == 'advanced':
+        players = [AdvancedPlayer(init, goals, world)
+                   for init, goals in zip(initial_positions, goal_positions)]
+        world.set_pathfinding_frequence(trial.interval)
+        world.set_window(trial.window)
+        world.set_search_epochs()
+        return players
+    raise ValueError(f'Unknown strategy: {trial.strategy}')
+
+
+class ExpansionCounter(Observer):
+    """Sums the low-level expansions of the searches of a CBS-based planner."""
+
+    def __init__(self):
+        self.expansions = 0
+
+    def on_move(self, simulation, player, position):
+        planner = simulation.planner
+        if player == 0 and planner.clock == 1:
+            self.expansions += planner.nb_expansions
+
+
+def make_scenario(trial):
+    """Generates the scenario of a trial.
+
+    Parameters
+    ----------
+    trial : Trial
+        The map, the number of vials and the seed of the run.
+
+    Returns
+    -------
+    Scenario
+        The scenario shared by all the strategies.
+
+    """
+    return generate_scenario(load_map(trial.map_name), trial.nb_vials, trial.seed,
+                             os.path.basename(trial.map_name), trial.nb_agents)
+
+
+def scenario_path(trial, directory):
+    name = os.path.basename(trial.map_name)
+    agents = f'-{trial.nb_agents}' if trial.nb_agents is not None else ''
+    return os.path.join(directory, f'{name}{agents}-{trial.nb_vials}-{trial.seed}.scenario')
+
+
+def run_trial(trial, max_epochs=5000, scenario_file=None):
+    """Runs a trial headlessly.
+
+    Parameters
+    ----------
+    trial : Trial
+        The strategy, the map, the number of vials and the seed of the run.
+    max_epochs : int, optional
+        The number of epochs after which the run is given up, as is the case
+        once the agents have spent the trial's `time_limit`.
+    scenario_file : str or None, optional
+        The scenario file of the trial, by default generated anew.
+
+    Returns
+    -------
+    dict
+        The trial fields along with the processor time spent in the agents,
+        the average epoch at which an agent collected its last vial, the
+        last such epoch, the expanded nodes, i.e. those of space-time A* for
+        the advanced players, those of the low-level searches for CBS and
+        prioritized planning and none otherwise, the vertex and swapping
+        conflicts between agents, the searches of CBS and prioritized
+        planning which gave up or found no conflict-free joint path and none
+        for the other strategies, and whether all the vials were collected.
+
+    """
+    scenario = Scenario.load(scenario_file) if scenario_file is not None \
+        else make_scenario(trial)
+    map_data = load_map(trial.map_name)
+
+    world = World(map_data.nb_rows, map_data.nb_columns, map_data.walls, seed=trial.seed)
+    counter = ExpansionCounter()
+    simulation = Simulation.from_scenario(
+        lambda *args: make_agents(trial, *args), world, scenario)
+    if isinstance(simulation.planner, CBSPlanner):
+        simulation.observers.append(counter)
+    solved = simulation.run(max_epochs, trial.time_limit)
+
+    failed_searches = None
+    if isinstance(simulation.planner, CBSPlanner):
+        expansions = counter.expansions
+        failed_searches = simulation.planner.nb_failures
+    elif simulation.agents is not None and isinstance(simulation.agents[0], AdvancedPlayer):
+        expansions = world.nb_iters
+    else:
+        expansions = None
+    return dict(trial._asdict(), cpu_time=simulation.cpu_time,
+                epochs=simulation.average_epochs, makespan=simulation.makespan,
+                expansions=expansions, conflicts=simulation.conflicts,
+                failed_searches=failed_searches, solved=int(solved))
+
+
+def key_of(row):
+    return tuple('' if row.get(field) is None else str(row[field]) for field in KEY_FIELDS)
+
+
+def load_results(path):
+    """Reads the results of the trials already run.
+
+    Parameters
+    ----------
+    path : str
+        The CSV file of the results.
+
+    Returns
+    -------
+    list of dict
+        The rows of the file, or an empty list if there is none.
+
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def run_trials(trials, path, max_workers=None, max_epochs=5000, scenario_dir=None):
+    """Runs the trials missing from a results file in parallel.
+
+    Parameters
+    ----------
+    trials : list of Trial
+        The trials of the sweep.
+    path : str
+        The CSV file the results are appended to.
+    max_workers : int or None, optional
+        The number of worker processes, by default the number of processors.
+    max_epochs : int, optional
+        The number of epochs after which a run is given up.
+    scenario_dir : str or None, optional
+        The directory of the scenario files, by default next to the results.
+
+    Returns
+    -------
+    list of dict
+        The rows of the file matching the given trials, previous ones
+        included, with their values as read from the file.
+
+    """
+    done = {key_of(row) for row in load_results(path)}
+    pending = [trial for trial in trials if key_of(trial._asdict()) not in done]
+    print(f'{len(trials) - len(pending)} trials already run, {len(pending)} to go')
+
+    if pending != []:
+        if scenario_dir is None:
+            scenario_dir = os.path.splitext(path)[0] + '_scenarios'
+        os.makedirs(scenario_dir, exist_ok=True)
+        for trial in pending:
+            scenario_file = scenario_path(trial, scenario_dir)
+            if not os.path.exists(scenario_file):
+                make_scenario(trial).save(scenario_file)
+
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not new_file:
+            with open(path, newline='') as f:
+                header = next(csv.reader(f), [])
+            if header != KEY_FIELDS + RESULT_FIELDS:
+                raise ValueError(f'{path} holds results of another format')
+        with open(path, 'a', newline='') as f, \
+                ProcessPoolExecutor(max_workers=max_workers) as executor:
+            writer = csv.DictWriter(f, fieldnames=KEY_FIELDS + RESULT_FIELDS)
+            if new_file:
+                writer.writeheader()
+            futures = {executor.submit(run_trial, trial, max_epochs,
+                                       scenario_path(trial, scenario_dir)): trial
+                       for trial in pending}
+            for cnt, future in enumerate(as_completed(futures), 1):
+                trial = futures[future]
+                try:
+                    row = future.result()
+                except Exception as error:
+                    # the trial is not recorded, so it is retried on resumption
+                    print(f'{trial} failed: {error!r}', file=sys.stderr)
+                    continue
+                writer.writerow(row)
+                f.flush()
+                print(f'[{cnt}/{len(pending)}] {trial.strategy} {trial.map_name} '
+                      f'{trial.nb_vials} vials #{trial.iteration}: '
+                      f'{row["cpu_time"]:.3f} s, {row["makespan"]} epochs, '
+                      f'{row["failed_searches"]} failed searches')
+
+    keys = {key_of(trial._asdict()) for trial in trials}
+    return [row for row in load_results(path) if key_of(row) in keys]
+
+
+def average(rows, field, group_by=('strategy', 'nb_vials')):
+    """Averages a result over the solved trials of each group.
+
+    Parameters
+    ----------
+    rows : list of dict
+        The rows returned by :func:`run_trials`.
+    field : str
+        The result to be averaged.
+    group_by : tuple of str, optional
+        The trial fields defining a group.
+
+    Returns
+    -------
+    dict of tuple: float
+        The average value per group, as strings of the trial fields.
+
+    """
+    groups = defaultdict(list)
+    for row in rows:
+        if row['solved'] == '1' and row[field] != '':
+            groups[tuple(row[name] for name in group_by)].append(float(row[field]))
+    return {group: sum(values) / len(values) for group, values in groups.items()}
+
+
+def series(rows, field, strategies, vials):
+    """Arranges the averages of a result as one curve per strategy.
+
+    Parameters
+    ----------
+    rows : list of dict
+        The rows returned by :func:`run_trials`.
+    field : str
+        The result to be averaged.
+    strategies : list of str
+        The strategies, one per curve.
+    vials : iterable of int
+        The numbers of vials, i.e. the abscissae of the curves.
+
+    Returns
+    -------
+    list of list of float
+        The average value per strategy and number of vials, NaN where no
+        trial was solved.
+
+    """
+    averages = average(rows, field)
+    return [[averages.get((strategy, str(nb_vials)), float('nan')) for nb_vials in vials]
+            for strategy in strategies]
+
+
+if __name__ == '__main__':
+    path = sys.argv[1] if len(sys.argv) > 1 else 'results.csv'
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    max_workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    map_name = sys.argv[4] if len(sys.argv) > 4 else 'pathfindingWorld_MultiPlayer4'
+    nb_agents = int(sys.argv[5]) if len(sys.argv) > 5 else None
+
+    trials = make_trials(STRATEGIES[:5], [map_name], [10, 20], iterations,
+                         nb_agents=nb_agents)
+    rows = run_trials(trials, path, max_workers)
+    cpu_time, makespan = average(rows, 'cpu_time'), average(rows, 'makespan')
+    print(f'{"strategy":<16}{"vials":>6}{"cpu (s)":>10}{"makespan":>10}')
+    for group in sorted(cpu_time):
+        print(f'{group[0]:<16}{group[1]:>6}{cpu_time[group]:>10.3f}'
+              f'{makespan.get(group, float("nan")):>10.1f}')
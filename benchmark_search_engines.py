@@ -0,0 +1,86 @@
+"""Benchmark of the single-agent search engines.
+
+It compares :class:`coop.tools.GridAStar`, :class:`coop.tools.JumpPointSearch`
+and :class:`coop.hierarchical.HierarchicalAStar` in terms of extended nodes,
+CPU time and path length, on the 20x20 maps and on a synthetic map made of
+open rooms, for random pairs of free cells. The optimal engines must return
+step stacks of identical lengths.
+
+Usage: python benchmark_search_engines.py [queries] [size]
+"""
+
+import random
+import sys
+import time
+
+from benchmark_true_distance import load_walls
+from coop.hierarchical import HierarchicalAStar
+from coop.tools import GridAStar, JumpPointSearch
+from coop.world import World
+
+MAPS = ['pathfindingWorld_MultiPlayer4', 'pathfinding10players',
+        'pathfindingWorld3']
+ENGINES = [GridAStar, JumpPointSearch, HierarchicalAStar]
+OPTIMAL_ENGINES = [GridAStar, JumpPointSearch]
+
+
+def rooms_walls(size, room_size=16, seed=0):
+    """Builds a grid of square rooms linked by doors in their walls."""
+    rng = random.Random(seed)
+    walls = set()
+    for i in range(room_size, size, room_size):
+        walls.update((i, y) for y in range(size))
+        walls.update((x, i) for x in range(size))
+    for i in range(room_size, size, room_size):
+        for j in range(0, size, room_size):
+            walls.discard((i, j + rng.randrange(1, room_size)))
+            walls.discard((j + rng.randrange(1, room_size), i))
+    return sorted(walls)
+
+
+def bench(label, nb_rows, nb_columns, walls, nb_queries, seed=0):
+    world = World(nb_rows, nb_columns, walls)
+    grid_map = world.grid_map
+    free = [(x, y) for x in range(nb_rows) for y in range(nb_columns)
+            if grid_map.is_free(x, y)]
+    rng = random.Random(seed)
+    queries = [(rng.choice(free), rng.choice(free)) for _ in range(nb_queries)]
+
+    print(f'{label} ({nb_rows}x{nb_columns}, {nb_queries} queries)')
+    t_0 = time.process_time()
+    world.get_abstraction()
+    print(f'\t{"abstraction built in":<16} {time.process_time() - t_0:.4f} s')
+    lengths = {}
+    for engine in ENGINES:
+        expansions = 0
+        engine_lengths = []
+        t_0 = time.process_time()
+        for start, goal in queries:
+            search = engine(start, goal, grid_map, world=world)
+            steps = search.run()
+            expansions += search.nb_expansions
+            engine_lengths.append(None if steps is None else len(steps))
+        cpu_time = time.process_time() - t_0
+        lengths[engine] = engine_lengths
+        total_length = sum(l for l in engine_lengths if l is not None)
+        print(f'\t{engine.__name__:<17} {expansions / nb_queries:>9.1f} expansions'
+              f' {cpu_time:>8.4f} s {total_length:>8} steps')
+    assert all(lengths[e] == lengths[GridAStar] for e in OPTIMAL_ENGINES), \
+        'path lengths differ'
+
+
+def main():
+    nb_queries = 200
+    size = 128
+    if len(sys.argv) >= 2:
+        nb_queries = int(sys.argv[1])
+    if len(sys.argv) == 3:
+        size = int(sys.argv[2])
+
+    for name in MAPS:
+        bench(name, *load_walls(name), nb_queries)
+    bench('rooms', size, size, rooms_walls(size), nb_queries)
+
+
+if __name__ == '__main__':
+    main()
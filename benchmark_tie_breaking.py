@@ -0,0 +1,34 @@
+"""Benchmark of the tie-breaking policies of space-time A*.
+
+The advanced players of the 4, 8 and 10-player maps pursue random goals
+headlessly for a number of epochs under each tie-breaking policy. The
+expansions counted by :attr:`coop.world.World.nb_iters` are
+reported per search, along with the processor time.
+
+Usage: python benchmark_tie_breaking.py [epochs]
+"""
+
+import sys
+import time
+
+from benchmark_node_memory import MAPS
+from profile_time_astar import simulate
+
+POLICIES = [(), ('depth',), ('goal',), ('conflicts',), ('depth', 'conflicts'),
+            ('conflicts', 'depth'), ('goal', 'conflicts')]
+
+
+if __name__ == '__main__':
+    nb_epochs = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+
+    print(f'{"map":<22}{"policy":<22}{"searches":>9}{"expanded":>10}'
+          f'{"per search":>12}{"cpu (s)":>9}')
+    for name in MAPS:
+        for policy in POLICIES:
+            start = time.process_time()
+            world = simulate(name, nb_epochs, tie_breaking=policy)
+            cpu = time.process_time() - start
+            expanded, searches = world.nb_iters, world.nb_calls
+            label = ', '.join(policy) if policy != () else 'f-value only'
+            print(f'{name:<22}{label:<22}{searches:>9}{expanded:>10}'
+                  f'{expanded / max(searches, 1):>12.1f}{cpu:>9.3f}')
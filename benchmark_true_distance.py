@@ -0,0 +1,103 @@
+"""Micro-benchmark of the true distance queries used by space-time A*.
+
+It compares the backwards search based on :class:`coop.tools.AStar`, with
+both the former linear scan of the closed set and the dictionary lookup, to
+the distance table of :class:`coop.tools.GridAStar` and to
+:class:`coop.tools.ResumableDistanceOracle`. The queries mimic those
+of :meth:`coop.advanced_players.TimeAStar.true_distance`: a batch of random
+positions is queried several times, as space-time A* asks for the same cells
+at every epoch of its window.
+
+Usage: python benchmark_true_distance.py [queries] [size]
+"""
+
+import random
+import sys
+import time
+
+from coop.maps import load_map
+from coop.tools import AStar, GridAStar, GridMap, ResumableDistanceOracle
+
+MAPS = ['pathfindingWorld_MultiPlayer4', 'pathfinding10players',
+        'pathfindingWorld3']
+
+
+class LinearScanAStar(AStar):
+    """The backwards search as it was, i.e. with a linear closed set scan."""
+
+    def get_node_at(self, coordinates):
+        for node_coord, node in self.closed_set.items():
+            if coordinates == node_coord:
+                return node
+        return None
+
+
+def load_walls(name):
+    map_data = load_map(name)
+    return map_data.nb_rows, map_data.nb_columns, map_data.walls
+
+
+def synthetic_walls(size, density=0.2, seed=0):
+    rng = random.Random(seed)
+    return [(x, y) for x in range(size) for y in range(size)
+            if rng.random() < density]
+
+
+def node_distance(backwards_search, position):
+    node = backwards_search.get_node_at(position)
+    if node is None:
+        backwards_search.set_new_goal(position)
+        backwards_search.run()
+        node = backwards_search.get_node_at(position)
+    return node.cost if node is not None else None
+
+
+def time_queries(make_search, query, positions):
+    t_0 = time.process_time()
+    search = make_search()
+    for pos in positions:
+        query(search, pos)
+    return time.process_time() - t_0
+
+
+def bench(label, nb_rows, nb_columns, walls, nb_queries, repeats=5, seed=0):
+    grid_map = GridMap(nb_rows, nb_columns, walls)
+    walls_set = set(walls)
+    free = [(x, y) for x in range(nb_rows) for y in range(nb_columns)
+            if (x, y) not in walls_set]
+    rng = random.Random(seed)
+    goal, start = rng.choice(free), rng.choice(free)
+    positions = [rng.choice(free) for _ in range(nb_queries)] * repeats
+
+    results = [
+        ('AStar, linear scan', time_queries(
+            lambda: LinearScanAStar(goal, start, grid_map), node_distance, positions)),
+        ('AStar, dict lookup', time_queries(
+            lambda: AStar(goal, start, grid_map), node_distance, positions)),
+        ('GridAStar table', time_queries(
+            lambda: GridAStar(goal, start, grid_map),
+            lambda search, pos: search.distance_to(pos), positions)),
+        ('Resumable oracle', time_queries(
+            lambda: ResumableDistanceOracle(goal, grid_map, origin=start),
+            lambda search, pos: search.distance(pos), positions)),
+    ]
+    print(f'{label} ({nb_rows}x{nb_columns}, {nb_queries}x{repeats} queries)')
+    for name, cpu_time in results:
+        print(f'\t{name:<20} {cpu_time:.4f} s')
+
+
+def main():
+    nb_queries = 200
+    size = 512
+    if len(sys.argv) >= 2:
+        nb_queries = int(sys.argv[1])
+    if len(sys.argv) == 3:
+        size = int(sys.argv[2])
+
+    for name in MAPS:
+        bench(name, *load_walls(name), nb_queries)
+    bench('synthetic', size, size, synthetic_walls(size), nb_queries)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,12 +5,14 @@
 """
 
 
+import heapq
+import math
 import random
 from functools import reduce
 
 from .players import CoopPlayer
 from .strategies import NaiveStrategy
-from .tools import AStar, Node
+from .tools import AStar, Node, ResumableDistanceOracle
 
 
 class TimeNode(Node):
@@ -45,14 +47,19 @@ class TimeNode(Node):
         The storage location of the node's parent.
     cost : int
         The cost of the path from space-time A*'s root to this node.
+    f_value : int or None
+        The cached f-value of this node, or None if not yet calculated.
 
     """
 
+    __slots__ = ('t',)
+
     def __init__(self, a_star, x, y, t=None, parent=None):
         self.a_star = a_star
         self.x = x
         self.y = y
         self.parent = parent
+        self.f_value = None
         if t is not None:
             self.t = t
         elif self.has_parent():
@@ -63,12 +70,13 @@ class TimeNode(Node):
 
     def __init_cost(self):
         # initialise cost of the path from the root to this node
-        if self.has_parent():
+        parent = self.parent
+        if parent is not None:
             # staying put has cost 0
-            if self.get_step() == (0, 0, 1):
-                self.cost = self.parent.cost
+            if self.x == parent.x and self.y == parent.y and self.t == parent.t + 1:
+                self.cost = parent.cost
             else:
-                self.cost = self.parent.cost + 1
+                self.cost = parent.cost + 1
         else:
             self.cost = 0
 
@@ -121,6 +129,8 @@ class TimeNode(Node):
         A future node is said to be valid if it does not enclose a wall, is
         located inside the grid, and its space coordinates have not been
         reserved by another agent this node's epoch as well as the next one.
+        The four shifts, and waiting when at the goal, are checked against the
+        grid and the reservation table in a single pass.
 
         Returns
         -------
@@ -128,39 +138,32 @@ class TimeNode(Node):
             The list of all this node's valid neighbours.
 
         """
-        shifts = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+        a_star = self.a_star
+        x, y, t = self.x, self.y, self.t
+        grid_map = a_star.grid_map
+        blocked, nb_columns = grid_map.blocked, grid_map.nb_columns
+        index = x * nb_columns + y
+
+        # the cells which are neither walls nor outside the grid
+        candidates = []
+        if x + 1 < grid_map.nb_rows and not blocked[index + nb_columns]:
+            candidates.append((x + 1, y))
+        if x > 0 and not blocked[index - nb_columns]:
+            candidates.append((x - 1, y))
+        if y + 1 < nb_columns and not blocked[index + 1]:
+            candidates.append((x, y + 1))
+        if y > 0 and not blocked[index - 1]:
+            candidates.append((x, y - 1))
         # when at goal position, no cost
-        if self.position == self.a_star.goal_state.position:
-            shifts.append((0, 0))
-        neighbours = [(self.x + dx, self.y + dy) for dx, dy in shifts]
-        valid_neighbours = []
-        t = self.t
-        for x, y in neighbours:
-            # ensure that the cell is not a wall nor an invalid position
-            # (outside the grid)
-            if (x, y) in self.a_star.walls or not TimeNode.is_valid(x, y):
-                continue
+        goal = a_star.goal_state
+        if x == goal.x and y == goal.y:
+            candidates.append((x, y))
 
-            # ensure that the cell is currently available, otherwise
-            # there must be no collision if the step is taken
-            try:
-                other_id = AdvancedPlayer.reservation_table[(x, y, t)]
-                if other_id != player_id and \
-                        other_id == AdvancedPlayer.reservation_table[(self.x, self.y, t + 1)]:
-                    continue
-            except:
-                pass
-
-            # the cell will be available at next epoch
-            try:
-                if AdvancedPlayer.reservation_table[(x, y, t + 1)] != player_id:
-                    continue
-            except:
-                pass
-
-            valid_neighbours.append(
-                TimeNode(self.a_star, x, y, t + 1, parent=self))
-        return valid_neighbours
+        # the cells available at next epoch without swapping with another agent
+        moves = a_star.world.reservation_table.available_moves(
+            (x, y), candidates, t, player_id)
+        node_type = type(self)
+        return [node_type(a_star, nx, ny, t + 1, parent=self) for nx, ny in moves]
 
     def get_step(self):
         """Determines the step taken to come to this node from its parent.
@@ -200,10 +203,11 @@ class TimeAStar(AStar):
         This argument contains the epoch at which the algorithm will start.
     player_id : int
         This argument contains the id of the agent that run this A* instance.
-    walls : list of (int, int)
-        This argument contains the list of all the obstacles to be avoided.
-    backwards_search : AStar or None
-        This argument contains the backwards A* instance for true distances.
+    world : World
+        This argument contains the world whose grid and reservation table are
+        used.
+    backwards_search : ResumableDistanceOracle or None
+        This argument contains the backwards search giving the true distances.
     last_epoch : int or None, optional
         This argument contains the epoch at which pathfinding will stop.
 
@@ -215,21 +219,36 @@ class TimeAStar(AStar):
         The goal node.
     player_id : int
         The storage location for the associated agent's id.
+    world : World
+        The world whose grid, reservation table and counters are used.
     walls : list of (int, int)
         The storage location of the walls position.
+    grid_map : GridMap
+        The occupancy grid used to test the neighbours' validity.
     last_epoch : int
         The endpoint of the associated agent's pathfinding window.
-    open_set : heap of TimeNode
-        The fringe of the algorithm.
+    open_set : heap of (tuple, TimeNode)
+        The fringe of the algorithm, each node being keyed by its f-value
+        followed by the tie-breaking criteria and its insertion order.
     closed_set : dict of (int, int, int): TimeNode
         The set of nodes already extended during the execution.
-    backwards_search : AStar
-        The A* instance used to obtain the true distances to the goal.
-
-    NB_ITERS : int
-        The number of iterations in all space-time A* instances.
-    NB_CALLS : int
-        The number of executions of space-time A*.
+    backwards_search : ResumableDistanceOracle
+        The backwards search used to obtain the true distances to the goal.
+    distance_field : array of int or None
+        The cached distance field of the goal, used instead of
+        `backwards_search` when available.
+    tie_breaking : tuple of str
+        The tie-breaking criteria of this instance, those of the world when it
+        was created, applied in order; the remaining ties are broken by
+        insertion order.
+    nb_pushed : int
+        The number of nodes pushed into the fringe so far.
+
+    TIE_BREAKERS : tuple of str
+        The available tie-breaking criteria between nodes of equal f-value:
+        ``'depth'`` prefers later epochs, ``'conflicts'`` prefers nodes whose
+        cell is not reserved by another agent at the next epoch, and
+        ``'goal'`` prefers nodes closer to the goal.
 
     Notes
     -----
@@ -238,37 +257,104 @@ class TimeAStar(AStar):
 
     """
 
-    NB_ITERS = 0
-    NB_CALLS = 0
+    TIE_BREAKERS = ('depth', 'conflicts', 'goal')
 
-    def __init__(self, initial_state, goal_state, initial_epoch, player_id, walls, backwards_search, last_epoch=None):
+    def __init__(self, initial_state, goal_state, initial_epoch, player_id, world, backwards_search, last_epoch=None):
         self.initial_state = TimeNode(self, *initial_state, t=initial_epoch)
         self.goal_state = TimeNode(self, *goal_state)
         self.player_id = player_id
-        self.walls = walls
+        self.world = world
+        self.walls = world.walls
+        self.grid_map = world.grid_map
         self.last_epoch = last_epoch if last_epoch is not None \
-            else initial_epoch + AdvancedPlayer.frequence
-        self.open_set = [self.initial_state]
+            else initial_epoch + world.get_window()
         self.closed_set = {}
         self.backwards_search = backwards_search if backwards_search is not None \
-            else AStar(goal_state, initial_state, walls)
-        AdvancedPlayer.reservation_table[self.initial_state.coordinates] = player_id
+            else ResumableDistanceOracle(goal_state, self.grid_map, origin=initial_state,
+                                         world=world)
+        self.distance_field = world.distance_fields.get(self.grid_map.base, goal_state)
+        self.tie_breaking = world.tie_breaking
+        self.nb_pushed = 0
+        self.open_set = []
+        self.add_to_open_set([self.initial_state])
+        world.reservation_table.reserve(
+            self.initial_state.coordinates, player_id)
+
+    def key(self, node):
+        """Computes the key of the given node in the fringe.
+
+        Parameters
+        ----------
+        node : TimeNode
+            A node to be added to the fringe.
+
+        Returns
+        -------
+        tuple
+            The f-value of the node, then its value for each tie-breaking
+            criterion, the lowest first, then its insertion order.
+
+        """
+        key = [node.f()]
+        for criterion in self.tie_breaking:
+            if criterion == 'depth':
+                key.append(-node.t)
+            elif criterion == 'conflicts':
+                key.append(not self.world.reservation_table.is_available(
+                    node.position, node.t + 1, self.player_id))
+            else:
+                key.append(node.h())
+        key.append(self.nb_pushed)
+        self.nb_pushed += 1
+        return tuple(key)
+
+    def add_to_open_set(self, states):
+        """Appends the given nodes to the fringe, keyed by :meth:`key`.
+
+        Parameters
+        ----------
+        states : list of TimeNode
+            A list of state-wrapping nodes to be added to the fringe.
+
+        """
+        for st in states:
+            heapq.heappush(self.open_set, (self.key(st), st))
+
+    def select_best(self):
+        """Selects the best node in the fringe on the basis of its key.
+
+        Returns
+        -------
+        TimeNode
+            The node of the fringe with the lowest key.
+
+        """
+        return heapq.heappop(self.open_set)[1]
 
     def true_distance(self, position):
         """Calculates the true distance from the given position to the goal.
 
+        Parameters
+        ----------
+        position : (int, int)
+            The space coordinates of the position.
+
         Returns
         -------
-        int
-            The Manhattan distance from the given position to the goal.
+        int or float
+            The true distance from the given position to the goal, or infinity
+            if the goal cannot be reached.
+
+        See Also
+        --------
+        coop.tools.ResumableDistanceOracle.distance
+        coop.tools.DistanceFieldCache
 
         """
-        node = self.backwards_search.get_node_at(position)
-        if node is None:
-            self.backwards_search.set_new_goal(position)
-            self.backwards_search.run()
-            node = self.backwards_search.get_node_at(position)
-        return node.cost
+        if self.distance_field is not None:
+            cost = self.distance_field[self.grid_map.index_of(position)]
+            return cost if cost >= 0 else math.inf
+        return self.backwards_search.distance(position)
 
     def run(self):
         """Runs this space-time A* instance.
@@ -285,7 +371,7 @@ class TimeAStar(AStar):
         `pop()` in order to obtain the immediate next step to take.
 
         """
-        TimeAStar.NB_CALLS += 1
+        self.world.nb_calls += 1
         while not self.open_set_is_empty():
             current_state = self.select_best()
 
@@ -293,7 +379,7 @@ class TimeAStar(AStar):
             if self.add_to_closed_set(current_state) is False:
                 continue
 
-            TimeAStar.NB_ITERS += 1
+            self.world.nb_iters += 1
             neighbours = current_state.get_valid_neighbours(self.player_id)
             not_extd_neighbours = self.get_not_extended(neighbours)
             self.add_to_open_set(not_extd_neighbours)
@@ -315,14 +401,15 @@ class TimeAStar(AStar):
             state.
 
         """
-        t = final_state.t
         current_state = final_state
         steps = []
+        reserved = [self.initial_state.coordinates]
         while current_state != self.initial_state:
-            t -= 1
             steps.append(current_state.get_step())
-            AdvancedPlayer.reservation_table[current_state.coordinates] = self.player_id
+            reserved.append(current_state.coordinates)
             current_state = current_state.parent
+        # the vertices as well as the moves between them are reserved
+        self.world.reservation_table.reserve_path(reserved, self.player_id)
         return steps
 
 
@@ -335,8 +422,8 @@ class AdvancedPlayer(CoopPlayer):
         This argument contains the initial coordinates of the agent.
     goal_positions : list of (int, int)
         This argument contains a list of all the goals of the agent.
-    walls : list of (int, int)
-        This argument contains the list of all the obstacles to be avoided.
+    world : World
+        This argument contains the world the agent lives in.
     goal_choice : GoalChoiceStrategy, optional
         This argument defines the next goal choice mode.
 
@@ -355,7 +442,9 @@ class AdvancedPlayer(CoopPlayer):
     current_goal : (int, int)
         The coordinates of the agent's current goal.
     id : int
-        The agent's id number.
+        The agent's id number, i.e. its index in the world's players.
+    world : World
+        The world shared with the other agents.
     walls : list of (int, int)
         The storage location of the walls position.
     a_star : AStar or None
@@ -367,17 +456,6 @@ class AdvancedPlayer(CoopPlayer):
     search_epoch : int
         The epoch at which the player must replan its path.
 
-    timer : int
-        A universal timer.
-    frequence : int
-        The frequence of pathfinding in the stationary case.
-    players : list of AdvancedPlayer
-        The list of all advanced cooperative agents in the grid.
-    reservation_table : dict of (int, int, int): int
-        A structure used to reserve grid positions at any time.
-    counter : int
-        The number of players on the grid.
-
     Notes
     -----
     This space-time version was based on David Silver's algorithm for cooperative
@@ -386,23 +464,13 @@ class AdvancedPlayer(CoopPlayer):
 
     """
 
-    timer = 0
-    frequence = 0
-    players = []
-    reservation_table = {}
-    counter = 0  # for id's initialisation
-
-    def __init__(self, initial_position, goal_positions, walls, goal_choice=NaiveStrategy):
-        super().__init__(initial_position, goal_positions, walls, goal_choice)
+    def __init__(self, initial_position, goal_positions, world, goal_choice=NaiveStrategy):
+        super().__init__(initial_position, goal_positions, world, goal_choice)
         self.current_goal = self.goal_choice.get_next_goal(initial_position)
-        self.id = AdvancedPlayer.counter
+        self.id = len(world.players) - 1
         self.search_epoch = -1
 
-        # update the list of players
-        AdvancedPlayer.counter += 1
-        AdvancedPlayer.players.append(self)
-
-    def __set_search_epoch(self, search_epoch):
+    def set_search_epoch(self, search_epoch):
         """Sets the search epoch of this agent.
 
         The search epoch corresponds to the time at which the agent will plan
@@ -414,59 +482,40 @@ class AdvancedPlayer(CoopPlayer):
         search_epoch : int
             The epoch at which this agent will plan its path to its current goal.
 
+        See Also
+        --------
+        coop.world.World.set_search_epochs
+
         """
         self.search_epoch = search_epoch
         self.a_star = TimeAStar(self.current_position, self.current_goal,
-                                self.search_epoch, self.id, self.walls, backwards_search=None)
-        for t in range(search_epoch):
-            AdvancedPlayer.reservation_table[(
-                *self.initial_position, t)] = self.id
-
-    @classmethod
-    def set_search_epochs(cls):
-        """Initialises the search epoch for each agent.
+                                self.search_epoch, self.id, self.world,
+                                backwards_search=self.get_distance_oracle())
+        self.world.reservation_table.reserve_path(
+            [(*self.initial_position, t) for t in range(search_epoch)], self.id)
 
-        Notes
-        -----
-        This method interleaves the searches, i.e. there are approximately
-        :math:`n/f` agents replanning at any epoch, where :math:`n` is the
-        number of agents and :math:`f` is the pathfinding frequence.
+    def get_distance_oracle(self):
+        """Retrieves the true distance oracle for this agent's current goal.
 
-        """
-        n = cls.counter
-        d = cls.frequence
-        players_per_epoch = n // d
-        cnt = 0
-        for _ in range(players_per_epoch):
-            for t in range(d):
-                cls.players[cnt].__set_search_epoch(t)
-                cnt += 1
-        rem = n - cnt
-        for t in range(d):
-            if rem == 0:
-                break
-            cls.players[cnt].__set_search_epoch(t)
-            rem -= 1
-            cnt += 1
-
-    @classmethod
-    def set_pathfinding_frequence(cls, frequence):
-        """Sets the pathfinding frequence for the agents.
+        The oracle is shared by all the agents pursuing the same goal, so that
+        they do not each rebuild an identical backwards search.
 
-        Parameters
-        ----------
-        frequence : int
-            The time after which an agent must replan its path.
+        Returns
+        -------
+        ResumableDistanceOracle
+            The backwards search rooted at this agent's current goal.
 
         """
-        cls.frequence = frequence
+        oracle = self.world.distance_oracles.get(self.current_goal)
+        if oracle is None or oracle.grid_map is not self.grid_map:
+            oracle = ResumableDistanceOracle(self.current_goal, self.grid_map,
+                                             origin=self.current_position, world=self.world)
+            self.world.distance_oracles[self.current_goal] = oracle
+        return oracle
 
     def clear_trace(self):
         """Removes any trace of this agent's path from the reservation table."""
-        keys_to_delete = [(x, y, t) for (x, y, t), id in AdvancedPlayer.reservation_table.items()
-                          if id == self.id]
-        for k in keys_to_delete:
-            del AdvancedPlayer.reservation_table[k]
+        self.world.reservation_table.release(self.id)
 
     def pathfind(self, resume=True):
         """Finds a path to one of this agent's goals.
@@ -478,23 +527,28 @@ class AdvancedPlayer(CoopPlayer):
 
         """
         self.clear_trace()
+        world = self.world
 
         if resume is True:  # for continuing the pursuit of current goal
             backwards_search = self.a_star.backwards_search
-            last_epoch = self.a_star.last_epoch + AdvancedPlayer.frequence
+            last_epoch = self.a_star.last_epoch + world.frequence
         else:  # for a new path
             self.current_goal = self.goal_choice.get_next_goal(
                 self.current_position)
             last_epoch = self.a_star.last_epoch
 
             # when replanning time
-            if last_epoch == AdvancedPlayer.timer + AdvancedPlayer.frequence:
-                last_epoch += AdvancedPlayer.frequence
+            if last_epoch == world.timer + world.frequence:
+                last_epoch += world.frequence
+
+            backwards_search = self.get_distance_oracle()
 
-            backwards_search = None
+        # in the windowed mode, the window always starts at the current epoch
+        if world.window is not None:
+            last_epoch = world.timer + world.window
 
         self.a_star = TimeAStar(self.current_position, self.current_goal,
-                                AdvancedPlayer.timer, self.id, self.walls, backwards_search, last_epoch=last_epoch)
+                                world.timer, self.id, world, backwards_search, last_epoch=last_epoch)
         self.steps = self.a_star.run()
 
     def is_last(self):
@@ -508,7 +562,7 @@ class AdvancedPlayer(CoopPlayer):
             True iff this agent is the last one in the list of players.
 
         """
-        return self.id == len(AdvancedPlayer.players) - 1
+        return self.id == len(self.world.players) - 1
 
     def next(self):
         """Determines this agent's next position in the grid.
@@ -519,16 +573,17 @@ class AdvancedPlayer(CoopPlayer):
             The next position of the agent.
 
         """
+        world = self.world
         # the agent succeded and wishes to meet another goal
         if self.is_at_goal() and self.has_next_goal():
             self.pathfind(resume=False)
-            if AdvancedPlayer.timer == self.search_epoch:
-                self.search_epoch += AdvancedPlayer.frequence
+            if world.timer == self.search_epoch:
+                self.search_epoch += world.frequence
 
         # replanning time
-        elif self.search_epoch == AdvancedPlayer.timer:
+        elif self.search_epoch == world.timer:
             self.pathfind(resume=True)
-            self.search_epoch += AdvancedPlayer.frequence
+            self.search_epoch += world.frequence
 
         # when along the path
         if self.has_next_step():
@@ -536,6 +591,6 @@ class AdvancedPlayer(CoopPlayer):
 
         # the last agent updates the timer
         if self.is_last():
-            AdvancedPlayer.timer += 1
+            world.tick()
 
         return self.current_position
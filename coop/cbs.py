@@ -0,0 +1,950 @@
+"""
+.. module:: cbs
+   :synopsis: This file contains the Conflict-Based Search multi-agent planner.
+.. moduleauthor:: Angelo Ortiz <github.com/angelo-ortiz>
+"""
+
+import heapq
+import itertools
+import math
+import time
+
+from .reservations import find_conflicts
+from .tools import DistanceFieldCache, bfs_distance_field, get_grid_map
+
+
+class ConstrainedAStar:
+    """An execution of space-time A* subject to the constraints of a CBS node.
+
+    Every step, moving or waiting, costs one epoch, and the agent stays at
+    its goal once the path is over. The heuristic is the true distance to the
+    goal, read from its cached distance field.
+
+    Parameters
+    ----------
+    initial_state : (int, int)
+        This argument contains the coordinates of the initial node.
+    goal_state : (int, int)
+        This argument contains the coordinates of the goal node.
+    walls : GridMap or World
+        This argument contains the grid map of the obstacles to be avoided, or
+        the world whose grid map is used.
+    constraints : list of (str, tuple, int), optional
+        This argument contains the constraints to be satisfied, i.e. tuples
+        ``('vertex', (x, y), t)`` forbidding the cell ``(x, y)`` at epoch `t`,
+        ``('edge', ((x, y), (x', y')), t)`` forbidding the move from
+        ``(x, y)`` at epoch `t` to ``(x', y')`` at epoch ``t + 1``, and
+        ``('stay', (x, y), t)`` forbidding the cell ``(x, y)`` from epoch `t`
+        on, e.g. when another agent stays there.
+    distance_fields : DistanceFieldCache or None, optional
+        This argument contains the cache the distance field of the goal is
+        read from, or None to compute it.
+
+    Attributes
+    ----------
+    initial_state : (int, int)
+        The coordinates of the initial node.
+    goal_state : (int, int)
+        The coordinates of the goal node.
+    grid_map : GridMap
+        The occupancy grid used to test the neighbours' validity.
+    vertex_constraints : set of (int, int)
+        The forbidden cells, as pairs of cell index and epoch.
+    edge_constraints : set of (int, int, int)
+        The forbidden moves, as triples of cell indices and epoch of departure.
+    stay_constraints : dict of int: int
+        The first forbidden epoch of the cells forbidden for good, by index.
+    distance_field : array of int
+        The distance field of the goal, used as the heuristic.
+    nb_expansions : int
+        The number of space-time nodes extended so far.
+
+    """
+
+    def __init__(self, initial_state, goal_state, walls, constraints=(), distance_fields=None):
+        self.initial_state = initial_state
+        self.goal_state = goal_state
+        self.grid_map = get_grid_map(walls)
+        index_of = self.grid_map.index_of
+        self.vertex_constraints = set()
+        self.edge_constraints = set()
+        self.stay_constraints = {}
+        for kind, cells, t in constraints:
+            if kind == 'vertex':
+                self.vertex_constraints.add((index_of(cells), t))
+            elif kind == 'stay':
+                index = index_of(cells)
+                self.stay_constraints[index] = min(t, self.stay_constraints.get(index, t))
+            else:
+                self.edge_constraints.add((index_of(cells[0]), index_of(cells[1]), t))
+        if distance_fields is not None:
+            self.distance_field = distance_fields.get_or_compute(
+                self.grid_map.base, goal_state)
+        else:
+            self.distance_field = bfs_distance_field(self.grid_map.base, goal_state)
+        self.nb_expansions = 0
+
+    def run(self):
+        """Runs this constrained space-time A* instance.
+
+        Returns
+        -------
+        list of (int, int) or None
+            The cells occupied from epoch 0 until the arrival at the goal, or
+            None if no path satisfies the constraints.
+
+        """
+        grid_map = self.grid_map
+        blocked, nb_columns = grid_map.blocked, grid_map.nb_columns
+        size = grid_map.nb_rows * nb_columns
+        field = self.distance_field
+        start = grid_map.index_of(self.initial_state)
+        goal = grid_map.index_of(self.goal_state)
+        stays = self.stay_constraints
+        if field[start] < 0 or goal in stays:
+            return None
+
+        # the agent may only stop at the goal after its last constraint there
+        last_goal_constraint = max(
+            [t for index, t in self.vertex_constraints if index == goal], default=-1)
+        # past all the constraints, a shortest path is never delayed
+        horizon = max([t for _, t in self.vertex_constraints] +
+                      [t for _, _, t in self.edge_constraints] +
+                      list(stays.values()), default=0) + size
+
+        # every step costs one epoch, so the cost of a node is its epoch
+        parents = {(start, 0): None}
+        open_set = [(field[start], field[start], 0, start)]
+        closed_set = set()
+        while open_set != []:
+            _, _, t, index = heapq.heappop(open_set)
+            if (index, t) in closed_set:
+                continue
+            closed_set.add((index, t))
+            self.nb_expansions += 1
+
+            if index == goal and t > last_goal_constraint:
+                return self.get_path((index, t), parents)
+            if t >= horizon:
+                continue
+
+            x, y = divmod(index, nb_columns)
+            neighbours = [index]
+            if x + 1 < grid_map.nb_rows:
+                neighbours.append(index + nb_columns)
+            if x > 0:
+                neighbours.append(index - nb_columns)
+            if y + 1 < nb_columns:
+                neighbours.append(index + 1)
+            if y > 0:
+                neighbours.append(index - 1)
+            for n in neighbours:
+                state = (n, t + 1)
+                if blocked[n] or field[n] < 0 or state in parents or \
+                        state in self.vertex_constraints or \
+                        (index, n, t) in self.edge_constraints or \
+                        (n in stays and t + 1 >= stays[n]):
+                    continue
+                parents[state] = (index, t)
+                heapq.heappush(open_set, (t + 1 + field[n], field[n], t + 1, n))
+        return None
+
+    def get_path(self, state, parents):
+        """Determines the cells leading to the given state from the initial one.
+
+        Parameters
+        ----------
+        state : (int, int)
+            The final state, as a pair of cell index and epoch.
+        parents : dict of (int, int): (int, int)
+            The parent state of each reached state.
+
+        Returns
+        -------
+        list of (int, int)
+            The cells occupied from epoch 0 until the final state.
+
+        """
+        path = []
+        while state is not None:
+            path.append(self.grid_map.coordinates_of(state[0]))
+            state = parents[state]
+        return path[::-1]
+
+
+class FocalAStar(ConstrainedAStar):
+    """An execution of constrained space-time A* with a focal list.
+
+    The nodes whose f-value is within the suboptimality bound of the lowest
+    one form the focal list, from which the node with the fewest conflicts
+    with the other agents' paths is extended first.
+
+    Parameters
+    ----------
+    initial_state : (int, int)
+        This argument contains the coordinates of the initial node.
+    goal_state : (int, int)
+        This argument contains the coordinates of the goal node.
+    walls : GridMap or World
+        This argument contains the grid map of the obstacles to be avoided, or
+        the world whose grid map is used.
+    constraints : list of (str, tuple, int), optional
+        This argument contains the constraints to be satisfied.
+    suboptimality : float, optional
+        This argument contains the factor by which the path may be longer
+        than the shortest one.
+    other_paths : list of list of (int, int), optional
+        This argument contains the paths of the other agents, whose conflicts
+        are to be avoided when possible.
+    distance_fields : DistanceFieldCache or None, optional
+        This argument contains the cache the distance field of the goal is
+        read from, or None to compute it.
+
+    Attributes
+    ----------
+    suboptimality : float
+        The factor by which the path may be longer than the shortest one.
+    vertex_counts : dict of (int, int): int
+        The number of other agents at each cell index and epoch.
+    edge_counts : dict of (int, int, int): int
+        The number of other agents taking each move, by cell indices and
+        epoch of departure.
+    parked : dict of int: list of int
+        The epochs from which other agents stay at each cell index.
+    lower_bound : int
+        The lowest f-value of the fringe when the path was found, i.e. a lower
+        bound of the cost of the shortest path.
+
+    See Also
+    --------
+    ConstrainedAStar
+
+    """
+
+    def __init__(self, initial_state, goal_state, walls, constraints=(),
+                 suboptimality=1.0, other_paths=(), distance_fields=None):
+        super().__init__(initial_state, goal_state, walls, constraints, distance_fields)
+        self.suboptimality = suboptimality
+        self.vertex_counts = {}
+        self.edge_counts = {}
+        self.parked = {}
+        self.lower_bound = 0
+        index_of = self.grid_map.index_of
+        for path in other_paths:
+            indices = [index_of(cell) for cell in path]
+            for t, index in enumerate(indices):
+                self.vertex_counts[(index, t)] = self.vertex_counts.get((index, t), 0) + 1
+            for t, (index, following) in enumerate(zip(indices, indices[1:])):
+                if index != following:
+                    move = (index, following, t)
+                    self.edge_counts[move] = self.edge_counts.get(move, 0) + 1
+            if indices != []:
+                self.parked.setdefault(indices[-1], []).append(len(indices))
+
+    def count_conflicts(self, index, following, t):
+        """Counts the conflicts of a move with the other agents' paths.
+
+        Parameters
+        ----------
+        index : int
+            The index of the cell left at epoch `t`.
+        following : int
+            The index of the cell reached at epoch `t + 1`.
+        t : int
+            The epoch of departure.
+
+        Returns
+        -------
+        int
+            The number of vertex and edge conflicts of the move.
+
+        """
+        count = self.vertex_counts.get((following, t + 1), 0)
+        if following in self.parked:
+            count += sum(1 for since in self.parked[following] if t + 1 >= since)
+        if index != following:
+            count += self.edge_counts.get((following, index, t), 0)
+        return count
+
+    def run(self):
+        """Runs this focal space-time A* instance.
+
+        Returns
+        -------
+        list of (int, int) or None
+            The cells occupied from epoch 0 until the arrival at the goal, or
+            None if no path satisfies the constraints.
+
+        """
+        grid_map = self.grid_map
+        blocked, nb_columns = grid_map.blocked, grid_map.nb_columns
+        size = grid_map.nb_rows * nb_columns
+        field = self.distance_field
+        start = grid_map.index_of(self.initial_state)
+        goal = grid_map.index_of(self.goal_state)
+        stays = self.stay_constraints
+        if field[start] < 0 or goal in stays:
+            return None
+
+        last_goal_constraint = max(
+            [t for index, t in self.vertex_constraints if index == goal], default=-1)
+        horizon = max([t for _, t in self.vertex_constraints] +
+                      [t for _, _, t in self.edge_constraints] +
+                      list(stays.values()), default=0) + size
+
+        # the fringe is split into f-value buckets, those within the bound
+        # being in the focal list, ordered by conflicts
+        counter = itertools.count()
+        parents = {(start, 0): None}
+        open_counts = {field[start]: 1}
+        waiting = {}
+        focal = [(0, field[start], 0, next(counter), start)]
+        f_min = field[start]
+        released = math.floor(self.suboptimality * f_min)
+        nb_open = 1
+        while focal != []:
+            conflicts, f, t, _, index = heapq.heappop(focal)
+            t = -t
+            open_counts[f] -= 1
+            nb_open -= 1
+            self.nb_expansions += 1
+
+            if index == goal and t > last_goal_constraint:
+                self.lower_bound = f_min
+                return self.get_path((index, t), parents)
+
+            if t < horizon:
+                x, y = divmod(index, nb_columns)
+                neighbours = [index]
+                if x + 1 < grid_map.nb_rows:
+                    neighbours.append(index + nb_columns)
+                if x > 0:
+                    neighbours.append(index - nb_columns)
+                if y + 1 < nb_columns:
+                    neighbours.append(index + 1)
+                if y > 0:
+                    neighbours.append(index - 1)
+                for n in neighbours:
+                    state = (n, t + 1)
+                    if blocked[n] or field[n] < 0 or state in parents or \
+                            state in self.vertex_constraints or \
+                            (index, n, t) in self.edge_constraints or \
+                            (n in stays and t + 1 >= stays[n]):
+                        continue
+                    parents[state] = (index, t)
+                    f_n = t + 1 + field[n]
+                    entry = (conflicts + self.count_conflicts(index, n, t), f_n,
+                             -(t + 1), next(counter), n)
+                    open_counts[f_n] = open_counts.get(f_n, 0) + 1
+                    nb_open += 1
+                    if f_n <= released:
+                        heapq.heappush(focal, entry)
+                    else:
+                        waiting.setdefault(f_n, []).append(entry)
+
+            # the bound rises with the lowest f-value of the fringe
+            if nb_open == 0:
+                break
+            while open_counts.get(f_min, 0) == 0:
+                f_min += 1
+            bound = math.floor(self.suboptimality * f_min)
+            for f_released in range(released + 1, bound + 1):
+                for entry in waiting.pop(f_released, []):
+                    heapq.heappush(focal, entry)
+            released = max(released, bound)
+        return None
+
+
+class ConstraintTreeNode:
+    """A node of the constraint tree explored by CBS.
+
+    Each node only stores the constraint it adds to its parent's, so that the
+    constraints of an agent are gathered by going up the tree.
+
+    Parameters
+    ----------
+    paths : list of list of (int, int)
+        This argument contains the path of each agent.
+    parent : ConstraintTreeNode or None, optional
+        This argument points to the node this one was split from.
+    agent : int or None, optional
+        This argument contains the index of the constrained agent.
+    constraint : (str, tuple, int) or None, optional
+        This argument contains the constraint added to the parent's.
+
+    Attributes
+    ----------
+    paths : list of list of (int, int)
+        The path of each agent.
+    parent : ConstraintTreeNode or None
+        The node this one was split from.
+    agent : int or None
+        The index of the constrained agent.
+    constraint : (str, tuple, int) or None
+        The constraint added to the parent's.
+    makespan : int
+        The arrival epoch of the last agent.
+    sum_of_costs : int
+        The sum of the arrival epochs of all the agents.
+
+    """
+
+    __slots__ = ('paths', 'parent', 'agent', 'constraint', 'makespan', 'sum_of_costs')
+
+    def __init__(self, paths, parent=None, agent=None, constraint=None):
+        self.paths = paths
+        self.parent = parent
+        self.agent = agent
+        self.constraint = constraint
+        costs = [len(path) - 1 for path in paths]
+        self.makespan = max(costs, default=0)
+        self.sum_of_costs = sum(costs)
+
+    def get_constraints(self, agent):
+        """Gathers the constraints of the given agent.
+
+        Parameters
+        ----------
+        agent : int
+            The index of the agent.
+
+        Returns
+        -------
+        list of (str, tuple, int)
+            The constraints of the agent from the root down to this node.
+
+        """
+        constraints = []
+        node = self
+        while node is not None:
+            if node.agent == agent:
+                constraints.append(node.constraint)
+            node = node.parent
+        return constraints
+
+    @property
+    def cost(self):
+        """The cost of this node, makespan first and sum of costs second.
+
+        Returns
+        -------
+        (int, int)
+            The makespan and the sum of costs of the node's paths.
+
+        """
+        return (self.makespan, self.sum_of_costs)
+
+
+def split_conflict(conflict):
+    """Determines the constraints resolving the given conflict.
+
+    Parameters
+    ----------
+    conflict : (str, int, int, int, tuple)
+        A conflict as found by :func:`~coop.reservations.find_conflicts`.
+
+    Returns
+    -------
+    list of (int, (str, tuple, int))
+        The constraint to be added for each of the two agents.
+
+    """
+    kind, t, i, j, cells = conflict
+    if kind == 'vertex':
+        return [(i, ('vertex', cells[0], t)), (j, ('vertex', cells[0], t))]
+    cell_i, cell_j = cells
+    return [(i, ('edge', (cell_i, cell_j), t)), (j, ('edge', (cell_j, cell_i), t))]
+
+
+class CBSPlanner:
+    """A cooperative entity that plans the optimal joint path of its agents.
+
+    The joint path is found by Conflict-Based Search, which minimises the
+    makespan first and the sum of costs second. It is replanned from the
+    agents' current positions whenever an agent moves on to a new goal, and
+    the agents take their steps one at a time, as with
+    :class:`~coop.planner.CoopPlanner`.
+
+    Parameters
+    ----------
+    initial_positions : list of (int, int)
+        This argument contains the initial coordinates of the agents.
+    goal_positions : list of list of (int, int)
+        This argument contains a list of goals per agent.
+    walls : GridMap or World
+        This argument contains the grid map of the obstacles to be avoided, or
+        the world whose grid map and distance fields are used.
+    node_limit : int or None, optional
+        This argument contains the number of constraint tree nodes after which
+        a search returns its best joint path, or None for no limit.
+    time_limit : float or None, optional
+        This argument contains the processor time in seconds after which a
+        search returns its best joint path, or None for no limit.
+
+    Attributes
+    ----------
+    positions : list of (int, int)
+        The current coordinates of the agents.
+    goal_positions : list of list of (int, int)
+        The goals each agent has yet to pursue.
+    current_goals : list of (int, int)
+        The goal each agent currently pursues, or its position if it has none.
+    walls : GridMap or World
+        The storage location of the walls position.
+    grid_map : GridMap
+        The occupancy grid of the walls.
+    distance_fields : DistanceFieldCache
+        The distance fields of the goals, those of the world if any.
+    paths : list of list of (int, int)
+        The path of each agent from the epoch of the last replanning.
+    clock : int
+        The number of epochs since the last replanning.
+    horizon : int or None
+        The number of epochs after the last replanning at which the joint path
+        must be replanned, or None if it is conflict-free to the end.
+    current_player : int
+        The index of the current player.
+    node_limit : int or None
+        The number of constraint tree nodes after which a search returns its
+        best joint path.
+    time_limit : float or None
+        The processor time after which a search returns its best joint path.
+    nb_nodes : int
+        The number of constraint tree nodes extended during the last search.
+    nb_expansions : int
+        The number of low-level nodes extended during the last search.
+    nb_failures : int
+        The number of searches which did not return a conflict-free joint
+        path.
+
+    Notes
+    -----
+    This implements Sharon et al.'s Conflict-Based Search. Its cost grows
+    exponentially with the number of conflicts, so it is meant for small teams.
+    It does not terminate on unsolvable instances unless `node_limit` or
+    `time_limit` is set, in which case the agents follow the longest
+    conflict-free prefix found.
+
+    """
+
+    def __init__(self, initial_positions, goal_positions, walls, node_limit=None,
+                 time_limit=None):
+        self.positions = list(initial_positions)
+        self.goal_positions = [goals[:] for goals in goal_positions]
+        self.current_goals = [goals.pop(0) if goals != [] else pos
+                              for pos, goals in zip(self.positions, self.goal_positions)]
+        self.walls = walls
+        self.grid_map = get_grid_map(walls)
+        self.distance_fields = getattr(walls, 'distance_fields', None)
+        if self.distance_fields is None:
+            self.distance_fields = DistanceFieldCache()
+        self.paths = []
+        self.clock = 0
+        self.horizon = None
+        self.current_player = -1
+        self.node_limit = node_limit
+        self.time_limit = time_limit
+        self.nb_nodes = 0
+        self.nb_expansions = 0
+        self.nb_failures = 0
+        self.distance_fields.prefetch(self.grid_map, self.current_goals)
+        self.replan()
+
+    def add_goal(self, player, goal_pos):
+        """Adds a new goal to the given player.
+
+        Parameters
+        ----------
+        player : int
+            The index of the agent.
+        goal_pos : (int, int)
+            The coordinates of a new goal for the given agent.
+
+        """
+        self.goal_positions[player].append(goal_pos)
+
+    def find_path(self, agent, goal, constraints=()):
+        """Finds the shortest path of an agent satisfying the given constraints.
+
+        Parameters
+        ----------
+        agent : int
+            The index of the agent.
+        goal : (int, int)
+            The coordinates of the agent's goal.
+        constraints : list of (str, tuple, int), optional
+            The constraints of the agent.
+
+        Returns
+        -------
+        list of (int, int) or None
+            The cells occupied from the current epoch until the arrival at the
+            goal, or None if there is no such path.
+
+        """
+        search = ConstrainedAStar(self.positions[agent], goal, self.grid_map, constraints,
+                                  self.distance_fields)
+        path = search.run()
+        self.nb_expansions += search.nb_expansions
+        return path
+
+    def search(self, goals):
+        """Runs Conflict-Based Search from the agents' current positions.
+
+        Parameters
+        ----------
+        goals : list of (int, int)
+            The coordinates of the goal of each agent.
+
+        Returns
+        -------
+        list of list of (int, int) or None
+            The path of each agent, conflict-free unless there is none or a
+            limit is reached, in which case the paths of the extended node
+            whose first conflict is the latest are returned, or None if an
+            agent has no path at all.
+
+        """
+        self.nb_nodes = 0
+        self.nb_expansions = 0
+        start = time.process_time()
+        root = ConstraintTreeNode(
+            [self.find_path(agent, goal) for agent, goal in enumerate(goals)])
+        if None in root.paths:
+            return None
+
+        best, best_epoch = root, -1
+        counter = itertools.count()
+        open_set = [(root.cost, next(counter), root)]
+        while open_set != []:
+            if (self.node_limit is not None and self.nb_nodes >= self.node_limit) or \
+                    (self.time_limit is not None and
+                     time.process_time() - start >= self.time_limit):
+                break
+            _, _, node = heapq.heappop(open_set)
+            self.nb_nodes += 1
+            conflicts = find_conflicts(node.paths, limit=1)
+            if conflicts == []:
+                return node.paths
+            if conflicts[0][1] > best_epoch:
+                best, best_epoch = node, conflicts[0][1]
+
+            for agent, constraint in split_conflict(conflicts[0]):
+                constraints = node.get_constraints(agent) + [constraint]
+                path = self.find_path(agent, goals[agent], constraints)
+                if path is None:
+                    continue
+                paths = node.paths[:]
+                paths[agent] = path
+                child = ConstraintTreeNode(paths, node, agent, constraint)
+                heapq.heappush(open_set, (child.cost, next(counter), child))
+        return best.paths
+
+    def replan(self):
+        """Replans the joint path of the agents towards their current goals.
+
+        An agent whose goal cannot be reached stays put until its next goal,
+        and all the agents wait for an epoch, after which the search is
+        retried, if no joint path is found. If the joint path still has
+        conflicts, only its conflict-free prefix is followed, after which it
+        is replanned. The prefix lasts one epoch at least: when the first
+        steps already conflict, the agents concerned wait instead, one after
+        the other until the first steps are conflict-free.
+
+        """
+        goals = []
+        for pos, goal in zip(self.positions, self.current_goals):
+            field = self.distance_fields.get_or_compute(self.grid_map, goal)
+            goals.append(goal if field[self.grid_map.index_of(pos)] >= 0 else pos)
+        paths = self.search(goals)
+        if paths is None:
+            self.nb_failures += 1
+            self.paths = [[pos] for pos in self.positions]
+            self.horizon = 1
+            self.clock = 0
+            return
+
+        self.horizon = None
+        conflicts = find_conflicts(paths, limit=1)
+        if conflicts != []:
+            self.nb_failures += 1
+            kind, t, _, _, _ = conflicts[0]
+            # the agents stop right before the first conflict, yet they move
+            # at least once so as not to replan the same paths forever
+            self.horizon = max(t - 1 if kind == 'vertex' else t, 1)
+            paths = [path[:self.horizon + 1] for path in paths]
+            conflicts = find_conflicts(paths, limit=1)
+            while conflicts != []:
+                _, _, i, j, _ = conflicts[0]
+                waiting = j if len(paths[j]) > 1 else i
+                paths[waiting] = [self.positions[waiting]]
+                conflicts = find_conflicts(paths, limit=1)
+        self.paths = paths
+        self.clock = 0
+
+    def update_goals(self):
+        """Moves the agents that have met their current goal on to their next one.
+
+        Returns
+        -------
+        bool
+            True iff at least one agent has a new goal.
+
+        """
+        changed = False
+        for agent, goals in enumerate(self.goal_positions):
+            if self.positions[agent] == self.current_goals[agent] and goals != []:
+                self.current_goals[agent] = goals.pop(0)
+                changed = True
+        return changed
+
+    def next(self):
+        """Determines the current player's next position in the grid.
+
+        The joint path is replanned at the beginning of an epoch if an agent
+        moves on to a new goal, or if its conflict-free prefix is over.
+
+        Returns
+        -------
+        (int, int)
+            The next position of the current player.
+
+        """
+        self.current_player = (self.current_player + 1) % len(self.positions)
+        if self.current_player == 0:
+            new_goals = self.update_goals()
+            if new_goals or (self.horizon is not None and self.clock >= self.horizon):
+                self.replan()
+            self.clock += 1
+
+        path = self.paths[self.current_player]
+        self.positions[self.current_player] = path[min(self.clock, len(path) - 1)]
+        return self.positions[self.current_player]
+
+
+class FocalConstraintTreeNode(ConstraintTreeNode):
+    """A node of the constraint tree explored by ECBS.
+
+    Parameters
+    ----------
+    paths : list of list of (int, int)
+        This argument contains the path of each agent.
+    lower_bounds : list of int
+        This argument contains a lower bound of the cost of each agent's path.
+    parent : FocalConstraintTreeNode or None, optional
+        This argument points to the node this one was split from.
+    agent : int or None, optional
+        This argument contains the index of the constrained agent.
+    constraint : (str, tuple, int) or None, optional
+        This argument contains the constraint added to the parent's.
+
+    Attributes
+    ----------
+    lower_bounds : list of int
+        A lower bound of the cost of each agent's path.
+    lower_bound : int
+        A lower bound of the makespan of any solution below this node.
+    conflict : (str, int, int, int, tuple) or None
+        The first conflict between the node's paths, or None if there is none.
+    nb_conflicts : int
+        The number of conflicts between the node's paths.
+
+    See Also
+    --------
+    ConstraintTreeNode
+
+    """
+
+    __slots__ = ('lower_bounds', 'lower_bound', 'conflict', 'nb_conflicts')
+
+    def __init__(self, paths, lower_bounds, parent=None, agent=None, constraint=None):
+        super().__init__(paths, parent, agent, constraint)
+        self.lower_bounds = lower_bounds
+        self.lower_bound = max(lower_bounds, default=0)
+        conflicts = find_conflicts(paths)
+        self.conflict = conflicts[0] if conflicts != [] else None
+        self.nb_conflicts = len(conflicts)
+
+    @property
+    def focal_key(self):
+        """The order of this node in the focal list, fewest conflicts first.
+
+        Returns
+        -------
+        (int, int, int)
+            The number of conflicts, the makespan and the sum of costs.
+
+        """
+        return (self.nb_conflicts, self.makespan, self.sum_of_costs)
+
+
+class ECBSPlanner(CBSPlanner):
+    """A cooperative entity that plans a bounded-suboptimal joint path.
+
+    The joint path is found by Enhanced CBS, whose makespan is at most
+    `suboptimality` times the optimal one. Both the constraint tree and the
+    agents' space-time searches extend, among the nodes within the bound,
+    the one with the fewest conflicts first. When a limit is reached, the
+    joint path with the fewest conflicts found so far is followed up to its
+    first conflict, then replanned.
+
+    Parameters
+    ----------
+    initial_positions : list of (int, int)
+        This argument contains the initial coordinates of the agents.
+    goal_positions : list of list of (int, int)
+        This argument contains a list of goals per agent.
+    walls : GridMap or World
+        This argument contains the grid map of the obstacles to be avoided, or
+        the world whose grid map and distance fields are used.
+    suboptimality : float, optional
+        This argument contains the factor by which the makespan may exceed
+        the optimal one, at least 1.
+    node_limit : int or None, optional
+        This argument contains the number of constraint tree nodes after which
+        a search returns its best joint path, or None for no limit.
+    time_limit : float or None, optional
+        This argument contains the processor time in seconds after which a
+        search returns its best joint path, or None for no limit.
+
+    Attributes
+    ----------
+    suboptimality : float
+        The factor by which the makespan may exceed the optimal one.
+    time_limit : float or None
+        The processor time after which a search returns its best joint path.
+    nb_conflicts : int
+        The number of conflicts of the joint path returned by the last search.
+
+    See Also
+    --------
+    CBSPlanner
+
+    Notes
+    -----
+    This implements Barer et al.'s ECBS with the makespan as objective. The
+    lower bound of a constraint tree node is the largest of its agents' ones.
+
+    """
+
+    def __init__(self, initial_positions, goal_positions, walls, suboptimality=1.5,
+                 node_limit=None, time_limit=None):
+        if suboptimality < 1:
+            raise ValueError('The suboptimality bound must be at least 1')
+        self.suboptimality = suboptimality
+        self.nb_conflicts = 0
+        super().__init__(initial_positions, goal_positions, walls, node_limit, time_limit)
+
+    def find_focal_path(self, agent, goal, constraints=(), paths=()):
+        """Finds a bounded-suboptimal path of an agent avoiding the others.
+
+        Parameters
+        ----------
+        agent : int
+            The index of the agent.
+        goal : (int, int)
+            The coordinates of the agent's goal.
+        constraints : list of (str, tuple, int), optional
+            The constraints of the agent.
+        paths : list of list of (int, int), optional
+            The paths of all the agents, the agent's own one being ignored.
+
+        Returns
+        -------
+        (list of (int, int), int) or (None, None)
+            The cells occupied from the current epoch until the arrival at the
+            goal, and a lower bound of the cost of the shortest such path, or
+            (None, None) if there is no such path.
+
+        """
+        other_paths = [path for i, path in enumerate(paths) if i != agent]
+        search = FocalAStar(self.positions[agent], goal, self.grid_map, constraints,
+                            self.suboptimality, other_paths, self.distance_fields)
+        path = search.run()
+        self.nb_expansions += search.nb_expansions
+        if path is None:
+            return None, None
+        return path, search.lower_bound
+
+    def search(self, goals):
+        """Runs Enhanced CBS from the agents' current positions.
+
+        Parameters
+        ----------
+        goals : list of (int, int)
+            The coordinates of the goal of each agent.
+
+        Returns
+        -------
+        list of list of (int, int) or None
+            The path of each agent, conflict-free unless a limit is reached, or
+            None if an agent has no path at all.
+
+        """
+        self.nb_nodes = 0
+        self.nb_expansions = 0
+        self.nb_conflicts = 0
+        start = time.process_time()
+
+        paths, lower_bounds = [], []
+        for agent, goal in enumerate(goals):
+            path, lower_bound = self.find_focal_path(agent, goal, paths=paths)
+            if path is None:
+                return None
+            paths.append(path)
+            lower_bounds.append(lower_bound)
+        root = FocalConstraintTreeNode(paths, lower_bounds)
+        best = root
+
+        # the open list is ordered by lower bound, the focal list by conflicts
+        # and the nodes beyond the bound wait, ordered by makespan
+        counter = itertools.count()
+        open_set = [(root.lower_bound, next(counter), root)]
+        focal = [(root.focal_key, next(counter), root)]
+        waiting = []
+        closed = set()
+        lower_bound = root.lower_bound
+        while focal != []:
+            if (self.node_limit is not None and self.nb_nodes >= self.node_limit) or \
+                    (self.time_limit is not None and
+                     time.process_time() - start >= self.time_limit):
+                break
+            _, _, node = heapq.heappop(focal)
+            closed.add(id(node))
+            self.nb_nodes += 1
+            if node.focal_key < best.focal_key:
+                best = node
+            if node.conflict is None:
+                break
+
+            for agent, constraint in split_conflict(node.conflict):
+                constraints = node.get_constraints(agent) + [constraint]
+                path, agent_bound = self.find_focal_path(
+                    agent, goals[agent], constraints, node.paths)
+                if path is None:
+                    continue
+                paths = node.paths[:]
+                paths[agent] = path
+                lower_bounds = node.lower_bounds[:]
+                lower_bounds[agent] = max(agent_bound, lower_bounds[agent])
+                child = FocalConstraintTreeNode(paths, lower_bounds, node, agent, constraint)
+                heapq.heappush(open_set, (child.lower_bound, next(counter), child))
+                if child.makespan <= self.suboptimality * lower_bound:
+                    heapq.heappush(focal, (child.focal_key, next(counter), child))
+                else:
+                    heapq.heappush(waiting, (child.cost, next(counter), child))
+
+            # the bound rises with the lowest lower bound of the open list
+            while open_set != [] and id(open_set[0][2]) in closed:
+                heapq.heappop(open_set)
+            if open_set != [] and open_set[0][0] > lower_bound:
+                lower_bound = open_set[0][0]
+                while waiting != [] and waiting[0][0][0] <= self.suboptimality * lower_bound:
+                    _, _, child = heapq.heappop(waiting)
+                    heapq.heappush(focal, (child.focal_key, next(counter), child))
+            if focal == [] and waiting != []:
+                _, _, child = heapq.heappop(waiting)
+                heapq.heappush(focal, (child.focal_key, next(counter), child))
+
+        self.nb_conflicts = best.nb_conflicts
+        return best.paths
@@ -0,0 +1,574 @@
+"""
+.. module:: hierarchical
+   :synopsis: This file contains the hierarchical abstraction of large grids.
+.. moduleauthor:: Angelo Ortiz <github.com/angelo-ortiz>
+"""
+
+import heapq
+from collections import deque
+
+from .tools import GridAStar, distance, get_grid_map
+
+
+class HierarchicalMap:
+    """A cluster and entrance abstraction of a grid map.
+
+    The grid is split into square clusters. Each maximal free segment along
+    the border of two adjacent clusters is an entrance, represented by one
+    pair of transition cells (two pairs when the entrance is long). The
+    abstract graph links the transition cells across the borders, with cost
+    1, and the transition cells of a same cluster, with the length of the
+    shortest path inside the cluster.
+
+    Parameters
+    ----------
+    grid_map : GridMap
+        This argument contains the occupancy grid to be abstracted.
+    cluster_size : int, optional
+        This argument contains the side length of the clusters.
+
+    Attributes
+    ----------
+    grid_map : GridMap
+        The storage location of the abstracted grid map.
+    cluster_size : int
+        The storage location of the clusters' side length.
+    nb_cluster_rows : int
+        The number of rows of clusters.
+    nb_cluster_columns : int
+        The number of columns of clusters.
+    borders : dict of (int, int): list of (int, int)
+        The pairs of transition cells along the border of each pair of
+        adjacent clusters.
+    transitions : dict of int: set of int
+        The transition cells of each cluster.
+    edges : dict of int: dict of int: int
+        The abstract graph, i.e. the cost of the edge between any two linked
+        transition cells.
+    refined_paths : dict of (int, int): list of int
+        The cells of the intra-cluster paths already refined.
+    version : int
+        The version of the grid map the abstraction matches.
+    snapshot : bytearray
+        The obstacles of the grid map the abstraction matches.
+
+    ENTRANCE_SPLIT : int
+        The entrance length from which an entrance has two pairs of
+        transition cells.
+
+    """
+
+    ENTRANCE_SPLIT = 6
+
+    def __init__(self, grid_map, cluster_size=10):
+        self.grid_map = grid_map
+        self.cluster_size = cluster_size
+        self.nb_cluster_rows = -(-grid_map.nb_rows // cluster_size)
+        self.nb_cluster_columns = -(-grid_map.nb_columns // cluster_size)
+        self.borders = {}
+        self.transitions = {c: set() for c in range(
+            self.nb_cluster_rows * self.nb_cluster_columns)}
+        self.edges = {}
+        self.refined_paths = {}
+        self.version = grid_map.version
+        self.snapshot = bytearray(grid_map.blocked)
+        self.__repair(list(self.transitions))
+
+    def cluster_of(self, index):
+        """Determines the cluster enclosing the given cell.
+
+        Parameters
+        ----------
+        index : int
+            The index of the cell.
+
+        Returns
+        -------
+        int
+            The index of the cluster, numbered row by row.
+
+        """
+        x, y = self.grid_map.coordinates_of(index)
+        return (x // self.cluster_size) * self.nb_cluster_columns + \
+            y // self.cluster_size
+
+    def bounds_of(self, cluster):
+        """Determines the cells covered by the given cluster.
+
+        Parameters
+        ----------
+        cluster : int
+            The index of the cluster.
+
+        Returns
+        -------
+        (int, int, int, int)
+            The first row, the row after the last one, the first column and
+            the column after the last one of the cluster.
+
+        """
+        cx, cy = divmod(cluster, self.nb_cluster_columns)
+        r_0, c_0 = cx * self.cluster_size, cy * self.cluster_size
+        return (r_0, min(r_0 + self.cluster_size, self.grid_map.nb_rows),
+                c_0, min(c_0 + self.cluster_size, self.grid_map.nb_columns))
+
+    def __get_borders_of(self, cluster):
+        """Finds the borders between the given cluster and its neighbours.
+
+        Parameters
+        ----------
+        cluster : int
+            The index of the cluster.
+
+        Returns
+        -------
+        list of (int, int)
+            The pairs of adjacent clusters, the lowest index first.
+
+        """
+        cx, cy = divmod(cluster, self.nb_cluster_columns)
+        borders = []
+        if cx > 0:
+            borders.append((cluster - self.nb_cluster_columns, cluster))
+        if cx + 1 < self.nb_cluster_rows:
+            borders.append((cluster, cluster + self.nb_cluster_columns))
+        if cy > 0:
+            borders.append((cluster - 1, cluster))
+        if cy + 1 < self.nb_cluster_columns:
+            borders.append((cluster, cluster + 1))
+        return borders
+
+    def __find_entrances(self, border):
+        """Finds the pairs of transition cells along the given border.
+
+        Parameters
+        ----------
+        border : (int, int)
+            The pair of adjacent clusters.
+
+        Returns
+        -------
+        list of (int, int)
+            The pairs of transition cells, the one in the first cluster first.
+
+        """
+        first, second = border
+        r_0, r_1, c_0, c_1 = self.bounds_of(first)
+        nb_columns = self.grid_map.nb_columns
+        blocked = self.grid_map.blocked
+        if first // self.nb_cluster_columns == second // self.nb_cluster_columns:
+            # side by side
+            cells = [x * nb_columns + c_1 - 1 for x in range(r_0, r_1)]
+            shift = 1
+        else:
+            # one above the other
+            cells = [(r_1 - 1) * nb_columns + y for y in range(c_0, c_1)]
+            shift = nb_columns
+
+        pairs = []
+        run = []
+        for cell in cells + [None]:
+            if cell is not None and not blocked[cell] and not blocked[cell + shift]:
+                run.append(cell)
+                continue
+            if len(run) >= HierarchicalMap.ENTRANCE_SPLIT:
+                pairs += [(run[0], run[0] + shift), (run[-1], run[-1] + shift)]
+            elif run != []:
+                middle = run[len(run) // 2]
+                pairs.append((middle, middle + shift))
+            run = []
+        return pairs
+
+    def __search_in_cluster(self, source, bounds, targets=None):
+        """Runs a breadth-first search that never leaves the given bounds.
+
+        Parameters
+        ----------
+        source : int
+            The index of the root cell.
+        bounds : (int, int, int, int)
+            The bounds of the cluster, as returned by :meth:`bounds_of`.
+        targets : set of int or None, optional
+            The cells whose discovery ends the search early.
+
+        Returns
+        -------
+        dict of int: int
+            The parent of each reached cell, -1 for the root.
+        dict of int: int
+            The distance from the root to each reached cell.
+
+        """
+        r_0, r_1, c_0, c_1 = bounds
+        nb_columns = self.grid_map.nb_columns
+        blocked = self.grid_map.blocked
+        parents = {source: -1}
+        costs = {source: 0}
+        remaining = set(targets) if targets is not None else None
+        frontier = deque([source])
+        while frontier:
+            index = frontier.popleft()
+            if remaining is not None:
+                remaining.discard(index)
+                if not remaining:
+                    break
+            x, y = divmod(index, nb_columns)
+            for n, inside in ((index + nb_columns, x + 1 < r_1),
+                              (index - nb_columns, x > r_0),
+                              (index + 1, y + 1 < c_1),
+                              (index - 1, y > c_0)):
+                if inside and n not in parents and not blocked[n]:
+                    parents[n] = index
+                    costs[n] = costs[index] + 1
+                    frontier.append(n)
+        return parents, costs
+
+    def __link_cluster(self, cluster):
+        """Rebuilds the intra-cluster edges of the given cluster.
+
+        Parameters
+        ----------
+        cluster : int
+            The index of the cluster.
+
+        """
+        bounds = self.bounds_of(cluster)
+        transitions = self.transitions[cluster]
+        for t in transitions:
+            _, costs = self.__search_in_cluster(t, bounds, transitions)
+            edges = self.edges.setdefault(t, {})
+            for other in transitions:
+                if other != t and other in costs:
+                    edges[other] = costs[other]
+
+    def __repair(self, clusters):
+        """Rebuilds the abstraction around the given clusters.
+
+        The entrances along all the borders of the given clusters are found
+        again, and the intra-cluster edges are rebuilt for every cluster whose
+        transition cells may have changed.
+
+        Parameters
+        ----------
+        clusters : list of int
+            The indices of the clusters whose cells have changed.
+
+        """
+        borders = {b for c in clusters for b in self.__get_borders_of(c)}
+        touched = set(clusters) | {c for b in borders for c in b}
+
+        # forget everything about the touched clusters
+        for cluster in touched:
+            for t in self.transitions[cluster]:
+                for other in self.edges.pop(t, {}):
+                    if other in self.edges:
+                        self.edges[other].pop(t, None)
+            self.transitions[cluster] = set()
+        self.refined_paths = {key: path for key, path in self.refined_paths.items()
+                              if self.cluster_of(key[0]) not in touched}
+
+        for border in borders:
+            self.borders[border] = self.__find_entrances(border)
+        for cluster in touched:
+            for border in self.__get_borders_of(cluster):
+                side = 0 if border[0] == cluster else 1
+                self.transitions[cluster].update(
+                    pair[side] for pair in self.borders[border])
+        for border in {b for c in touched for b in self.__get_borders_of(c)}:
+            for first, second in self.borders[border]:
+                self.edges.setdefault(first, {})[second] = 1
+                self.edges.setdefault(second, {})[first] = 1
+        for cluster in touched:
+            self.__link_cluster(cluster)
+
+    def update_cells(self, cells):
+        """Repairs the abstraction after the obstacles of some cells changed.
+
+        The grid map must already enclose the changes, e.g. through
+        :meth:`~coop.tools.GridMap.block` or :meth:`~coop.tools.GridMap.unblock`.
+        Only the clusters enclosing the given cells and their neighbours are
+        rebuilt.
+
+        Parameters
+        ----------
+        cells : list of (int, int)
+            The coordinates of the cells whose state changed.
+
+        """
+        indices = [self.grid_map.index_of(cell) for cell in cells
+                   if self.grid_map.is_valid(*cell)]
+        self.__repair(list({self.cluster_of(index) for index in indices}))
+        for index in indices:
+            self.snapshot[index] = self.grid_map.blocked[index]
+
+    def refresh(self):
+        """Repairs the abstraction if the obstacles changed since it was built.
+
+        The changed cells are found by comparing the grid map with the
+        snapshot of its obstacles, then only their clusters are rebuilt.
+
+        Returns
+        -------
+        bool
+            True iff the abstraction was stale.
+
+        """
+        if self.version == self.grid_map.version:
+            return False
+        changed = [i for i, (before, after) in
+                   enumerate(zip(self.snapshot, self.grid_map.blocked)) if before != after]
+        self.update_cells([self.grid_map.coordinates_of(i) for i in changed])
+        self.version = self.grid_map.version
+        return True
+
+    def link(self, index):
+        """Links the given cell to the transition cells of its cluster.
+
+        Parameters
+        ----------
+        index : int
+            The index of the cell.
+
+        Returns
+        -------
+        dict of int: int
+            The distance inside the cluster from the cell to each reachable
+            transition cell.
+
+        """
+        cluster = self.cluster_of(index)
+        transitions = self.transitions[cluster]
+        _, costs = self.__search_in_cluster(
+            index, self.bounds_of(cluster), transitions)
+        return {t: costs[t] for t in transitions if t in costs}
+
+    def refine(self, source, target):
+        """Finds the cells of the shortest path between two cells of a cluster.
+
+        Parameters
+        ----------
+        source : int
+            The index of the first cell.
+        target : int
+            The index of the last cell, in the same cluster or adjacent to
+            the first one.
+
+        Returns
+        -------
+        list of int or None
+            The cells of the path, both ends included, or None if there is
+            no such path inside the cluster.
+
+        """
+        if distance(self.grid_map.coordinates_of(source),
+                    self.grid_map.coordinates_of(target)) == 1:
+            return [source, target]
+        key = (source, target)
+        path = self.refined_paths.get(key)
+        if path is None:
+            cluster = self.cluster_of(source)
+            parents, _ = self.__search_in_cluster(
+                source, self.bounds_of(cluster), {target})
+            if target not in parents:
+                return None
+            path = [target]
+            while parents[path[-1]] != -1:
+                path.append(parents[path[-1]])
+            path.reverse()
+            # only the paths between transition cells are worth keeping
+            if source in self.edges and target in self.edges:
+                self.refined_paths[key] = path
+        return path
+
+
+class HierarchicalAStar:
+    """An execution of Hierarchical Path-Finding A* (HPA*).
+
+    The path is first searched in the abstract graph of the walls-only grid
+    map, then each abstract edge is refined into cells inside its cluster.
+    The temporary obstacles of an overlay are only taken into account while
+    refining: a blocked stretch of the path is bypassed by a local A*, and
+    the search falls back on :class:`~coop.tools.GridAStar` over the whole
+    grid when no abstract path is found.
+
+    Parameters
+    ----------
+    initial_state : (int, int)
+        This argument contains the coordinates of the initial node.
+    goal_state : (int, int)
+        This argument contains the coordinates of the goal node.
+    walls : GridMap or World
+        This argument contains the grid map of the obstacles to be avoided, or
+        the world whose grid map is used.
+    cluster_size : int, optional
+        This argument contains the side length of the clusters.
+    world : World or None, optional
+        This argument contains the world whose abstraction is used when the
+        grid map is that of the world, instead of a new one.
+
+    Attributes
+    ----------
+    initial_state : (int, int)
+        The coordinates of the initial node.
+    goal_state : (int, int)
+        The coordinates of the goal node.
+    walls : GridMap or World
+        The storage location of the walls position.
+    grid_map : GridMap
+        The occupancy grid, possibly with temporary obstacles.
+    abstraction : HierarchicalMap
+        The abstraction of the walls-only grid map.
+    nb_expansions : int
+        The number of abstract nodes and cells extended so far.
+
+    Notes
+    -----
+    The paths found are near-optimal rather than optimal.
+
+    """
+
+    def __init__(self, initial_state, goal_state, walls, cluster_size=10, world=None):
+        self.initial_state = initial_state
+        self.goal_state = goal_state
+        self.walls = walls
+        self.grid_map = get_grid_map(walls)
+        if world is not None and self.grid_map.base is world.grid_map:
+            self.abstraction = world.get_abstraction(cluster_size)
+        else:
+            self.abstraction = HierarchicalMap(self.grid_map.base, cluster_size)
+        self.nb_expansions = 0
+
+    def __search_abstract_graph(self, start, goal):
+        """Runs A* in the abstract graph extended with the given cells.
+
+        Parameters
+        ----------
+        start : int
+            The index of the initial cell.
+        goal : int
+            The index of the goal cell.
+
+        Returns
+        -------
+        list of int or None
+            The abstract nodes from the initial cell to the goal one, or None
+            if they are not linked.
+
+        """
+        abstraction = self.abstraction
+        coordinates_of = self.grid_map.coordinates_of
+        goal_coordinates = coordinates_of(goal)
+        start_links = abstraction.link(start)
+        goal_links = abstraction.link(goal)
+        if abstraction.cluster_of(start) == abstraction.cluster_of(goal):
+            local = abstraction.refine(start, goal)
+            if local is not None:
+                start_links[goal] = len(local) - 1
+
+        costs = {start: 0}
+        parents = {start: -1}
+        closed = set()
+        open_set = [(distance(coordinates_of(start), goal_coordinates), 0, start)]
+        while open_set:
+            _, _, node = heapq.heappop(open_set)
+            if node in closed:
+                continue
+            closed.add(node)
+            self.nb_expansions += 1
+            if node == goal:
+                path = [goal]
+                while parents[path[-1]] != -1:
+                    path.append(parents[path[-1]])
+                return path[::-1]
+
+            neighbours = list(abstraction.edges.get(node, {}).items())
+            if node == start:
+                neighbours += start_links.items()
+            if node in goal_links:
+                neighbours.append((goal, goal_links[node]))
+            for n, edge_cost in neighbours:
+                cost = costs[node] + edge_cost
+                if n not in closed and cost < costs.get(n, cost + 1):
+                    costs[n] = cost
+                    parents[n] = node
+                    f = cost + distance(coordinates_of(n), goal_coordinates)
+                    heapq.heappush(open_set, (f, -cost, n))
+        return None
+
+    def __bypass_obstacles(self, cells):
+        """Replans the stretches of the given path crossing temporary obstacles.
+
+        Parameters
+        ----------
+        cells : list of int
+            The cells of a path on the walls-only grid map.
+
+        Returns
+        -------
+        list of int or None
+            The cells of a path avoiding the temporary obstacles, or None if
+            some stretch cannot be bypassed.
+
+        """
+        blocked = self.grid_map.blocked
+        if not any(blocked[c] for c in cells):
+            return cells
+        first = next(i for i, c in enumerate(cells) if blocked[c])
+        last = max(i for i, c in enumerate(cells) if blocked[c])
+        if first == 0 or last == len(cells) - 1:
+            return None
+        source, target = cells[first - 1], cells[last + 1]
+        coordinates_of = self.grid_map.coordinates_of
+        bypass = GridAStar(coordinates_of(source), coordinates_of(target),
+                           self.grid_map)
+        steps = bypass.run()
+        self.nb_expansions += bypass.nb_expansions
+        if steps is None:
+            return None
+        middle = [source]
+        for dx, dy in reversed(steps):
+            x, y = coordinates_of(middle[-1])
+            middle.append(self.grid_map.index_of((x + dx, y + dy)))
+        return cells[:first - 1] + middle + cells[last + 2:]
+
+    def run(self):
+        """Runs this HPA* instance.
+
+        Returns
+        -------
+        list of (int, int) or None
+            The reversed list of steps to take to get to the goal state from
+            the initial state, or None if the goal cannot be reached.
+
+        Notes
+        -----
+        The returned step sequence was built as a stack so the agent must use
+        `pop()` in order to obtain the immediate next step to take.
+
+        """
+        grid_map = self.grid_map
+        start = grid_map.index_of(self.initial_state)
+        goal = grid_map.index_of(self.goal_state)
+        if start == goal:
+            return []
+
+        cells = None
+        abstract_path = self.__search_abstract_graph(start, goal)
+        if abstract_path is not None:
+            cells = [start]
+            for source, target in zip(abstract_path, abstract_path[1:]):
+                cells += self.abstraction.refine(source, target)[1:]
+            cells = self.__bypass_obstacles(cells)
+
+        if cells is None:
+            flat_search = GridAStar(self.initial_state, self.goal_state, grid_map)
+            steps = flat_search.run()
+            self.nb_expansions += flat_search.nb_expansions
+            return steps
+
+        steps = []
+        for current, previous in zip(cells[:0:-1], cells[-2::-1]):
+            x, y = grid_map.coordinates_of(current)
+            px, py = grid_map.coordinates_of(previous)
+            steps.append((x - px, y - py))
+        return steps
@@ -0,0 +1,280 @@
+"""
+.. module:: incremental
+   :synopsis: This file contains the incremental search used for replanning.
+.. moduleauthor:: Angelo Ortiz <github.com/angelo-ortiz>
+"""
+
+import heapq
+import math
+
+from .tools import get_grid_map
+
+
+class DStarLite:
+    """An execution of the D* Lite algorithm on a 4-connected grid.
+
+    The search is rooted at the goal, so that the distances it computes
+    remain valid while the agent moves towards the goal. When a few cells
+    become blocked or free, only the distances depending on them are
+    repaired by the next call to :meth:`run`.
+
+    Parameters
+    ----------
+    initial_state : (int, int)
+        This argument contains the coordinates of the initial node.
+    goal_state : (int, int)
+        This argument contains the coordinates of the goal node.
+    walls : GridMap or World
+        This argument contains the grid map of the obstacles to be avoided, or
+        the world whose grid map is used.
+
+    Attributes
+    ----------
+    initial_state : (int, int)
+        The coordinates of the agent's current position.
+    goal_state : (int, int)
+        The coordinates of the goal node.
+    goal : int
+        The index of the goal node.
+    grid_map : GridMap
+        The occupancy grid, walls and temporary obstacles included.
+    blocked : bytearray
+        The flag of each cell telling whether it is currently blocked.
+    obstacles : set of (int, int)
+        The temporary obstacles currently enclosed in `blocked`.
+    g : list of float
+        The current distance estimate from each cell to the goal.
+    rhs : list of float
+        The one-step lookahead distance estimate from each cell to the goal.
+    open_set : heap of ((float, float), int)
+        The cells whose estimates are inconsistent, possibly with stale
+        entries.
+    keys : dict of int: (float, float)
+        The current key of each cell in the fringe.
+    km : int
+        The accumulated heuristic offset due to the agent's moves.
+    nb_expansions : int
+        The number of cells extended so far.
+
+    Notes
+    -----
+    This is the optimised version of Koenig and Likhachev's algorithm, with
+    unit costs between free cells.
+
+    """
+
+    def __init__(self, initial_state, goal_state, walls):
+        self.initial_state = initial_state
+        self.goal_state = goal_state
+        self.grid_map = get_grid_map(walls)
+        self.blocked = bytearray(self.grid_map.blocked)
+        self.obstacles = set()
+        size = self.grid_map.nb_rows * self.grid_map.nb_columns
+        self.g = [math.inf] * size
+        self.rhs = [math.inf] * size
+        self.open_set = []
+        self.keys = {}
+        self.km = 0
+        self.nb_expansions = 0
+
+        self.goal = self.grid_map.index_of(goal_state)
+        self.rhs[self.goal] = 0
+        self.__push(self.goal, self.__calculate_key(self.goal))
+
+    def h(self, index):
+        """Calculates the Manhattan distance between the given cell and the agent.
+
+        Parameters
+        ----------
+        index : int
+            The index of the cell.
+
+        Returns
+        -------
+        int
+            The heuristic value for the cell.
+
+        """
+        x, y = self.grid_map.coordinates_of(index)
+        return abs(x - self.initial_state[0]) + abs(y - self.initial_state[1])
+
+    def __calculate_key(self, index):
+        best = min(self.g[index], self.rhs[index])
+        return (best + self.h(index) + self.km, best)
+
+    def __push(self, index, key):
+        self.keys[index] = key
+        heapq.heappush(self.open_set, (key, index))
+
+    def __top(self):
+        """Discards the stale entries at the top of the fringe.
+
+        Returns
+        -------
+        ((float, float), int) or None
+            The entry with the lowest key, or None if the fringe is empty.
+
+        """
+        while self.open_set:
+            key, index = self.open_set[0]
+            if self.keys.get(index) == key:
+                return key, index
+            heapq.heappop(self.open_set)
+        return None
+
+    def __get_neighbours(self, index):
+        """Finds the free neighbours of the given cell.
+
+        Parameters
+        ----------
+        index : int
+            The index of the cell.
+
+        Returns
+        -------
+        list of int
+            The indices of the neighbouring cells that are not blocked.
+
+        """
+        nb_rows, nb_columns = self.grid_map.nb_rows, self.grid_map.nb_columns
+        x, y = divmod(index, nb_columns)
+        neighbours = []
+        if x + 1 < nb_rows:
+            neighbours.append(index + nb_columns)
+        if x > 0:
+            neighbours.append(index - nb_columns)
+        if y + 1 < nb_columns:
+            neighbours.append(index + 1)
+        if y > 0:
+            neighbours.append(index - 1)
+        return [n for n in neighbours if not self.blocked[n]]
+
+    def __update_vertex(self, index):
+        if index != self.goal:
+            if self.blocked[index]:
+                self.rhs[index] = math.inf
+            else:
+                self.rhs[index] = min(
+                    [self.g[n] + 1 for n in self.__get_neighbours(index)],
+                    default=math.inf)
+        self.keys.pop(index, None)
+        if self.g[index] != self.rhs[index]:
+            self.__push(index, self.__calculate_key(index))
+
+    def __compute_shortest_path(self):
+        start = self.grid_map.index_of(self.initial_state)
+        while True:
+            top = self.__top()
+            if top is None:
+                return
+            key, index = top
+            if key >= self.__calculate_key(start) and \
+                    self.rhs[start] == self.g[start]:
+                return
+
+            self.nb_expansions += 1
+            new_key = self.__calculate_key(index)
+            if key < new_key:
+                self.__push(index, new_key)
+            elif self.g[index] > self.rhs[index]:
+                self.g[index] = self.rhs[index]
+                self.keys.pop(index)
+                for n in self.__get_neighbours(index):
+                    self.__update_vertex(n)
+            else:
+                self.g[index] = math.inf
+                for n in self.__get_neighbours(index) + [index]:
+                    self.__update_vertex(n)
+
+    def move_to(self, position):
+        """Moves the root of the heuristic to the agent's new position.
+
+        Parameters
+        ----------
+        position : (int, int)
+            The coordinates of the agent's new position.
+
+        """
+        self.km += abs(position[0] - self.initial_state[0]) + \
+            abs(position[1] - self.initial_state[1])
+        self.initial_state = position
+
+    def update_cells(self, blocked=(), unblocked=()):
+        """Changes the state of some cells.
+
+        Parameters
+        ----------
+        blocked : list of (int, int), optional
+            The coordinates of the cells becoming obstacles.
+        unblocked : list of (int, int), optional
+            The coordinates of the cells becoming free, unless they are walls
+            of the grid map.
+
+        """
+        grid_map = self.grid_map
+        changed = []
+        for cell in blocked:
+            if grid_map.is_valid(*cell):
+                index = grid_map.index_of(cell)
+                if not self.blocked[index]:
+                    self.blocked[index] = 1
+                    changed.append(index)
+        for cell in unblocked:
+            if grid_map.is_valid(*cell):
+                index = grid_map.index_of(cell)
+                if self.blocked[index] and not grid_map.blocked[index]:
+                    self.blocked[index] = 0
+                    changed.append(index)
+
+        for index in changed:
+            self.__update_vertex(index)
+            for n in self.__get_neighbours(index):
+                self.__update_vertex(n)
+
+    def set_obstacles(self, obstacles):
+        """Replaces the temporary obstacles of this search.
+
+        Only the cells whose state actually changes are repaired.
+
+        Parameters
+        ----------
+        obstacles : list of (int, int)
+            The coordinates of the new temporary obstacles.
+
+        """
+        obstacles = {cell for cell in obstacles if cell != self.goal_state}
+        self.update_cells(blocked=obstacles - self.obstacles,
+                          unblocked=self.obstacles - obstacles)
+        self.obstacles = obstacles
+
+    def run(self):
+        """Runs (or repairs) this D* Lite instance.
+
+        Returns
+        -------
+        list of (int, int) or None
+            The reversed list of steps to take to get to the goal state from
+            the agent's current position, or None if the goal cannot be
+            reached.
+
+        Notes
+        -----
+        The returned step sequence was built as a stack so the agent must use
+        `pop()` in order to obtain the immediate next step to take.
+
+        """
+        self.__compute_shortest_path()
+        grid_map = self.grid_map
+        current = grid_map.index_of(self.initial_state)
+        if self.g[current] == math.inf:
+            return None
+
+        steps = []
+        while current != self.goal:
+            following = min(self.__get_neighbours(current),
+                            key=lambda n: self.g[n])
+            x, y = grid_map.coordinates_of(following)
+            px, py = grid_map.coordinates_of(current)
+            steps.append((x - px, y - py))
+            current = following
+        return steps[::-1]
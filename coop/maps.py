@@ -0,0 +1,213 @@
+"""
+.. module:: maps
+   :synopsis: This file contains the loaders of the maps, without any display.
+.. moduleauthor:: Angelo Ortiz <github.com/angelo-ortiz>
+"""
+
+import json
+import os
+from collections import namedtuple
+
+MAPS_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              'Cartes')
+
+WALLS_LAYER = 'obstacles'
+PLAYERS_LAYER = 'joueur'
+GOALS_LAYER = 'ramassables'
+
+# the movingai terrains an agent can walk on, i.e. ground and swamp
+PASSABLE_TERRAINS = '.GS'
+
+
+class MapData(namedtuple('MapData', ['nb_rows', 'nb_columns', 'walls',
+                                     'initial_positions', 'goals'])):
+    """The content of a map, as taken by the agents and the planners.
+
+    Attributes
+    ----------
+    nb_rows : int
+        The number of rows of the grid.
+    nb_columns : int
+        The number of columns of the grid.
+    walls : list of (int, int)
+        The coordinates of the obstacles.
+    initial_positions : list of (int, int)
+        The initial coordinates of the agents.
+    goals : list of (int, int)
+        The coordinates of the goals laid on the map, possibly fewer or more
+        than the agents.
+
+    """
+
+    __slots__ = ()
+
+    def free_cells(self):
+        """Lists the cells which are not obstacles.
+
+        Returns
+        -------
+        list of (int, int)
+            The free cells in row-major order.
+
+        """
+        walls = set(self.walls)
+        return [(x, y) for x in range(self.nb_rows) for y in range(self.nb_columns)
+                if (x, y) not in walls]
+
+
+def load_tiled_map(path):
+    """Loads a map saved by the Tiled editor in the JSON format.
+
+    The obstacles, the agents and the goals are respectively the non-empty
+    tiles of the `obstacles`, `joueur` and `ramassables` layers; the missing
+    layers are considered empty.
+
+    Parameters
+    ----------
+    path : str
+        The path of the JSON file.
+
+    Returns
+    -------
+    MapData
+        The dimensions, the obstacles, the agents and the goals of the map.
+
+    """
+    with open(path) as f:
+        carte = json.load(f)
+    width = carte['width']
+    layers = {layer['name']: layer.get('data', []) for layer in carte['layers']}
+
+    def cells(name):
+        return [divmod(i, width) for i, tile in enumerate(layers.get(name, ())) if tile > 0]
+
+    return MapData(carte['height'], width, cells(WALLS_LAYER), cells(PLAYERS_LAYER),
+                   cells(GOALS_LAYER))
+
+
+def load_movingai_map(path):
+    """Loads a grid map in the movingai format.
+
+    The header gives the `height` and the `width` of the grid, then each line
+    following `map` is a row of terrains. The ground (`.` or `G`) and the
+    swamps (`S`) are free, whereas the other terrains, e.g. out of bounds
+    (`@`, `O`), trees (`T`) and water (`W`), are obstacles.
+
+    Parameters
+    ----------
+    path : str
+        The path of the `.map` file.
+
+    Returns
+    -------
+    MapData
+        The dimensions and the obstacles of the map, without any agent.
+
+    Raises
+    ------
+    ValueError
+        If the file does not match its header.
+
+    """
+    with open(path) as f:
+        lines = f.read().splitlines()
+    header = {}
+    for i, line in enumerate(lines):
+        if line.strip() == 'map':
+            break
+        fields = line.split()
+        if len(fields) == 2:
+            header[fields[0]] = fields[1]
+    else:
+        raise ValueError(f'{path} has no map section')
+    nb_rows, nb_columns = int(header['height']), int(header['width'])
+    rows = lines[i + 1:i + 1 + nb_rows]
+    if len(rows) != nb_rows or any(len(row) < nb_columns for row in rows):
+        raise ValueError(f'{path} does not match its {nb_rows}x{nb_columns} header')
+
+    walls = [(x, y) for x, row in enumerate(rows) for y in range(nb_columns)
+             if row[y] not in PASSABLE_TERRAINS]
+    return MapData(nb_rows, nb_columns, walls, [], [])
+
+
+def load_movingai_scenario(path, map_path=None, nb_agents=None):
+    """Loads the agents of a scenario in the movingai format on their map.
+
+    Each line after the `version` one holds the bucket, the map file, the map
+    width and height, the start and goal coordinates, given as column then
+    row, and the optimal length. Each line is turned into an agent with a
+    single goal.
+
+    Parameters
+    ----------
+    path : str
+        The path of the `.scen` file.
+    map_path : str or None, optional
+        The path of the `.map` file, by default the one named by the scenario
+        in the directory of the scenario.
+    nb_agents : int or None, optional
+        The number of agents kept, i.e. the first lines of the scenario, by
+        default all of them.
+
+    Returns
+    -------
+    MapData
+        The dimensions and the obstacles of the map, the initial position and
+        the goal of every agent.
+
+    Raises
+    ------
+    ValueError
+        If an agent starts or ends on an obstacle or outside the map, or if
+        two agents share a start or a goal.
+
+    """
+    with open(path) as f:
+        lines = [line.split('\t') if '\t' in line else line.split()
+                 for line in f.read().splitlines()
+                 if line.strip() != '' and not line.startswith('version')]
+    lines = lines[:nb_agents]
+    if map_path is None:
+        map_file = lines[0][1] if lines != [] else ''
+        map_path = os.path.join(os.path.dirname(path), os.path.basename(map_file))
+    map_data = load_movingai_map(map_path)
+
+    walls = set(map_data.walls)
+    initial_positions, goals = [], []
+    for fields in lines:
+        start_y, start_x, goal_y, goal_x = (int(field) for field in fields[4:8])
+        for x, y in ((start_x, start_y), (goal_x, goal_y)):
+            if not (0 <= x < map_data.nb_rows and 0 <= y < map_data.nb_columns) or \
+                    (x, y) in walls:
+                raise ValueError(f'{path}: ({x}, {y}) is not a free cell')
+        initial_positions.append((start_x, start_y))
+        goals.append((goal_x, goal_y))
+    if len(set(initial_positions)) < len(initial_positions) or \
+            len(set(goals)) < len(goals):
+        raise ValueError(f'{path}: two agents share a start or a goal')
+    return map_data._replace(initial_positions=initial_positions, goals=goals)
+
+
+def load_map(name, directory=MAPS_DIRECTORY):
+    """Loads a map of the `Cartes` directory by its name, or a movingai file.
+
+    Parameters
+    ----------
+    name : str
+        The name of the map, without the extension, or the path of a
+        movingai `.map` or `.scen` file, relative to `directory`.
+    directory : str, optional
+        The directory of the maps.
+
+    Returns
+    -------
+    MapData
+        The dimensions, the obstacles, the agents and the goals of the map.
+
+    """
+    path = os.path.join(directory, name)
+    if name.endswith('.scen'):
+        return load_movingai_scenario(path)
+    if name.endswith('.map'):
+        return load_movingai_map(path)
+    return load_tiled_map(path + '.json')
@@ -4,8 +4,6 @@
 .. moduleauthor:: Angelo Ortiz <github.com/angelo-ortiz>
 """
 
-import random
-
 from .players import CoopPlayer
 from .strategies import GroupLengthStrategy
 
@@ -23,8 +21,8 @@ class CoopPlanner:
         This argument contains the initial coordinates of the agents.
     goal_positions : list of list of (int, int)
         This argument contains a list of goals per agent.
-    walls : list of (int, int)
-        This argument contains the list of all the obstacles to be avoided.
+    world : World
+        This argument contains the world the agents live in.
     seq_sorting_choice : SequenceSortingStrategy
         This argument defines the grouping mode.
 
@@ -32,6 +30,8 @@ class CoopPlanner:
     ----------
     players : list of CoopPlayer
         The list of cooperative players on the grid.
+    world : World
+        The world shared by the players.
     walls : list of (int, int)
         The storage location of the walls position.
     seq_sorting_choice : SequenceSortingStrategy
@@ -45,12 +45,13 @@ class CoopPlanner:
 
     """
 
-    def __init__(self, initial_positions, goal_positions, walls, seq_sorting_choice=GroupLengthStrategy):
+    def __init__(self, initial_positions, goal_positions, world, seq_sorting_choice=GroupLengthStrategy):
         # for pos, goal in zip(initial_positions, goal_positions):
         #     print(pos, goal)
-        self.players = [CoopPlayer(init_pos, goal_pos, walls)
+        self.players = [CoopPlayer(init_pos, goal_pos, world)
                         for init_pos, goal_pos in zip(initial_positions, goal_positions)]
-        self.walls = walls
+        self.world = world
+        self.walls = world.walls
         self.seq_sorting_choice = seq_sorting_choice
         self.sequence = []
         self.current_player = -1
@@ -81,6 +82,12 @@ class CoopPlanner:
     def find_initial_paths(self):
         """
         """
+        # all the first goals' distance fields are built in a single batch,
+        # if the search engine reads them
+        if getattr(self.world.search_engine, 'USES_DISTANCE_FIELDS', False):
+            goals = [player.goal_positions[0] for player in self.players
+                     if player.has_next_goal()]
+            self.world.distance_fields.prefetch(self.world.grid_map, goals)
         for player in self.players:
             bef, aft = player.others
             others = [oth.current_position for oth in bef + aft]
@@ -166,7 +173,7 @@ class CoopPlanner:
             self.sequence.append([player])
 
     def update_sequence(self, players):
-        random.shuffle(players)
+        self.world.rng.shuffle(players)
         for player in players:
             self.add_to_sequence(player)
 
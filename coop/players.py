@@ -6,11 +6,10 @@
 """
 
 
-import random
 from functools import reduce
 
+from .incremental import DStarLite
 from .strategies import NaiveStrategy
-from .tools import AStar, Node
 
 
 class CoopPlayer:
@@ -22,8 +21,8 @@ class CoopPlayer:
         This argument contains the initial coordinates of the agent.
     goal_positions : list of (int, int)
         This argument contains a list of all the goals of the agent.
-    walls : list of (int, int)
-        This argument contains the list of all the obstacles to be avoided.
+    world : World
+        This argument contains the world the agent lives in.
     goal_choice : GoalChoiceStrategy, optional
         This argument defines the next goal choice mode.
 
@@ -31,6 +30,7 @@ class CoopPlayer:
     ----------
     others
     next_position
+    grid_map
     initial_position : (int, int)
         The storage location of the initial coordinates of the player.
     current_position : (int, int)
@@ -41,49 +41,41 @@ class CoopPlayer:
         The storage location of the agent's goal list.
     current_goal : (int, int)
         The coordinates of the agent's current goal.
+    world : World
+        The world shared with the other agents.
     walls : list of (int, int)
         The storage location of the walls position.
-    a_star : AStar or None
-        The A* algorithm execution leading the agent's steps.
+    a_star : GridAStar or JumpPointSearch or DStarLite or None
+        The search execution leading the agent's steps.
+    replanner : DStarLite or None
+        The incremental search towards the current goal, kept between
+        replannings when the world's incremental replanning is enabled.
     steps : list of (int, int)
         The list of steps the agent must take to get to its current goal.
     goal_choice : GoalChoiceStrategy
         The storage location of the agent's goal choice strategy.
 
-    players : list of CoopPlayer
-        The list of all cooperative agents in the grid.
-    CUT_OFF_LIMIT : int
-        The length of the path to be cut when handling collisions.
+    Notes
+    -----
+    The cut-off limit, the search engine, e.g. :class:`~coop.tools.GridAStar`
+    or :class:`~coop.tools.JumpPointSearch`, and the incremental replanning
+    by a per-agent :class:`~coop.incremental.DStarLite` are set on the world.
 
     """
 
-    players = []
-    CUT_OFF_LIMIT = 0
-
-    def __init__(self, initial_position, goal_positions, walls, goal_choice=NaiveStrategy):
+    def __init__(self, initial_position, goal_positions, world, goal_choice=NaiveStrategy):
         self.initial_position = initial_position
         self.current_position = initial_position
         self.previous_position = tuple([-1 for _ in initial_position])
         self.goal_positions = goal_positions[:]
         self.current_goal = None
-        self.walls = walls
+        self.world = world
+        self.walls = world.walls
         self.a_star = None
+        self.replanner = None
         self.steps = []
         self.goal_choice = goal_choice(self.goal_positions)
-        CoopPlayer.players.append(self)
-
-    @classmethod
-    def set_cut_off_limit(cls, cut_point):
-        """Sets the number of immediate steps to be recalculated when handling
-        a collision.
-
-        Parameters
-        ----------
-        cut_point : int
-            The length of path to be replanned when a collision happens.
-
-        """
-        cls.CUT_OFF_LIMIT = cut_point
+        world.add_player(self)
 
     def add_goal(self, goal_position):
         """Adds a new goal to this agent.
@@ -96,6 +88,18 @@ class CoopPlayer:
         """
         self.goal_positions.append(goal_position)
 
+    @property
+    def grid_map(self):
+        """The occupancy grid of this agent's world.
+
+        Returns
+        -------
+        GridMap
+            The grid map shared by all the agents of the world.
+
+        """
+        return self.world.grid_map
+
     @property
     def others(self):
         """The list of all the cooperative peers of this agent.
@@ -107,8 +111,9 @@ class CoopPlayer:
             iteration, and the list of those yet to be placed.
 
         """
-        my_index = CoopPlayer.players.index(self)
-        return CoopPlayer.players[:my_index], CoopPlayer.players[my_index + 1:]
+        players = self.world.players
+        my_index = players.index(self)
+        return players[:my_index], players[my_index + 1:]
 
     def has_next_step(self):
         """Tests whether this agent has a planned step to take.
@@ -160,10 +165,48 @@ class CoopPlayer:
 
         placed = [pos for pos in placed if pos != self.current_goal]
 
-        self.a_star = AStar(self.current_position,
-                            self.current_goal, self.walls + placed)
+        if self.world.incremental:
+            self.steps = self.__replan(placed)
+            return
+
+        # goals are pursued repeatedly, so their distance field pays off, but
+        # only for the engines reading it
+        if getattr(self.world.search_engine, 'USES_DISTANCE_FIELDS', False):
+            self.world.distance_fields.get_or_compute(self.grid_map, self.current_goal)
+        self.a_star = self.world.search_engine(
+            self.current_position, self.current_goal,
+            self.grid_map.with_obstacles(placed), world=self.world)
         self.steps = self.a_star.run()
 
+    def __replan(self, obstacles):
+        """Repairs the incremental search towards the current goal.
+
+        A new search is started when the goal has changed since the last
+        replanning.
+
+        Parameters
+        ----------
+        obstacles : list of (int, int)
+            The coordinates of the cells to be avoided, replacing those of the
+            last replanning.
+
+        Returns
+        -------
+        list of (int, int) or None
+            The reversed list of steps to the current goal, or None if it
+            cannot be reached.
+
+        """
+        if self.replanner is None or \
+                self.replanner.goal_state != self.current_goal:
+            self.replanner = DStarLite(
+                self.current_position, self.current_goal, self.grid_map)
+        else:
+            self.replanner.move_to(self.current_position)
+        self.replanner.set_obstacles(obstacles)
+        self.a_star = self.replanner
+        return self.replanner.run()
+
     def go_through_one_another(self, other, placed):
         """Tests whether this agent will have crossed the given one after the
         current iteration.
@@ -215,16 +258,16 @@ class CoopPlayer:
                 return self.next_position
         return None
 
-    def __get_valid_shifts(self, obstacles):
+    def __get_valid_shifts(self, grid_map):
         """Finds all the possible shifts the agent may take.
 
         A shift is said to be valid if it does not lead the agent into a wall,
-        a cell outside the grid or into one of the given obstacles.
+        a cell outside the grid or into one of the temporary obstacles.
 
         Parameters
         ----------
-        obstacles : list of (int, int)
-            The coordinates of some obstacles to be avoided.
+        grid_map : GridMap
+            The occupancy grid enclosing the walls and the temporary obstacles.
 
         Returns
         -------
@@ -233,19 +276,9 @@ class CoopPlayer:
             iteration.
 
         """
-        def is_valid(shift):
-            pos = (self.current_position[0] + shift[0],
-                   self.current_position[1] + shift[1])
-            if pos in self.walls:
-                return False
-            if not Node.is_valid(*pos):
-                return False
-            if pos in obstacles:
-                return False
-            return True
-
+        x, y = self.current_position
         shifts = [(1, 0), (-1, 0), (0, 1), (0, -1)]
-        return [sh for sh in shifts if is_valid(sh)]
+        return [(dx, dy) for dx, dy in shifts if grid_map.is_free(x + dx, y + dy)]
 
     def handle_collision(self, obstacle):
         """Replans a part of this agent's immediate path considering the given
@@ -262,7 +295,7 @@ class CoopPlayer:
             diff = (pos1[0] - pos2[0], pos1[1] - pos2[1])
             return diff in [(0, 1), (0, -1), (1, 0), (-1, 0), (0, 0)]
 
-        cut_path = self.steps[-CoopPlayer.CUT_OFF_LIMIT:]
+        cut_path = self.steps[-self.world.cut_off_limit:]
         placed, _ = self.others
 
         # the current and previous positions of already placed agents are
@@ -272,19 +305,28 @@ class CoopPlayer:
         obstacles += [oth.previous_position for oth in placed if are_adjacent(
             self.current_position, oth.previous_position)]
         obstacles += [obstacle]
+        grid_map = self.grid_map.with_obstacles(obstacles)
+
+        if self.world.incremental:
+            steps = self.__replan(obstacles)
+            # the goal itself may be the obstacle to wait for
+            if steps is None or self.get_position_after(steps[-1:]) in obstacles:
+                steps = [self.world.rng.choice(self.__get_valid_shifts(grid_map))]
+            self.steps = steps
+            return
 
         # if the remaining path is too short, it just takes a valid random step
-        if len(cut_path) < CoopPlayer.CUT_OFF_LIMIT:
-            valid_steps = self.__get_valid_shifts(obstacles)
-            self.steps = [random.choice(valid_steps)]
+        if len(cut_path) < self.world.cut_off_limit:
+            valid_steps = self.__get_valid_shifts(grid_map)
+            self.steps = [self.world.rng.choice(valid_steps)]
         else:
             temp_goal = self.get_position_after(cut_path)
             if temp_goal == self.current_goal:
                 temp_goal = self.get_position_after(
-                    self.steps[-CoopPlayer.CUT_OFF_LIMIT + 1:])
-            nearby_path = AStar(self.current_position, temp_goal,
-                                self.walls + obstacles).run()
-            self.steps = self.steps[:-CoopPlayer.CUT_OFF_LIMIT] + nearby_path
+                    self.steps[-self.world.cut_off_limit + 1:])
+            nearby_path = self.world.search_engine(
+                self.current_position, temp_goal, grid_map, world=self.world).run()
+            self.steps = self.steps[:-self.world.cut_off_limit] + nearby_path
 
     def get_position_after(self, reversed_steps):
         """Determines this agent's position after following the given step
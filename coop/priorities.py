@@ -0,0 +1,230 @@
+"""
+.. module:: priorities
+   :synopsis: This file contains the prioritized multi-agent planner.
+.. moduleauthor:: Angelo Ortiz <github.com/angelo-ortiz>
+"""
+
+import heapq
+import time
+
+from .cbs import CBSPlanner
+from .reservations import ReservationTable
+
+
+def order_of(priorities, default_order):
+    """Determines a total order of the agents consistent with pairwise priorities.
+
+    Parameters
+    ----------
+    priorities : set of (int, int)
+        The pairs ``(i, j)`` of agents where `i` is planned before `j`. They
+        must not form a cycle.
+    default_order : list of int
+        The order used between the agents with no priority over each other.
+
+    Returns
+    -------
+    list of int
+        The agents in planning order.
+
+    """
+    rank = {agent: i for i, agent in enumerate(default_order)}
+    nb_before = {agent: 0 for agent in default_order}
+    after = {agent: [] for agent in default_order}
+    for i, j in priorities:
+        nb_before[j] += 1
+        after[i].append(j)
+
+    # Kahn's algorithm, the ready agents being taken in the default order
+    ready = [(rank[agent], agent) for agent in default_order if nb_before[agent] == 0]
+    heapq.heapify(ready)
+    order = []
+    while ready != []:
+        _, agent = heapq.heappop(ready)
+        order.append(agent)
+        for following in after[agent]:
+            nb_before[following] -= 1
+            if nb_before[following] == 0:
+                heapq.heappush(ready, (rank[following], following))
+    return order
+
+
+def precedes(priorities, i, j):
+    """Tests whether an agent is planned before another one.
+
+    Parameters
+    ----------
+    priorities : set of (int, int)
+        The pairs ``(i, j)`` of agents where `i` is planned before `j`.
+    i : int
+        The index of the first agent.
+    j : int
+        The index of the second agent.
+
+    Returns
+    -------
+    bool
+        True iff `i` is planned before `j` by transitivity of the priorities.
+
+    """
+    frontier, seen = [i], {i}
+    while frontier != []:
+        agent = frontier.pop()
+        for before, after in priorities:
+            if before == agent and after not in seen:
+                if after == j:
+                    return True
+                seen.add(after)
+                frontier.append(after)
+    return False
+
+
+class PrioritizedPlanner(CBSPlanner):
+    """A cooperative entity that plans its agents one at a time by priority.
+
+    Each agent runs space-time A* against the reservations of the agents
+    planned before it, which are gathered in a shared reservation table, and
+    stays at its goal once its path is over. If an agent finds no path, the
+    planning order is searched for, as in Priority-Based Search: the failed
+    agent is given priority over one of the agents planned before it, and
+    the search goes on depth-first. The order found is kept for the next
+    replannings.
+
+    Parameters
+    ----------
+    initial_positions : list of (int, int)
+        This argument contains the initial coordinates of the agents.
+    goal_positions : list of list of (int, int)
+        This argument contains a list of goals per agent.
+    walls : GridMap or World
+        This argument contains the grid map of the obstacles to be avoided, or
+        the world whose grid map and distance fields are used.
+    attempt_limit : int or None, optional
+        This argument contains the number of planning orders tried after
+        which a search gives up, or None for no limit.
+    time_limit : float or None, optional
+        This argument contains the processor time in seconds after which a
+        search gives up, or None for no limit.
+
+    Attributes
+    ----------
+    priorities : list of int
+        The planning order of the agents.
+    reservation_table : ReservationTable
+        The reservations of the agents planned so far in the current attempt.
+    attempt_limit : int or None
+        The number of planning orders tried after which a search gives up.
+    time_limit : float or None
+        The processor time after which a search gives up.
+    attempts : list of (list of int, int or None, float)
+        The planning order, the first agent left without a path or None, and
+        the processor time in seconds of each attempt of the last search.
+
+    See Also
+    --------
+    CBSPlanner
+
+    Notes
+    -----
+    Prioritized planning is incomplete: if no order is found within the
+    limits, the agents follow the attempt that planned the most of them, the
+    others waiting, up to the first conflict.
+
+    """
+
+    def __init__(self, initial_positions, goal_positions, walls, attempt_limit=64,
+                 time_limit=None):
+        self.priorities = list(range(len(initial_positions)))
+        self.reservation_table = ReservationTable()
+        self.attempt_limit = attempt_limit
+        self.attempts = []
+        super().__init__(initial_positions, goal_positions, walls, time_limit=time_limit)
+
+    def plan_in_order(self, order, goals):
+        """Plans the agents one at a time in the given order.
+
+        Parameters
+        ----------
+        order : list of int
+            The agents in planning order.
+        goals : list of (int, int)
+            The coordinates of the goal of each agent.
+
+        Returns
+        -------
+        (list of list of (int, int) or None, int or None)
+            The path of each agent, None for those not planned, and the first
+            agent left without a path, or None if all of them were planned.
+
+        """
+        start = time.process_time()
+        self.reservation_table = ReservationTable()
+        paths = [None] * len(order)
+        stays = []
+        failed = None
+        for agent in order:
+            constraints = self.reservation_table.constraints(agent) + stays
+            path = self.find_path(agent, goals[agent], constraints)
+            if path is None:
+                failed = agent
+                break
+            paths[agent] = path
+            self.reservation_table.reserve_path(
+                [(x, y, t) for t, (x, y) in enumerate(path)], agent)
+            stays.append(('stay', path[-1], len(path) - 1))
+        self.attempts.append((order, failed, time.process_time() - start))
+        return paths, failed
+
+    def search(self, goals):
+        """Runs prioritized planning, then searches for a feasible order if needed.
+
+        Parameters
+        ----------
+        goals : list of (int, int)
+            The coordinates of the goal of each agent.
+
+        Returns
+        -------
+        list of list of (int, int) or None
+            The path of each agent, conflict-free unless no order was found, or
+            None if no attempt was made within the limits.
+
+        """
+        self.nb_nodes = 0
+        self.nb_expansions = 0
+        self.attempts = []
+        start = time.process_time()
+
+        best_paths, best_count = None, -1
+        stack = [frozenset()]
+        seen = set()
+        while stack != []:
+            if (self.attempt_limit is not None and self.nb_nodes >= self.attempt_limit) or \
+                    (self.time_limit is not None and
+                     time.process_time() - start >= self.time_limit):
+                break
+            priorities = stack.pop()
+            order = order_of(priorities, self.priorities)
+            if tuple(order) in seen:
+                continue
+            seen.add(tuple(order))
+            self.nb_nodes += 1
+
+            paths, failed = self.plan_in_order(order, goals)
+            if failed is None:
+                self.priorities = order
+                return paths
+            nb_planned = order.index(failed)
+            if nb_planned > best_count:
+                best_paths, best_count = paths, nb_planned
+
+            # the failed agent goes before one of its predecessors, the
+            # closest one being tried first
+            for agent in order[:nb_planned]:
+                if not precedes(priorities, agent, failed):
+                    stack.append(priorities | {(failed, agent)})
+
+        if best_paths is None:
+            return None
+        return [path if path is not None else [pos]
+                for path, pos in zip(best_paths, self.positions)]
@@ -0,0 +1,801 @@
+"""
+.. module:: reservations
+   :synopsis: This file contains the space-time reservation table shared by the
+    advanced cooperative players.
+.. moduleauthor:: Angelo Ortiz <github.com/angelo-ortiz>
+"""
+
+import sys
+from itertools import compress
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def find_conflicts(paths, limit=None):
+    """Finds the conflicts between the agents of a joint plan.
+
+    Two agents conflict when they occupy the same cell at the same epoch
+    (vertex conflict), or when they swap their cells between two consecutive
+    epochs (edge conflict). An agent whose path is over stays at its last
+    cell.
+
+    Parameters
+    ----------
+    paths : list of list of (int, int)
+        The cells occupied by each agent, from epoch 0 onwards.
+    limit : int or None, optional
+        The number of conflicts after which the search stops, or None to find
+        them all.
+
+    Returns
+    -------
+    list of (str, int, int, int, tuple)
+        The conflicts sorted by epoch, as tuples ``('vertex', t, i, j, (cell,))``
+        for agents `i` and `j` both at `cell` at epoch `t`, and
+        ``('edge', t, i, j, (cell_i, cell_j))`` for agents `i` and `j` at
+        `cell_i` and `cell_j` respectively at epoch `t`, and the other way round
+        at epoch `t + 1`.
+
+    """
+    conflicts = []
+    paths = list(paths)
+    horizon = max((len(path) for path in paths), default=0)
+
+    def at(path, t):
+        return path[t] if t < len(path) else path[-1]
+
+    for t in range(horizon):
+        occupants = {}
+        for i, path in enumerate(paths):
+            if path == []:
+                continue
+            cell = at(path, t)
+            j = occupants.setdefault(cell, i)
+            if j != i:
+                conflicts.append(('vertex', t, j, i, (cell,)))
+        if t + 1 < horizon:
+            # a swap is a move whose reverse move is taken meanwhile
+            moves = {}
+            for i, path in enumerate(paths):
+                if path == []:
+                    continue
+                source, target = at(path, t), at(path, t + 1)
+                if source == target:
+                    continue
+                j = moves.get((target, source))
+                if j is not None:
+                    conflicts.append(('edge', t, j, i, (target, source)))
+                moves[(source, target)] = i
+        if limit is not None and len(conflicts) >= limit:
+            return conflicts[:limit]
+    return conflicts
+
+
+class ReservationTable:
+    """A table of space-time reservations indexed by epoch and by agent.
+
+    The reservations are stored in one slice per epoch, mapping the reserved
+    cells to their owner, so that the slices of past epochs can be dropped as
+    a whole. Each agent also keeps the epochs and cells it reserved, so that
+    releasing its path does not scan the other agents' reservations.
+
+    Attributes
+    ----------
+    slices : dict of int: dict of (int, int): int
+        The reserved cells and their owner, per epoch.
+    agents : dict of int: dict of int: list of (int, int)
+        The cells reserved by each agent, per epoch. It may still list cells
+        since reserved by another agent or dropped with their slice.
+    edges : dict of int: dict of ((int, int), (int, int)): int
+        The moves between two distinct cells and their owner, per epoch of
+        departure.
+    agent_edges : dict of int: dict of int: list of ((int, int), (int, int))
+        The moves reserved by each agent, per epoch of departure.
+    first_epoch : int
+        The epoch of the oldest slice kept.
+    size : int
+        The number of reservations currently held.
+    peak_size : int
+        The largest number of reservations held at once.
+    nb_dropped : int
+        The number of reservations dropped with the slices of past epochs.
+
+    Notes
+    -----
+    The table can be used as a dictionary of ``(x, y, t): id``, with the
+    indexing, assignment and ``in`` operators.
+
+    """
+
+    def __init__(self):
+        self.slices = {}
+        self.agents = {}
+        self.edges = {}
+        self.agent_edges = {}
+        self.first_epoch = 0
+        self.size = 0
+        self.peak_size = 0
+        self.nb_dropped = 0
+
+    def reserve(self, coordinates, player_id):
+        """Reserves the given space-time coordinates for an agent.
+
+        A reservation held by another agent is overridden.
+
+        Parameters
+        ----------
+        coordinates : (int, int, int)
+            The space-time coordinates to be reserved.
+        player_id : int
+            The id of the agent.
+
+        """
+        x, y, t = coordinates
+        if t < self.first_epoch:
+            return
+        cells = self.slices.get(t)
+        if cells is None:
+            cells = self.slices[t] = {}
+        if (x, y) not in cells:
+            self.size += 1
+            self.peak_size = max(self.peak_size, self.size)
+        cells[(x, y)] = player_id
+        self.agents.setdefault(player_id, {}).setdefault(t, []).append((x, y))
+
+    def reserve_path(self, coordinates, player_id):
+        """Reserves a sequence of space-time coordinates for an agent.
+
+        Parameters
+        ----------
+        coordinates : iterable of (int, int, int)
+            The space-time coordinates to be reserved.
+        player_id : int
+            The id of the agent.
+
+        """
+        coordinates = sorted(coordinates, key=lambda coord: coord[2])
+        for coord in coordinates:
+            self.reserve(coord, player_id)
+        for (x, y, t), (nx, ny, nt) in zip(coordinates, coordinates[1:]):
+            if nt == t + 1 and (x, y) != (nx, ny):
+                self.reserve_edge((x, y), (nx, ny), t, player_id)
+
+    def reserve_edge(self, source, target, t, player_id):
+        """Reserves the move between two adjacent cells for an agent.
+
+        Parameters
+        ----------
+        source : (int, int)
+            The space coordinates of the cell left at epoch `t`.
+        target : (int, int)
+            The space coordinates of the cell reached at epoch `t + 1`.
+        t : int
+            The epoch of departure.
+        player_id : int
+            The id of the agent.
+
+        """
+        if t < self.first_epoch:
+            return
+        moves = self.edges.get(t)
+        if moves is None:
+            moves = self.edges[t] = {}
+        moves[(source, target)] = player_id
+        self.agent_edges.setdefault(player_id, {}).setdefault(
+            t, []).append((source, target))
+
+    def release(self, player_id):
+        """Removes all the reservations of the given agent.
+
+        Parameters
+        ----------
+        player_id : int
+            The id of the agent.
+
+        """
+        for t, positions in self.agents.pop(player_id, {}).items():
+            cells = self.slices.get(t)
+            if cells is None:
+                continue
+            for pos in positions:
+                if cells.get(pos) == player_id:
+                    del cells[pos]
+                    self.size -= 1
+            if cells == {}:
+                del self.slices[t]
+        for t, edges in self.agent_edges.pop(player_id, {}).items():
+            moves = self.edges.get(t)
+            if moves is None:
+                continue
+            for edge in edges:
+                if moves.get(edge) == player_id:
+                    del moves[edge]
+            if moves == {}:
+                del self.edges[t]
+
+    def owner(self, coordinates):
+        """Retrieves the owner of the given space-time coordinates.
+
+        Parameters
+        ----------
+        coordinates : (int, int, int)
+            The space-time coordinates to be queried.
+
+        Returns
+        -------
+        int or None
+            The id of the agent that reserved the coordinates, or None if they
+            are free.
+
+        """
+        x, y, t = coordinates
+        cells = self.slices.get(t)
+        return cells.get((x, y)) if cells is not None else None
+
+    def is_available(self, position, t, player_id):
+        """Tests whether an agent may occupy the given position at an epoch.
+
+        Parameters
+        ----------
+        position : (int, int)
+            The space coordinates of the cell.
+        t : int
+            The epoch.
+        player_id : int
+            The id of the agent.
+
+        Returns
+        -------
+        bool
+            True iff the cell is free or reserved by the agent itself.
+
+        """
+        owner = self.owner((*position, t))
+        return owner is None or owner == player_id
+
+    def edge_conflict(self, source, target, t, player_id):
+        """Tests whether moving between two cells swaps with another agent.
+
+        Parameters
+        ----------
+        source : (int, int)
+            The space coordinates of the cell left at epoch `t`.
+        target : (int, int)
+            The space coordinates of the cell reached at epoch `t + 1`.
+        t : int
+            The epoch of departure.
+        player_id : int
+            The id of the moving agent.
+
+        Returns
+        -------
+        bool
+            True iff another agent moves from `target` to `source` meanwhile.
+
+        """
+        moves = self.edges.get(t)
+        if moves is None:
+            return False
+        other_id = moves.get((target, source))
+        return other_id is not None and other_id != player_id
+
+    def available_moves(self, source, targets, t, player_id):
+        """Filters the moves an agent may take from a cell at an epoch.
+
+        A move is available if its target is not reserved by another agent at
+        the next epoch, and if it does not swap with another agent. The vertex
+        and edge slices are looked up once for all the moves.
+
+        Parameters
+        ----------
+        source : (int, int)
+            The space coordinates of the cell left at epoch `t`.
+        targets : list of (int, int)
+            The space coordinates of the candidate cells for epoch `t + 1`.
+        t : int
+            The epoch of departure.
+        player_id : int
+            The id of the moving agent.
+
+        Returns
+        -------
+        list of (int, int)
+            The targets of the available moves, in the given order.
+
+        """
+        after = self.slices.get(t + 1, {})
+        moves = self.edges.get(t, {})
+        return [target for target in targets
+                if after.get(target, player_id) == player_id and
+                moves.get((target, source), player_id) == player_id]
+
+    def constraints(self, player_id):
+        """Converts the other agents' reservations into space-time constraints.
+
+        Parameters
+        ----------
+        player_id : int
+            The id of the constrained agent.
+
+        Returns
+        -------
+        list of (str, tuple, int)
+            The constraints, in the format of
+            :class:`~coop.cbs.ConstrainedAStar`, forbidding the cells reserved
+            by the other agents and the moves swapping with theirs.
+
+        """
+        constraints = [('vertex', cell, t)
+                       for t, cells in self.slices.items()
+                       for cell, owner in cells.items() if owner != player_id]
+        constraints += [('edge', (target, source), t)
+                        for t, moves in self.edges.items()
+                        for (source, target), owner in moves.items() if owner != player_id]
+        return constraints
+
+    def drop_before(self, epoch):
+        """Drops the slices of all the epochs prior to the given one.
+
+        Parameters
+        ----------
+        epoch : int
+            The epoch of the oldest slice to be kept.
+
+        """
+        for t in range(self.first_epoch, epoch):
+            cells = self.slices.pop(t, None)
+            if cells is not None:
+                self.size -= len(cells)
+                self.nb_dropped += len(cells)
+            self.edges.pop(t, None)
+        self.first_epoch = max(self.first_epoch, epoch)
+
+    @property
+    def memory_usage(self):
+        """The approximate memory footprint of this table.
+
+        Returns
+        -------
+        int
+            The number of bytes taken by the slices and the agents' index,
+            excluding the shared coordinates and ids.
+
+        """
+        usage = 0
+        for table in (self.slices, self.edges):
+            usage += sys.getsizeof(table)
+            usage += sum(sys.getsizeof(cells) for cells in table.values())
+        for index in (self.agents, self.agent_edges):
+            usage += sys.getsizeof(index)
+            for epochs in index.values():
+                usage += sys.getsizeof(epochs)
+                usage += sum(sys.getsizeof(pos) for pos in epochs.values())
+        return usage
+
+    def get(self, coordinates, default=None):
+        """Retrieves the owner of the given space-time coordinates.
+
+        Parameters
+        ----------
+        coordinates : (int, int, int)
+            The space-time coordinates to be queried.
+        default : int or None, optional
+            The value returned when the coordinates are free.
+
+        Returns
+        -------
+        int or None
+            The id of the owner, or `default`.
+
+        """
+        owner = self.owner(coordinates)
+        return default if owner is None else owner
+
+    def __getitem__(self, coordinates):
+        owner = self.owner(coordinates)
+        if owner is None:
+            raise KeyError(coordinates)
+        return owner
+
+    def __setitem__(self, coordinates, player_id):
+        self.reserve(coordinates, player_id)
+
+    def __contains__(self, coordinates):
+        return self.owner(coordinates) is not None
+
+    def __len__(self):
+        return self.size
+
+    def __repr__(self):
+        """Textual representation of this table."""
+        return f'ReservationTable({self.size} reservations, ' \
+            f'{len(self.slices)} epochs from t = {self.first_epoch})'
+
+
+class RingReservationTable:
+    """A table of space-time reservations stored in a ring buffer over time.
+
+    The owners of the cells are stored in a ``(window, rows, cols)`` integer
+    array, the reservations at epoch `t` lying in the slice ``t % window``.
+    Only the epochs from `first_epoch` to ``first_epoch + window - 1`` are
+    held: reserving a later epoch drops the oldest ones. The conflict checks
+    are plain array lookups, and a whole path is reserved or released with a
+    single vectorised assignment. The moves are stored alongside, in a
+    ``(window, rows, cols, 5)`` array giving the owner of each move out of
+    each cell, the last move, i.e. waiting, being never reserved.
+
+    Parameters
+    ----------
+    window : int
+        This argument contains the number of epochs held at once. It must
+        cover the agents' search horizon, e.g. twice the pathfinding frequence
+        plus one.
+    nb_rows : int
+        This argument contains the number of rows of the grid.
+    nb_columns : int
+        This argument contains the number of columns of the grid.
+
+    Attributes
+    ----------
+    window : int
+        The number of epochs held at once.
+    owners : numpy.ndarray
+        The id of the owner of each space-time cell, or -1 if it is free.
+    edges : numpy.ndarray
+        The id of the owner of each move, by epoch of departure, cell left
+        and shift index in :attr:`SHIFTS`, or -1 if it is free.
+    shift_indices : numpy.ndarray
+        The index in :attr:`SHIFTS` of each shift ``(dx, dy)``, stored at
+        ``(dx + 1) * 3 + dy + 1``, that of waiting being ``len(SHIFTS)``
+        and that of the other shifts -1.
+    first_epoch : int
+        The epoch of the oldest slice held.
+    size : int
+        The number of reservations currently held.
+    peak_size : int
+        The largest number of reservations held at once.
+    nb_dropped : int
+        The number of reservations dropped with the slices of past epochs.
+
+    SHIFTS : list of (int, int)
+        The shifts of the moves between two distinct cells.
+
+    See Also
+    --------
+    ReservationTable
+
+    """
+
+    SHIFTS = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+
+    def __init__(self, window, nb_rows, nb_columns):
+        if np is None:
+            raise ImportError('NumPy is required by the ring buffer reservation table')
+        self.window = window
+        self.owners = np.full((window, nb_rows, nb_columns), -1, dtype=np.int32)
+        self.edges = np.full((window, nb_rows, nb_columns, len(self.SHIFTS) + 1), -1,
+                             dtype=np.int32)
+        # shift index of (dx, dy), at (dx + 1) * 3 + dy + 1
+        self.shift_indices = np.full(9, -1, dtype=np.int64)
+        for i, (dx, dy) in enumerate(self.SHIFTS + [(0, 0)]):
+            self.shift_indices[(dx + 1) * 3 + dy + 1] = i
+        self.first_epoch = 0
+        self.size = 0
+        self.peak_size = 0
+        self.nb_dropped = 0
+
+    def reserve(self, coordinates, player_id):
+        """Reserves the given space-time coordinates for an agent.
+
+        A reservation held by another agent is overridden.
+
+        Parameters
+        ----------
+        coordinates : (int, int, int)
+            The space-time coordinates to be reserved.
+        player_id : int
+            The id of the agent.
+
+        """
+        self.reserve_path([coordinates], player_id)
+
+    def reserve_path(self, coordinates, player_id):
+        """Reserves a sequence of space-time coordinates for an agent.
+
+        Parameters
+        ----------
+        coordinates : iterable of (int, int, int)
+            The space-time coordinates to be reserved, at most one per epoch.
+        player_id : int
+            The id of the agent.
+
+        Raises
+        ------
+        ValueError
+            If the epochs to be reserved, past ones excluded, span more than
+            the window, since the earliest ones would be dropped.
+
+        """
+        coordinates = np.asarray(list(coordinates), dtype=np.int64).reshape(-1, 3)
+        coordinates = coordinates[coordinates[:, 2] >= self.first_epoch]
+        if len(coordinates) == 0:
+            return
+        first_epoch, last_epoch = coordinates[:, 2].min(), coordinates[:, 2].max()
+        if last_epoch - first_epoch >= self.window:
+            raise ValueError(f'Epochs {first_epoch} to {last_epoch} do not fit in a window '
+                             f'of {self.window} epochs')
+        if last_epoch >= self.first_epoch + self.window:
+            self.drop_before(last_epoch - self.window + 1)
+        coordinates = coordinates[np.argsort(coordinates[:, 2], kind='stable')]
+        xs, ys, ts = coordinates.T
+        slots = ts % self.window
+
+        self.size += int(np.count_nonzero(self.owners[slots, xs, ys] < 0))
+        self.peak_size = max(self.peak_size, self.size)
+        self.owners[slots, xs, ys] = player_id
+
+        # the moves between consecutive epochs
+        dxs, dys, dts = xs[1:] - xs[:-1], ys[1:] - ys[:-1], ts[1:] - ts[:-1]
+        shifts = self.shift_indices[(np.clip(dxs, -1, 1) + 1) * 3 +
+                                    np.clip(dys, -1, 1) + 1]
+        moves = (dts == 1) & (np.abs(dxs) + np.abs(dys) == 1)
+        self.edges[slots[:-1][moves], xs[:-1][moves], ys[:-1][moves],
+                   shifts[moves]] = player_id
+
+    def reserve_edge(self, source, target, t, player_id):
+        """Reserves the move between two adjacent cells for an agent.
+
+        Parameters
+        ----------
+        source : (int, int)
+            The space coordinates of the cell left at epoch `t`.
+        target : (int, int)
+            The space coordinates of the cell reached at epoch `t + 1`.
+        t : int
+            The epoch of departure.
+        player_id : int
+            The id of the agent.
+
+        """
+        if t < self.first_epoch:
+            return
+        dx, dy = target[0] - source[0], target[1] - source[1]
+        if abs(dx) + abs(dy) != 1:
+            raise ValueError(f'{source} and {target} are not adjacent')
+        if t >= self.first_epoch + self.window:
+            self.drop_before(t - self.window + 1)
+        shift = self.shift_indices[(dx + 1) * 3 + dy + 1]
+        self.edges[t % self.window, source[0], source[1], shift] = player_id
+
+    def release(self, player_id):
+        """Removes all the reservations of the given agent.
+
+        Parameters
+        ----------
+        player_id : int
+            The id of the agent.
+
+        """
+        mask = self.owners == player_id
+        self.size -= int(np.count_nonzero(mask))
+        self.owners[mask] = -1
+        self.edges[self.edges == player_id] = -1
+
+    def owner(self, coordinates):
+        """Retrieves the owner of the given space-time coordinates.
+
+        Parameters
+        ----------
+        coordinates : (int, int, int)
+            The space-time coordinates to be queried, inside the grid.
+
+        Returns
+        -------
+        int or None
+            The id of the agent that reserved the coordinates, or None if they
+            are free.
+
+        """
+        x, y, t = coordinates
+        if t < self.first_epoch or t >= self.first_epoch + self.window:
+            return None
+        owner = int(self.owners[t % self.window, x, y])
+        return owner if owner >= 0 else None
+
+    def is_available(self, position, t, player_id):
+        """Tests whether an agent may occupy the given position at an epoch.
+
+        Parameters
+        ----------
+        position : (int, int)
+            The space coordinates of the cell.
+        t : int
+            The epoch.
+        player_id : int
+            The id of the agent.
+
+        Returns
+        -------
+        bool
+            True iff the cell is free or reserved by the agent itself.
+
+        """
+        owner = self.owner((*position, t))
+        return owner is None or owner == player_id
+
+    def edge_conflict(self, source, target, t, player_id):
+        """Tests whether moving between two cells swaps with another agent.
+
+        Parameters
+        ----------
+        source : (int, int)
+            The space coordinates of the cell left at epoch `t`.
+        target : (int, int)
+            The space coordinates of the cell reached at epoch `t + 1`.
+        t : int
+            The epoch of departure.
+        player_id : int
+            The id of the moving agent.
+
+        Returns
+        -------
+        bool
+            True iff another agent moves from `target` to `source` meanwhile.
+
+        """
+        other_id = self.__edge_owner(target, source, t)
+        return other_id >= 0 and other_id != player_id
+
+    def __edge_owner(self, source, target, t):
+        """Retrieves the owner of a move, or -1 if it is free."""
+        if t < self.first_epoch or t >= self.first_epoch + self.window:
+            return -1
+        dx, dy = target[0] - source[0], target[1] - source[1]
+        if abs(dx) + abs(dy) != 1:
+            return -1
+        shift = self.shift_indices[(dx + 1) * 3 + dy + 1]
+        return int(self.edges[t % self.window, source[0], source[1], shift])
+
+    def available_moves(self, source, targets, t, player_id):
+        """Filters the moves an agent may take from a cell at an epoch.
+
+        A move is available if its target is not reserved by another agent at
+        the next epoch, and if it does not swap with another agent. All the
+        targets are checked at once, by gathering their owners and the owners
+        of the reverse moves from the ring buffers.
+
+        Parameters
+        ----------
+        source : (int, int)
+            The space coordinates of the cell left at epoch `t`.
+        targets : list of (int, int)
+            The space coordinates of the candidate cells for epoch `t + 1`,
+            each one being `source` or adjacent to it.
+        t : int
+            The epoch of departure.
+        player_id : int
+            The id of the moving agent.
+
+        Returns
+        -------
+        list of (int, int)
+            The targets of the available moves, in the given order.
+
+        """
+        if targets == []:
+            return []
+        cells = np.asarray(targets, dtype=np.int64)
+        xs, ys = cells[:, 0], cells[:, 1]
+        available = np.ones(len(cells), dtype=bool)
+        if self.first_epoch <= t + 1 < self.first_epoch + self.window:
+            owners = self.owners[(t + 1) % self.window, xs, ys]
+            available &= (owners < 0) | (owners == player_id)
+        if self.first_epoch <= t < self.first_epoch + self.window:
+            # the moves from the targets back to the source, waiting included
+            shifts = self.shift_indices[(source[0] - xs + 1) * 3 + source[1] - ys + 1]
+            owners = self.edges[t % self.window, xs, ys, shifts]
+            available &= (owners < 0) | (owners == player_id)
+        return list(compress(targets, available.tolist()))
+
+    def constraints(self, player_id):
+        """Converts the other agents' reservations into space-time constraints.
+
+        Parameters
+        ----------
+        player_id : int
+            The id of the constrained agent.
+
+        Returns
+        -------
+        list of (str, tuple, int)
+            The constraints, in the format of
+            :class:`~coop.cbs.ConstrainedAStar`, forbidding the cells reserved
+            by the other agents and the moves swapping with theirs.
+
+        """
+        def epoch_of(slot):
+            return self.first_epoch + (int(slot) - self.first_epoch) % self.window
+
+        others = (self.owners >= 0) & (self.owners != player_id)
+        constraints = [('vertex', (int(x), int(y)), epoch_of(slot))
+                       for slot, x, y in zip(*np.nonzero(others))]
+        others = (self.edges >= 0) & (self.edges != player_id)
+        for slot, x, y, shift in zip(*np.nonzero(others)):
+            dx, dy = self.SHIFTS[shift]
+            source = (int(x), int(y))
+            constraints.append(('edge', ((source[0] + dx, source[1] + dy), source),
+                                epoch_of(slot)))
+        return constraints
+
+    def drop_before(self, epoch):
+        """Drops the slices of all the epochs prior to the given one.
+
+        Parameters
+        ----------
+        epoch : int
+            The epoch of the oldest slice to be kept.
+
+        """
+        last_epoch = min(epoch, self.first_epoch + self.window)
+        if last_epoch > self.first_epoch:
+            slots = np.arange(self.first_epoch, last_epoch) % self.window
+            dropped = int(np.count_nonzero(self.owners[slots] >= 0))
+            self.owners[slots] = -1
+            self.edges[slots] = -1
+            self.size -= dropped
+            self.nb_dropped += dropped
+        self.first_epoch = max(self.first_epoch, epoch)
+
+    @property
+    def memory_usage(self):
+        """The memory footprint of this table.
+
+        Returns
+        -------
+        int
+            The number of bytes taken by the ring buffers.
+
+        """
+        return self.owners.nbytes + self.edges.nbytes
+
+    def get(self, coordinates, default=None):
+        """Retrieves the owner of the given space-time coordinates.
+
+        Parameters
+        ----------
+        coordinates : (int, int, int)
+            The space-time coordinates to be queried.
+        default : int or None, optional
+            The value returned when the coordinates are free.
+
+        Returns
+        -------
+        int or None
+            The id of the owner, or `default`.
+
+        """
+        owner = self.owner(coordinates)
+        return default if owner is None else owner
+
+    def __getitem__(self, coordinates):
+        owner = self.owner(coordinates)
+        if owner is None:
+            raise KeyError(coordinates)
+        return owner
+
+    def __setitem__(self, coordinates, player_id):
+        self.reserve(coordinates, player_id)
+
+    def __contains__(self, coordinates):
+        return self.owner(coordinates) is not None
+
+    def __len__(self):
+        return self.size
+
+    def __repr__(self):
+        """Textual representation of this table."""
+        return f'RingReservationTable({self.size} reservations, ' \
+            f'epochs {self.first_epoch} to {self.first_epoch + self.window - 1})'
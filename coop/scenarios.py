@@ -0,0 +1,281 @@
+"""
+.. module:: scenarios
+   :synopsis: This file contains the seeded scenarios, i.e. the vials of the agents.
+.. moduleauthor:: Angelo Ortiz <github.com/angelo-ortiz>
+"""
+
+import random
+
+SCENARIO_HEADER = 'coop-scenario 1'
+
+
+class FreeCellIndex:
+    """A set of cells supporting the uniform sampling in constant time.
+
+    The cells are kept in a list along with their index in it, so that a
+    cell is removed by swapping it with the last one.
+
+    Parameters
+    ----------
+    cells : iterable of (int, int)
+        This argument contains the initial cells, without duplicates.
+
+    Attributes
+    ----------
+    cells : list of (int, int)
+        The cells of the set, in no particular order.
+    indices : dict of (int, int): int
+        The index of each cell in the list.
+
+    """
+
+    def __init__(self, cells=()):
+        self.cells = list(cells)
+        self.indices = {cell: i for i, cell in enumerate(self.cells)}
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __contains__(self, cell):
+        return cell in self.indices
+
+    def add(self, cell):
+        """Adds a cell if it is not already in the set.
+
+        Parameters
+        ----------
+        cell : (int, int)
+            The cell to be added.
+
+        """
+        if cell not in self.indices:
+            self.indices[cell] = len(self.cells)
+            self.cells.append(cell)
+
+    def discard(self, cell):
+        """Removes a cell if it is in the set.
+
+        Parameters
+        ----------
+        cell : (int, int)
+            The cell to be removed.
+
+        """
+        i = self.indices.pop(cell, None)
+        if i is not None:
+            last = self.cells.pop()
+            if i < len(self.cells):
+                self.cells[i] = last
+                self.indices[last] = i
+
+    def sample(self, rng):
+        """Draws a cell uniformly at random.
+
+        Parameters
+        ----------
+        rng : random.Random
+            The random generator.
+
+        Returns
+        -------
+        (int, int)
+            A cell of the set, which is left unchanged.
+
+        Raises
+        ------
+        IndexError
+            If the set is empty.
+
+        """
+        return self.cells[rng.randrange(len(self.cells))]
+
+    def pop(self, rng):
+        """Draws a cell uniformly at random and removes it.
+
+        Parameters
+        ----------
+        rng : random.Random
+            The random generator.
+
+        Returns
+        -------
+        (int, int)
+            The removed cell.
+
+        """
+        cell = self.sample(rng)
+        self.discard(cell)
+        return cell
+
+
+class Scenario:
+    """The initial positions of the agents and the sequence of their vials.
+
+    Parameters
+    ----------
+    map_name : str
+        This argument contains the name of the map.
+    nb_rows : int
+        This argument contains the number of rows of the grid.
+    nb_columns : int
+        This argument contains the number of columns of the grid.
+    seed : int
+        This argument contains the seed the scenario was generated from.
+    initial_positions : list of (int, int)
+        This argument contains the initial coordinates of the agents.
+    goals : list of list of (int, int)
+        This argument contains the vials of each agent, in collection order.
+
+    Attributes
+    ----------
+    map_name : str
+        The name of the map.
+    nb_rows : int
+        The number of rows of the grid.
+    nb_columns : int
+        The number of columns of the grid.
+    seed : int
+        The seed the scenario was generated from.
+    initial_positions : list of (int, int)
+        The initial coordinates of the agents.
+    goals : list of list of (int, int)
+        The vials of each agent, in collection order.
+
+    Notes
+    -----
+    A scenario file holds a header line, a line with the map name, the grid
+    dimensions and the seed, then a line per agent with the flat indices,
+    i.e. :math:`x n_c + y`, of its initial position and of its vials.
+
+    """
+
+    def __init__(self, map_name, nb_rows, nb_columns, seed, initial_positions, goals):
+        self.map_name = map_name
+        self.nb_rows = nb_rows
+        self.nb_columns = nb_columns
+        self.seed = seed
+        self.initial_positions = initial_positions
+        self.goals = goals
+
+    @property
+    def nb_vials(self):
+        """The number of vials each agent must collect.
+
+        Returns
+        -------
+        int
+            The length of the shortest sequence of vials.
+
+        """
+        return min((len(goals) for goals in self.goals), default=0)
+
+    def save(self, path):
+        """Writes this scenario to a file.
+
+        Parameters
+        ----------
+        path : str
+            The path of the scenario file.
+
+        """
+        nb_columns = self.nb_columns
+        with open(path, 'w') as f:
+            f.write(f'{SCENARIO_HEADER}\n')
+            f.write(f'{self.map_name or "-"} {self.nb_rows} {nb_columns} {self.seed}\n')
+            for initial_position, goals in zip(self.initial_positions, self.goals):
+                f.write(' '.join(str(x * nb_columns + y)
+                                 for x, y in [initial_position] + goals) + '\n')
+
+    @classmethod
+    def load(cls, path):
+        """Reads a scenario from a file.
+
+        Parameters
+        ----------
+        path : str
+            The path of the scenario file.
+
+        Returns
+        -------
+        Scenario
+            The scenario written by :meth:`save`.
+
+        Raises
+        ------
+        ValueError
+            If the file is not a scenario file.
+
+        """
+        with open(path) as f:
+            lines = f.read().split('\n')
+        if lines[0] != SCENARIO_HEADER:
+            raise ValueError(f'{path} is not a scenario file')
+        map_name, nb_rows, nb_columns, seed = lines[1].split()
+        nb_columns = int(nb_columns)
+        initial_positions, goals = [], []
+        for line in lines[2:]:
+            if line == '':
+                continue
+            cells = [divmod(int(index), nb_columns) for index in line.split()]
+            initial_positions.append(cells[0])
+            goals.append(cells[1:])
+        return cls(map_name if map_name != '-' else '', int(nb_rows), nb_columns, int(seed),
+                   initial_positions, goals)
+
+
+def generate_scenario(map_data, nb_vials, seed, map_name='', nb_agents=None):
+    """Draws the vials of every agent on a map.
+
+    The vials are drawn round by round, i.e. the first vial of each agent,
+    then the second one and so on, without replacement from the free cells
+    which are not an initial position. Once all of them are drawn, they are
+    all available again except the cells each agent may be heading to or
+    parked on, i.e. its last two vials, or its initial position if it has
+    fewer, so that vials of the same round never coincide and a vial is
+    never dropped under an agent or on another agent's pending goal.
+
+    Parameters
+    ----------
+    map_data : MapData
+        The map, whose agents are kept.
+    nb_vials : int
+        The number of vials of each agent.
+    seed : int
+        The seed of the random generator.
+    map_name : str, optional
+        The name of the map recorded in the scenario.
+    nb_agents : int or None, optional
+        The number of agents kept, by default all those of the map.
+
+    Returns
+    -------
+    Scenario
+        The scenario, which only depends on the map, the number of vials and
+        the seed.
+
+    Raises
+    ------
+    ValueError
+        If there are fewer free cells than agents.
+
+    """
+    rng = random.Random(seed)
+    initial_positions = map_data.initial_positions[:nb_agents]
+    free_cells = map_data.free_cells()
+    index = FreeCellIndex(free_cells)
+    for position in initial_positions:
+        index.discard(position)
+
+    goals = [[] for _ in initial_positions]
+    for _ in range(nb_vials):
+        for agent_goals in goals:
+            if len(index) == 0:
+                index = FreeCellIndex(free_cells)
+                for position, other_goals in zip(initial_positions, goals):
+                    for cell in ([position] + other_goals)[-2:]:
+                        index.discard(cell)
+                if len(index) == 0:
+                    raise ValueError('Not enough free cells for the agents')
+            agent_goals.append(index.pop(rng))
+    return Scenario(map_name, map_data.nb_rows, map_data.nb_columns, seed,
+                    list(initial_positions), goals)
@@ -0,0 +1,411 @@
+"""
+.. module:: simulation
+   :synopsis: This file contains the headless simulation loop and its observers.
+.. moduleauthor:: Angelo Ortiz <github.com/angelo-ortiz>
+"""
+
+import random
+import time
+
+from .reservations import find_conflicts
+from .scenarios import FreeCellIndex
+
+
+class Observer:
+    """The base of the observers notified by a simulation.
+
+    Every method does nothing, so that an observer only overrides the events
+    it is interested in.
+
+    """
+
+    def on_start(self, simulation):
+        """Called once the agents and the first goals are set.
+
+        Parameters
+        ----------
+        simulation : Simulation
+            The observed simulation.
+
+        """
+
+    def on_move(self, simulation, player, position):
+        """Called once an agent has moved.
+
+        Parameters
+        ----------
+        simulation : Simulation
+            The observed simulation.
+        player : int
+            The index of the agent.
+        position : (int, int)
+            The new coordinates of the agent.
+
+        """
+
+    def on_collect(self, simulation, player, position, new_goal):
+        """Called once an agent has collected a vial.
+
+        Parameters
+        ----------
+        simulation : Simulation
+            The observed simulation.
+        player : int
+            The index of the agent.
+        position : (int, int)
+            The coordinates of the collected vial.
+        new_goal : (int, int) or None
+            The coordinates of the respawned vial, or None if the agent has
+            collected all its vials.
+
+        """
+
+    def on_epoch(self, simulation):
+        """Called once all the agents have moved.
+
+        Parameters
+        ----------
+        simulation : Simulation
+            The observed simulation.
+
+        """
+
+
+class GameObserver(Observer):
+    """An observer displaying the simulation in a game window.
+
+    The players and the vials of the game are moved along with the agents and
+    their goals, then the window is refreshed at every epoch. The game is
+    only used through its layers and its `mainiteration()` method, so that
+    this module does not depend on pygame.
+
+    Parameters
+    ----------
+    game : utils.gameclass.Game
+        This argument contains the game whose map is simulated.
+
+    Attributes
+    ----------
+    game : utils.gameclass.Game
+        The displayed game.
+    players : list of utils.players.Player
+        The player sprite of each agent.
+
+    """
+
+    def __init__(self, game):
+        self.game = game
+        self.players = []
+
+    def on_start(self, simulation):
+        sprites = {sprite.get_rowcol(): sprite for sprite in self.game.layers['joueur']}
+        self.players = [sprites[position] for position in simulation.positions]
+        for vial, goal in zip(list(self.game.layers['ramassable']), simulation.goals):
+            vial.set_rowcol(*goal)
+        self.game.mainiteration()
+
+    def on_move(self, simulation, player, position):
+        if simulation.world.grid_map.is_free(*position):
+            self.players[player].set_rowcol(*position)
+
+    def on_collect(self, simulation, player, position, new_goal):
+        vial = self.players[player].ramasse(self.game.layers)
+        if vial is not None and new_goal is not None:
+            vial.set_rowcol(*new_goal)
+            self.game.layers['ramassable'].add(vial)
+
+    def on_epoch(self, simulation):
+        self.game.mainiteration()
+
+
+class Simulation:
+    """A headless simulation where agents collect vials in a grid.
+
+    At every epoch, the agents move one after the other. An agent reaching
+    its goal collects the vial, and a new one is dropped until the agent has
+    collected all its vials: either the next one of its sequence of goals,
+    or one at random on a free cell which is not another agent's goal, nor
+    occupied unless all of them are. The collisions are counted but not
+    prevented.
+
+    Parameters
+    ----------
+    agents : list of CoopPlayer or list of AdvancedPlayer or CoopPlanner or CBSPlanner
+        This argument contains either one agent per player, or a planner
+        moving the players in turn.
+    world : World
+        This argument contains the world of the agents.
+    initial_positions : list of (int, int)
+        This argument contains the initial coordinates of the agents.
+    goals : list of (int, int)
+        This argument contains the first goal of each agent, which the agents
+        must have been given.
+    nb_vials : int
+        This argument contains the number of vials each agent must collect.
+    seed : int or None, optional
+        This argument contains the seed of the random respawns.
+    observers : iterable of Observer, optional
+        This argument contains the observers notified of the events.
+    goal_sequences : list of list of (int, int) or None, optional
+        This argument contains the vials of each agent in collection order,
+        the first goal included, or None for random respawns.
+
+    Attributes
+    ----------
+    agents : list of CoopPlayer or list of AdvancedPlayer or None
+        The agents, or None if they are moved by a planner.
+    planner : CoopPlanner or CBSPlanner or None
+        The planner moving the agents, if any.
+    world : World
+        The world of the agents.
+    nb_vials : int
+        The number of vials each agent must collect.
+    rng : random.Random
+        The random generator of the respawns.
+    free_cells : FreeCellIndex
+        The free cells which are not a goal, where a vial can be dropped.
+    goal_sequences : list of list of (int, int) or None
+        The vials of each agent in collection order, if predetermined.
+    observers : list of Observer
+        The observers notified of the events.
+    positions : list of (int, int)
+        The current coordinates of the agents.
+    goals : list of (int, int) or None
+        The current goal of each agent, or None once it is done.
+    scores : list of int
+        The number of vials collected by each agent.
+    completion_epochs : list of int or None
+        The epoch at which each agent collected its last vial, if done.
+    epoch : int
+        The number of epochs elapsed.
+    cpu_time : float
+        The processor time in seconds spent building and moving the agents,
+        excluding the simulation itself.
+    conflicts : int
+        The number of vertex and swapping collisions between agents.
+    last_conflicts : list of (int, int)
+        The pairs of agents which collided during the last epoch.
+
+    """
+
+    def __init__(self, agents, world, initial_positions, goals, nb_vials, seed=None,
+                 observers=(), goal_sequences=None):
+        if isinstance(agents, list):
+            self.agents, self.planner = agents, None
+        else:
+            self.agents, self.planner = None, agents
+        self.world = world
+        self.nb_vials = nb_vials
+        self.rng = random.Random(seed)
+        self.free_cells = FreeCellIndex((x, y) for x in range(world.nb_rows)
+                                        for y in range(world.nb_columns)
+                                        if world.grid_map.is_free(x, y))
+        self.goal_sequences = goal_sequences
+        self.observers = list(observers)
+        self.positions = list(initial_positions)
+        self.goals = list(goals)
+        for goal in self.goals:
+            self.free_cells.discard(goal)
+        self.scores = [0] * len(self.positions)
+        self.completion_epochs = [None] * len(self.positions)
+        self.epoch = 0
+        self.cpu_time = 0
+        self.conflicts = 0
+        self.last_conflicts = []
+        for observer in self.observers:
+            observer.on_start(self)
+
+    @classmethod
+    def build(cls, make_agents, world, initial_positions, goals, nb_vials, **kwargs):
+        """Builds the agents and their simulation, timing the former.
+
+        Parameters
+        ----------
+        make_agents : callable
+            A function of the world, the initial positions and the goal
+            lists returning the agents or their planner.
+        world : World
+            The world of the agents.
+        initial_positions : list of (int, int)
+            The initial coordinates of the agents.
+        goals : list of (int, int)
+            The first goal of each agent.
+        nb_vials : int
+            The number of vials each agent must collect.
+        **kwargs
+            The `seed`, the `observers` and the `goal_sequences` of the
+            simulation.
+
+        Returns
+        -------
+        Simulation
+            The simulation, whose CPU time includes the agents' construction.
+
+        """
+        t_0 = time.process_time()
+        agents = make_agents(world, initial_positions, [[goal] for goal in goals])
+        cpu_time = time.process_time() - t_0
+        simulation = cls(agents, world, initial_positions, goals, nb_vials, **kwargs)
+        simulation.cpu_time += cpu_time
+        return simulation
+
+    @classmethod
+    def from_scenario(cls, make_agents, world, scenario, **kwargs):
+        """Builds the agents and their simulation replaying a scenario.
+
+        Parameters
+        ----------
+        make_agents : callable
+            A function of the world, the initial positions and the goal
+            lists returning the agents or their planner.
+        world : World
+            The world of the agents, on the map of the scenario.
+        scenario : Scenario
+            The initial positions and the vials of the agents.
+        **kwargs
+            The `observers` of the simulation.
+
+        Returns
+        -------
+        Simulation
+            The simulation, whose CPU time includes the agents' construction.
+
+        """
+        return cls.build(make_agents, world, scenario.initial_positions,
+                         [goals[0] for goals in scenario.goals], scenario.nb_vials,
+                         goal_sequences=scenario.goals, **kwargs)
+
+    def respawn(self, player, occupied):
+        """Determines the location of the next vial of an agent.
+
+        Parameters
+        ----------
+        player : int
+            The index of the agent which has just collected a vial.
+        occupied : list of (int, int)
+            The cells of the agents which have already moved this epoch.
+
+        Returns
+        -------
+        (int, int)
+            The next vial of the agent's sequence if any, otherwise a free
+            cell drawn at random which is not a goal, nor occupied unless all
+            of them are.
+
+        """
+        if self.goal_sequences is not None:
+            return self.goal_sequences[player][self.scores[player]]
+        occupied = [cell for cell in occupied if cell in self.free_cells]
+        for cell in occupied:
+            self.free_cells.discard(cell)
+        goal = self.free_cells.sample(self.rng) if len(self.free_cells) > 0 else None
+        for cell in occupied:
+            self.free_cells.add(cell)
+        return goal if goal is not None else self.free_cells.sample(self.rng)
+
+    def step(self):
+        """Moves every agent once, i.e. simulates an epoch.
+
+        Returns
+        -------
+        list of (int, int)
+            The new coordinates of the agents.
+
+        """
+        self.epoch += 1
+        previous = self.positions[:]
+        current = []
+        for j in range(len(self.positions)):
+            t_0 = time.process_time()
+            position = self.planner.next() if self.planner is not None else self.agents[j].next()
+            self.cpu_time += time.process_time() - t_0
+            current.append(position)
+            self.positions[j] = position
+            for observer in self.observers:
+                observer.on_move(self, j, position)
+
+            if position == self.goals[j]:
+                self.scores[j] += 1
+                self.free_cells.add(position)
+                if self.scores[j] < self.nb_vials:
+                    new_goal = self.respawn(j, current)
+                    self.free_cells.discard(new_goal)
+                    if self.planner is not None:
+                        self.planner.add_goal(j, new_goal)
+                    else:
+                        self.agents[j].add_goal(new_goal)
+                else:
+                    new_goal = None
+                    self.completion_epochs[j] = self.epoch
+                self.goals[j] = new_goal
+                for observer in self.observers:
+                    observer.on_collect(self, j, position, new_goal)
+
+        # the vertex conflicts at epoch 0 were counted during the previous epoch
+        self.last_conflicts = [(i, j) for kind, t, i, j, _ in
+                               find_conflicts([prev, cur] for prev, cur in zip(previous, current))
+                               if t == (1 if kind == 'vertex' else 0)]
+        self.conflicts += len(self.last_conflicts)
+        for observer in self.observers:
+            observer.on_epoch(self)
+        return current
+
+    def is_over(self):
+        """Tests whether every agent has collected all its vials.
+
+        Returns
+        -------
+        bool
+            True iff the simulation is over.
+
+        """
+        return all(goal is None for goal in self.goals)
+
+    def run(self, max_epochs=None, time_limit=None):
+        """Simulates epochs until all the vials are collected.
+
+        Parameters
+        ----------
+        max_epochs : int or None, optional
+            The number of epochs after which the simulation is given up, or
+            None for no limit.
+        time_limit : float or None, optional
+            The processor time in seconds spent in the agents after which the
+            simulation is given up, or None for no limit.
+
+        Returns
+        -------
+        bool
+            True iff every agent has collected all its vials.
+
+        """
+        while not self.is_over() and (max_epochs is None or self.epoch < max_epochs) and \
+                (time_limit is None or self.cpu_time < time_limit):
+            self.step()
+        return self.is_over()
+
+    @property
+    def average_epochs(self):
+        """The average epoch at which an agent collected its last vial.
+
+        Returns
+        -------
+        float or None
+            The average completion epoch, or None if an agent is not done.
+
+        """
+        if not self.is_over():
+            return None
+        return sum(self.completion_epochs) / len(self.completion_epochs)
+
+    @property
+    def makespan(self):
+        """The epoch at which the last agent collected its last vial.
+
+        Returns
+        -------
+        int or None
+            The makespan, or None if an agent is not done.
+
+        """
+        return max(self.completion_epochs) if self.is_over() else None
@@ -95,7 +95,7 @@ class AverageGroupDurationStrategy(SequenceSortingStrategy):
     def sort(self):
         durations = {}
         for group in self.sequence:
-            durations[tuple(group)] = sum([len(players[p].steps)
+            durations[tuple(group)] = sum([len(self.players[p].steps)
                                            for p in group]) / len(group)
         self.sequence.sort(key=lambda x: durations[tuple(x)])
 
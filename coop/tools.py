@@ -4,7 +4,16 @@
 .. moduleauthor:: Angelo Ortiz <github.com/angelo-ortiz>
 """
 
+import hashlib
 import heapq
+import math
+from array import array
+from collections import OrderedDict, deque
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 
 def distance(point, other):
@@ -27,6 +36,545 @@ def distance(point, other):
     return sum(dists)
 
 
+class GridMap:
+    """An occupancy grid giving constant-time passability tests.
+
+    Parameters
+    ----------
+    nb_rows : int
+        This argument contains the number of rows of the grid.
+    nb_columns : int
+        This argument contains the number of columns of the grid.
+    walls : list of (int, int), optional
+        This argument contains the list of all the obstacles of the grid.
+
+    Attributes
+    ----------
+    nb_rows : int
+        The storage location of the number of rows.
+    nb_columns : int
+        The storage location of the number of columns.
+    blocked : bytearray
+        The flag of each cell, indexed by ``x * nb_columns + y``, telling
+        whether it encloses an obstacle.
+    fingerprint
+    base : GridMap
+        The grid map built from the walls only, i.e. this very grid map unless
+        it is an overlay of temporary obstacles.
+    version : int
+        The number of changes of the obstacles, so that the structures built
+        from this grid map can tell whether they are stale.
+
+    """
+
+    def __init__(self, nb_rows, nb_columns, walls=()):
+        self.nb_rows = nb_rows
+        self.nb_columns = nb_columns
+        self.blocked = bytearray(nb_rows * nb_columns)
+        self.base = self
+        self._fingerprint = None
+        self.version = 0
+        self.block(walls)
+
+    def index_of(self, coordinates):
+        """Determines the flat index of the cell with the given coordinates.
+
+        Parameters
+        ----------
+        coordinates : (int, int)
+            The coordinates of the cell.
+
+        Returns
+        -------
+        int
+            The index of the cell in the flat arrays.
+
+        """
+        return coordinates[0] * self.nb_columns + coordinates[1]
+
+    def coordinates_of(self, index):
+        """Determines the coordinates of the cell with the given flat index.
+
+        Parameters
+        ----------
+        index : int
+            The index of the cell in the flat arrays.
+
+        Returns
+        -------
+        (int, int)
+            The coordinates of the cell.
+
+        """
+        return divmod(index, self.nb_columns)
+
+    def is_valid(self, x, y):
+        """Tests whether the given position is in the grid bounds.
+
+        Parameters
+        ----------
+        x : int
+            The row number.
+        y : int
+            The column number.
+
+        Returns
+        -------
+        bool
+            True iff the given position is located inside the grid.
+
+        """
+        return 0 <= x < self.nb_rows and 0 <= y < self.nb_columns
+
+    def is_free(self, x, y):
+        """Tests whether the given position can be occupied.
+
+        Parameters
+        ----------
+        x : int
+            The row number.
+        y : int
+            The column number.
+
+        Returns
+        -------
+        bool
+            True iff the given position is located inside the grid and does
+            not enclose an obstacle.
+
+        """
+        return 0 <= x < self.nb_rows and 0 <= y < self.nb_columns and \
+            not self.blocked[x * self.nb_columns + y]
+
+    def block(self, cells):
+        """Marks the given cells as obstacles.
+
+        Cells located outside the grid are ignored.
+
+        Parameters
+        ----------
+        cells : list of (int, int)
+            The coordinates of the cells to be blocked.
+
+        """
+        for x, y in cells:
+            if self.is_valid(x, y):
+                self.blocked[x * self.nb_columns + y] = 1
+        self._fingerprint = None
+        self.version += 1
+
+    def unblock(self, cells):
+        """Marks the given cells as free.
+
+        Cells located outside the grid are ignored.
+
+        Parameters
+        ----------
+        cells : list of (int, int)
+            The coordinates of the cells to be freed.
+
+        """
+        for x, y in cells:
+            if self.is_valid(x, y):
+                self.blocked[x * self.nb_columns + y] = 0
+        self._fingerprint = None
+        self.version += 1
+
+    @property
+    def fingerprint(self):
+        """A digest identifying the dimensions and the obstacles of this grid.
+
+        Returns
+        -------
+        str
+            The same digest for any two grid maps enclosing the same obstacles.
+
+        """
+        if self._fingerprint is None:
+            digest = hashlib.sha1(
+                f'{self.nb_rows}x{self.nb_columns}:'.encode())
+            digest.update(self.blocked)
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def with_obstacles(self, obstacles):
+        """Creates an overlay of this grid map with some temporary obstacles.
+
+        This grid map is left untouched, so that the overlay may be thrown
+        away as soon as the obstacles are no longer relevant.
+
+        Parameters
+        ----------
+        obstacles : list of (int, int)
+            The coordinates of the temporary obstacles.
+
+        Returns
+        -------
+        GridMap
+            A grid map enclosing both the obstacles of this grid map and the
+            given ones.
+
+        """
+        overlay = GridMap.__new__(GridMap)
+        overlay.nb_rows = self.nb_rows
+        overlay.nb_columns = self.nb_columns
+        overlay.blocked = self.blocked[:]
+        overlay.base = self.base
+        overlay._fingerprint = None
+        overlay.version = 0
+        overlay.block(obstacles)
+        return overlay
+
+    @property
+    def walls(self):
+        """The list of all the obstacles of this grid map.
+
+        Returns
+        -------
+        list of (int, int)
+            The coordinates of all the blocked cells.
+
+        """
+        return [divmod(i, self.nb_columns) for i, b in enumerate(self.blocked) if b]
+
+
+def get_grid_map(walls):
+    """Retrieves the grid map of the given obstacles.
+
+    Parameters
+    ----------
+    walls : GridMap or World
+        A grid map, or a world whose grid map is used.
+
+    Returns
+    -------
+    GridMap
+        The given grid map, or that of the given world.
+
+    Raises
+    ------
+    TypeError
+        If neither a grid map nor a world is given, e.g. a bare list of walls,
+        which does not tell the dimensions of the grid.
+
+    """
+    if isinstance(walls, GridMap):
+        return walls
+    grid_map = getattr(walls, 'grid_map', None)
+    if not isinstance(grid_map, GridMap):
+        raise TypeError('A grid map or a world is required to know the dimensions '
+                        'of the grid')
+    return grid_map
+
+
+def bfs_distance_field(grid_map, goal):
+    """Calculates the distance from every cell of the grid to the given goal.
+
+    Parameters
+    ----------
+    grid_map : GridMap
+        The occupancy grid.
+    goal : (int, int)
+        The coordinates of the goal.
+
+    Returns
+    -------
+    array of int
+        The distance to the goal of each cell, indexed by
+        ``x * nb_columns + y``, or -1 if the goal cannot be reached from it.
+
+    """
+    nb_rows, nb_columns = grid_map.nb_rows, grid_map.nb_columns
+    blocked = grid_map.blocked
+    field = array('i', [-1]) * (nb_rows * nb_columns)
+    root = grid_map.index_of(goal)
+    field[root] = 0
+    frontier = deque([root])
+    while frontier:
+        index = frontier.popleft()
+        cost = field[index] + 1
+        x, y = divmod(index, nb_columns)
+        if x + 1 < nb_rows and field[index + nb_columns] == -1 and \
+                not blocked[index + nb_columns]:
+            field[index + nb_columns] = cost
+            frontier.append(index + nb_columns)
+        if x > 0 and field[index - nb_columns] == -1 and \
+                not blocked[index - nb_columns]:
+            field[index - nb_columns] = cost
+            frontier.append(index - nb_columns)
+        if y + 1 < nb_columns and field[index + 1] == -1 and \
+                not blocked[index + 1]:
+            field[index + 1] = cost
+            frontier.append(index + 1)
+        if y > 0 and field[index - 1] == -1 and not blocked[index - 1]:
+            field[index - 1] = cost
+            frontier.append(index - 1)
+    return field
+
+
+def _free_cells(grid_map):
+    """Builds the boolean array of the free cells of the given grid map."""
+    if np is None:
+        raise ImportError('NumPy is required to build vectorised distance fields')
+    blocked = np.frombuffer(grid_map.blocked, dtype=np.uint8)
+    return blocked.reshape(grid_map.nb_rows, grid_map.nb_columns) == 0
+
+
+def _expand_wavefront(free, frontier):
+    """Expands the given frontiers until they cover every reachable cell.
+
+    Parameters
+    ----------
+    free : ndarray of bool
+        The free cells of the grid, of shape ``(nb_rows, nb_columns)``.
+    frontier : ndarray of bool
+        The initial frontiers, whose two last axes are those of `free`.
+
+    Returns
+    -------
+    ndarray of int
+        The distance of each cell to its frontier's initial cells, -1 if the
+        cell cannot be reached, with the same shape as `frontier`.
+
+    Notes
+    -----
+    Each step only shifts the bounding box of the current frontiers, grown by
+    one cell, since no other cell can be reached during that step.
+
+    """
+    nb_rows, nb_columns = free.shape
+    frontier = frontier & free
+    field = np.full(frontier.shape, -1, dtype=np.int32)
+    field[frontier] = 0
+    unreached = free & ~frontier
+    frontiers = frontier.reshape(-1, nb_rows, nb_columns)
+    cost = 0
+    while True:
+        rows = np.flatnonzero(frontiers.any(axis=(0, 2)))
+        if rows.size == 0:
+            return field
+        columns = np.flatnonzero(frontiers.any(axis=(0, 1)))
+        r_0, r_1 = max(rows[0] - 1, 0), rows[-1] + 2
+        c_0, c_1 = max(columns[0] - 1, 0), columns[-1] + 2
+
+        window = frontier[..., r_0:r_1, c_0:c_1]
+        shifted = np.zeros_like(window)
+        shifted[..., 1:, :] |= window[..., :-1, :]
+        shifted[..., :-1, :] |= window[..., 1:, :]
+        shifted[..., :, 1:] |= window[..., :, :-1]
+        shifted[..., :, :-1] |= window[..., :, 1:]
+        shifted &= unreached[..., r_0:r_1, c_0:c_1]
+
+        cost += 1
+        frontier[..., r_0:r_1, c_0:c_1] = shifted
+        np.copyto(field[..., r_0:r_1, c_0:c_1], cost, where=shifted)
+        unreached[..., r_0:r_1, c_0:c_1] &= ~shifted
+
+
+def distance_field(grid_map, sources):
+    """Calculates the distance from every cell of the grid to the given sources.
+
+    The field is built as a wavefront whose frontier is a boolean array, so
+    that each expansion step is a handful of vectorised operations.
+
+    Parameters
+    ----------
+    grid_map : GridMap
+        The occupancy grid.
+    sources : list of (int, int)
+        The coordinates of the cells at distance 0.
+
+    Returns
+    -------
+    ndarray of int
+        The distance to the closest source of each cell, of shape
+        ``(nb_rows, nb_columns)``, or -1 if no source can be reached from it.
+
+    """
+    free = _free_cells(grid_map)
+    frontier = np.zeros_like(free)
+    for x, y in sources:
+        frontier[x, y] = True
+    return _expand_wavefront(free, frontier)
+
+
+def distance_fields(grid_map, goals):
+    """Calculates the distance fields of many goals at once.
+
+    Parameters
+    ----------
+    grid_map : GridMap
+        The occupancy grid.
+    goals : list of (int, int)
+        The coordinates of the goals.
+
+    Returns
+    -------
+    ndarray of int
+        The distance field of each goal, of shape
+        ``(len(goals), nb_rows, nb_columns)``.
+
+    See Also
+    --------
+    distance_field
+
+    """
+    free = _free_cells(grid_map)
+    frontier = np.zeros((len(goals), *free.shape), dtype=bool)
+    for k, (x, y) in enumerate(goals):
+        frontier[k, x, y] = True
+    return _expand_wavefront(free, frontier)
+
+
+class DistanceFieldCache:
+    """A bounded cache of goal-rooted distance fields.
+
+    The fields are keyed by the fingerprint of their grid map and by their
+    goal, and the least recently used ones are evicted as soon as the cache
+    exceeds its memory budget.
+
+    Parameters
+    ----------
+    memory_budget : int, optional
+        This argument contains the maximum number of bytes of all the fields.
+
+    Attributes
+    ----------
+    memory_budget : int
+        The storage location of the memory budget.
+    fields : OrderedDict of (str, (int, int)): array of int
+        The cached fields, from the least to the most recently used.
+    memory_usage : int
+        The number of bytes taken by the cached fields.
+    hits : int
+        The number of successful lookups.
+    misses : int
+        The number of failed lookups.
+    evictions : int
+        The number of fields evicted so far.
+
+    """
+
+    def __init__(self, memory_budget=64 * 1024 * 1024):
+        self.memory_budget = memory_budget
+        self.fields = OrderedDict()
+        self.memory_usage = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        """Number of cached fields."""
+        return len(self.fields)
+
+    def get(self, grid_map, goal):
+        """Retrieves the distance field of the given goal, if cached.
+
+        Parameters
+        ----------
+        grid_map : GridMap
+            The occupancy grid.
+        goal : (int, int)
+            The coordinates of the goal.
+
+        Returns
+        -------
+        array of int or None
+            The distance field of the goal, or None if it is not cached.
+
+        """
+        key = (grid_map.fingerprint, goal)
+        field = self.fields.get(key)
+        if field is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.fields.move_to_end(key)
+        return field
+
+    def put(self, grid_map, goal, field):
+        """Caches the distance field of the given goal.
+
+        Parameters
+        ----------
+        grid_map : GridMap
+            The occupancy grid.
+        goal : (int, int)
+            The coordinates of the goal.
+        field : array of int
+            The distance field of the goal.
+
+        """
+        key = (grid_map.fingerprint, goal)
+        if key in self.fields:
+            self.memory_usage -= self.__size_of(self.fields.pop(key))
+        self.fields[key] = field
+        self.memory_usage += self.__size_of(field)
+        while self.memory_usage > self.memory_budget and len(self.fields) > 1:
+            _, evicted = self.fields.popitem(last=False)
+            self.memory_usage -= self.__size_of(evicted)
+            self.evictions += 1
+
+    def get_or_compute(self, grid_map, goal):
+        """Retrieves the distance field of the given goal, computing it if needed.
+
+        Parameters
+        ----------
+        grid_map : GridMap
+            The occupancy grid.
+        goal : (int, int)
+            The coordinates of the goal.
+
+        Returns
+        -------
+        array of int
+            The distance field of the goal.
+
+        """
+        field = self.get(grid_map, goal)
+        if field is None:
+            field = bfs_distance_field(grid_map, goal)
+            self.put(grid_map, goal, field)
+        return field
+
+    def prefetch(self, grid_map, goals):
+        """Computes the missing distance fields of the given goals.
+
+        The missing fields are computed in a single batch when NumPy is
+        available, and one at a time otherwise.
+
+        Parameters
+        ----------
+        grid_map : GridMap
+            The occupancy grid.
+        goals : list of (int, int)
+            The coordinates of the goals, e.g. the current goals of all the
+            players.
+
+        """
+        missing = [goal for goal in dict.fromkeys(goals)
+                   if (grid_map.fingerprint, goal) not in self.fields]
+        if missing == []:
+            return
+        if np is None:
+            for goal in missing:
+                self.put(grid_map, goal, bfs_distance_field(grid_map, goal))
+            return
+        for goal, field in zip(missing, distance_fields(grid_map, missing)):
+            flat = array('i')
+            flat.frombytes(field.astype(np.int32).tobytes())
+            self.put(grid_map, goal, flat)
+
+    def clear(self):
+        """Removes all the cached fields."""
+        self.fields.clear()
+        self.memory_usage = 0
+
+    @staticmethod
+    def __size_of(field):
+        return len(field) * field.itemsize
+
+
 class Node:
     """A node in A* algorithm's state graph.
 
@@ -54,39 +602,26 @@ class Node:
         The storage location of the node's parent.
     cost : int
         The cost of the path from A*'s root to this node.
+    f_value : int or None
+        The cached f-value of this node, or None if not yet calculated.
 
-    NB_ROWS : int
-        The number of rows of the grid.
-    NB_COLUMNS : int
-        The number of columns of the grid.
+    Notes
+    -----
+    The nodes have no instance dictionary, as a single search allocates
+    thousands of them.
 
     """
 
-    NB_ROWS = 0
-    NB_COLUMNS = 0
+    __slots__ = ('a_star', 'x', 'y', 'parent', 'cost', 'f_value')
 
     def __init__(self, a_star, x, y, parent=None):
         self.a_star = a_star
         self.x = x
         self.y = y
         self.parent = parent
+        self.f_value = None
         self.__init_cost()
 
-    @classmethod
-    def set_world_dimensions(cls, nb_rows, nb_columns):
-        """Sets the dimensions of the grid.
-
-        Parameters
-        ----------
-        nb_rows : int
-            The number of rows.
-        nb_columns : int
-            The number of columns.
-
-        """
-        cls.NB_ROWS = nb_rows
-        cls.NB_COLUMNS = nb_columns
-
     def __init_cost(self):
         if self.has_parent():
             # staying put has cost 0
@@ -171,7 +706,8 @@ class Node:
         """Calculates the f-value of this node.
 
         The f-value of a node corresponds to an estimate of the full
-        path starting from the root and ending at the goal.
+        path starting from the root and ending at the goal. It is calculated
+        once, since the fringe compares the nodes repeatedly.
 
         Returns
         -------
@@ -179,10 +715,11 @@ class Node:
             The f-value of this node.
 
         """
-        return self.cost + self.h()
+        if self.f_value is None:
+            self.f_value = self.cost + self.h()
+        return self.f_value
 
-    @classmethod
-    def is_valid(cls, x, y):
+    def is_valid(self, x, y):
         """Tests whether the given position is in the grid bounds.
 
         Parameters
@@ -198,7 +735,7 @@ class Node:
             True iff the given position is located inside the grid.
 
         """
-        return x >= 0 and x < Node.NB_ROWS and y >= 0 and y < Node.NB_COLUMNS
+        return self.a_star.grid_map.is_valid(x, y)
 
     def get_valid_neighbours(self):
         """Finds all the valid neighbours of this node.
@@ -214,8 +751,9 @@ class Node:
         """
         shifts = [(1, 0), (-1, 0), (0, 1), (0, -1)]
         neighbours = [(self.x + dx, self.y + dy) for dx, dy in shifts]
-        return [Node(self.a_star, x, y, parent=self) for x, y in neighbours
-                if (x, y) not in self.a_star.walls and Node.is_valid(x, y)]
+        grid_map = self.a_star.grid_map
+        return [type(self)(self.a_star, x, y, parent=self) for x, y in neighbours
+                if grid_map.is_free(x, y)]
 
     def get_step(self):
         """Determines the step taken to come to this node from its parent.
@@ -253,8 +791,9 @@ class AStar:
         This argument contains the coordinates of the initial node.
     goal_state : (int, int)
         This argument contains the coordinates of the goal node.
-    walls : list of (int, int)
-        This argument contains the list of all the obstacles to be avoided.
+    walls : GridMap or World
+        This argument contains the grid map of the obstacles to be avoided, or
+        the world whose grid map is used.
 
     Attributes
     ----------
@@ -262,8 +801,10 @@ class AStar:
         The initial node.
     goal_state : Node
         The goal node.
-    walls : list of (int, int)
+    walls : GridMap or World
         The storage location of the walls position.
+    grid_map : GridMap
+        The occupancy grid used to test the neighbours' validity.
     open_set : heap of Node
         The fringe of the algorithm.
     closed_set : dict of (int, int): Node
@@ -275,6 +816,7 @@ class AStar:
         self.initial_state = Node(self, *initial_state)
         self.goal_state = Node(self, *goal_state)
         self.walls = walls
+        self.grid_map = get_grid_map(walls)
         self.open_set = [self.initial_state]
         self.closed_set = {}
 
@@ -288,6 +830,10 @@ class AStar:
 
         """
         self.goal_state = Node(self, *new_goal)
+        # the cached f-values of the fringe depend on the former goal
+        for node in self.open_set:
+            node.f_value = None
+        heapq.heapify(self.open_set)
 
     def open_set_is_empty(self):
         """Tests whether the fringe is empty.
@@ -325,10 +871,7 @@ class AStar:
             The node in the closed set whose coordinates are given.
 
         """
-        for node_coord, node in self.closed_set.items():
-            if coordinates == node_coord:
-                return node
-        return None
+        return self.closed_set.get(coordinates)
 
     def add_to_open_set(self, states):
         """Appends the given nodes to the fringe.
@@ -380,13 +923,7 @@ class AStar:
             from the given list.
 
         """
-        extended = []
-        for st in states:
-            try:
-                _ = self.closed_set[states.coordinates]
-            except:
-                extended.append(st)
-        return extended
+        return [st for st in states if st.coordinates not in self.closed_set]
 
     def run(self):
         """Runs this A* instance.
@@ -434,3 +971,758 @@ class AStar:
             steps.append(current_state.get_step())
             current_state = current_state.parent
         return steps
+
+
+class GridAStar:
+    """An execution of the A* algorithm backed by flat preallocated arrays.
+
+    Every cell of the grid is identified by its index ``x * nb_columns + y``.
+    The cost, the parent and the closed flag of the cells are stored in flat
+    arrays, and the fringe only contains ``(f, tiebreak, index)`` tuples, so
+    no node object is ever allocated during the search.
+
+    Parameters
+    ----------
+    initial_state : (int, int)
+        This argument contains the coordinates of the initial node.
+    goal_state : (int, int)
+        This argument contains the coordinates of the goal node.
+    walls : GridMap or World
+        This argument contains the grid map of the obstacles to be avoided, or
+        the world whose grid map is used.
+    world : World or None, optional
+        This keyword argument contains the world whose distance fields may
+        guide the search.
+
+    Attributes
+    ----------
+    initial_state : (int, int)
+        The coordinates of the initial node.
+    goal_state : (int, int)
+        The coordinates of the goal node.
+    walls : GridMap or World
+        The storage location of the walls position.
+    grid_map : GridMap
+        The occupancy grid used to test the neighbours' validity.
+    distance_fields : DistanceFieldCache or None
+        The distance fields of the world, if any.
+    nb_rows : int
+        The number of rows of the grid.
+    nb_columns : int
+        The number of columns of the grid.
+    blocked : bytearray
+        The flag of each cell telling whether it encloses an obstacle, shared
+        with `grid_map`.
+    costs : list of int
+        The cost of the best known path from the root to each cell, -1 if the
+        cell has not been reached yet.
+    parents : list of int
+        The index of the cell preceding each cell, -1 for the root and the
+        cells not reached yet.
+    closed : bytearray
+        The flag of each cell telling whether it has already been extended.
+    open_set : heap of (int, int, int)
+        The fringe of the algorithm.
+    nb_expansions : int
+        The number of cells extended so far.
+    distance_field : array of int or None
+        The cached distance field of the goal, if any.
+
+    USES_DISTANCE_FIELDS : bool
+        True since the search reads the cached distance fields, so that it is
+        worth computing them beforehand.
+
+    Notes
+    -----
+    Ties between cells with the same f-value are broken in favour of the
+    deepest one, i.e. the one with the highest cost.
+
+    When the distance field of the goal is held by the world's
+    :class:`~coop.tools.DistanceFieldCache`, it replaces the Manhattan
+    heuristic. Since it ignores the temporary obstacles, it is still
+    consistent.
+
+    """
+
+    USES_DISTANCE_FIELDS = True
+
+    def __init__(self, initial_state, goal_state, walls, world=None):
+        self.grid_map = get_grid_map(walls)
+        self.distance_fields = world.distance_fields if world is not None else None
+        self.nb_rows = self.grid_map.nb_rows
+        self.nb_columns = self.grid_map.nb_columns
+        size = self.nb_rows * self.nb_columns
+        self.initial_state = initial_state
+        self.goal_state = goal_state
+        self.walls = walls
+        self.blocked = self.grid_map.blocked
+        self.distance_field = self.__get_distance_field(goal_state)
+        self.costs = [-1] * size
+        self.parents = [-1] * size
+        self.closed = bytearray(size)
+        self.nb_expansions = 0
+
+        root = self.index_of(initial_state)
+        self.costs[root] = 0
+        self.open_set = [(self.h(root), 0, root)]
+
+    def __get_distance_field(self, goal):
+        """Retrieves the cached distance field of the given goal, if any.
+
+        Parameters
+        ----------
+        goal : (int, int)
+            The coordinates of the goal.
+
+        Returns
+        -------
+        array of int or None
+            The distance field of the goal, or None if it is not cached.
+
+        """
+        if self.distance_fields is None:
+            return None
+        return self.distance_fields.get(self.grid_map.base, goal)
+
+    def index_of(self, coordinates):
+        """Determines the flat index of the cell with the given coordinates.
+
+        Parameters
+        ----------
+        coordinates : (int, int)
+            The coordinates of the cell.
+
+        Returns
+        -------
+        int
+            The index of the cell in the flat arrays.
+
+        """
+        return coordinates[0] * self.nb_columns + coordinates[1]
+
+    def coordinates_of(self, index):
+        """Determines the coordinates of the cell with the given flat index.
+
+        Parameters
+        ----------
+        index : int
+            The index of the cell in the flat arrays.
+
+        Returns
+        -------
+        (int, int)
+            The coordinates of the cell.
+
+        """
+        return divmod(index, self.nb_columns)
+
+    def h(self, index):
+        """Calculates the Manhattan heuristic value for the given cell.
+
+        Parameters
+        ----------
+        index : int
+            The index of the cell.
+
+        Returns
+        -------
+        int
+            The heuristic value for the cell.
+
+        """
+        if self.distance_field is not None:
+            return max(self.distance_field[index], 0)
+        x, y = divmod(index, self.nb_columns)
+        return abs(x - self.goal_state[0]) + abs(y - self.goal_state[1])
+
+    def set_new_goal(self, new_goal):
+        """Sets the new goal for the A* algorithm.
+
+        The cells already extended are kept, and the fringe is reordered
+        according to the new goal so that a later call to :meth:`run` resumes
+        the search where it stopped.
+
+        Parameters
+        ----------
+        new_goal : (int, int)
+            The coordinates of a new goal to meet.
+
+        """
+        self.goal_state = new_goal
+        self.distance_field = self.__get_distance_field(new_goal)
+        costs, closed = self.costs, self.closed
+        fringe = {index for _, _, index in self.open_set if not closed[index]}
+        self.open_set = [(costs[i] + self.h(i), -costs[i], i) for i in fringe]
+        heapq.heapify(self.open_set)
+
+    def open_set_is_empty(self):
+        """Tests whether the fringe is empty.
+
+        Returns
+        -------
+        bool
+            True iff the fringe is empty.
+
+        """
+        return self.open_set == []
+
+    def get_cost_at(self, coordinates):
+        """Retrieves the cost of the cell with the given coordinates.
+
+        Parameters
+        ----------
+        coordinates : (int, int)
+            The coordinates of the desired cell.
+
+        Returns
+        -------
+        int or None
+            The cost of the path from the root to the cell if the latter has
+            already been extended, otherwise None.
+
+        """
+        index = self.index_of(coordinates)
+        if self.closed[index]:
+            return self.costs[index]
+        return None
+
+    def distance_to(self, coordinates):
+        """Calculates the true distance from the root to the given cell.
+
+        The distance is read from the costs of the already extended cells. If
+        the given cell has not been extended yet, the search is resumed
+        towards it until it is.
+
+        Parameters
+        ----------
+        coordinates : (int, int)
+            The coordinates of the desired cell.
+
+        Returns
+        -------
+        int or float
+            The cost of the shortest path from the root to the cell, or
+            infinity if the cell cannot be reached.
+
+        """
+        cost = self.get_cost_at(coordinates)
+        if cost is None:
+            self.set_new_goal(coordinates)
+            self.run()
+            cost = self.get_cost_at(coordinates)
+        return cost if cost is not None else math.inf
+
+    def run(self):
+        """Runs this A* instance.
+
+        Returns
+        -------
+        list of (int, int) or None
+            The reversed list of steps to take to get to the goal state from
+            the initial state, or None if the goal cannot be reached.
+
+        Notes
+        -----
+        The returned step sequence was built as a stack so the agent must use
+        `pop()` in order to obtain the immediate next step to take.
+
+        """
+        goal = self.index_of(self.goal_state)
+        if self.closed[goal]:
+            return self.__get_reversed_step_sequence(goal)
+
+        nb_rows, nb_columns = self.nb_rows, self.nb_columns
+        gx, gy = self.goal_state
+        blocked, closed = self.blocked, self.closed
+        costs, parents = self.costs, self.parents
+        field = self.distance_field
+        open_set = self.open_set
+        push, pop = heapq.heappush, heapq.heappop
+
+        while open_set:
+            _, _, index = pop(open_set)
+
+            # ensure unicity in closed set
+            if closed[index]:
+                continue
+            closed[index] = 1
+            self.nb_expansions += 1
+
+            x, y = divmod(index, nb_columns)
+            cost = costs[index] + 1
+            neighbours = []
+            if x + 1 < nb_rows:
+                neighbours.append((index + nb_columns, x + 1, y))
+            if x > 0:
+                neighbours.append((index - nb_columns, x - 1, y))
+            if y + 1 < nb_columns:
+                neighbours.append((index + 1, x, y + 1))
+            if y > 0:
+                neighbours.append((index - 1, x, y - 1))
+            for n, nx, ny in neighbours:
+                if blocked[n] or closed[n]:
+                    continue
+                if field is None:
+                    h = abs(nx - gx) + abs(ny - gy)
+                else:
+                    h = field[n]
+                    if h < 0:  # the goal cannot be reached from there
+                        continue
+                if costs[n] == -1 or cost < costs[n]:
+                    costs[n] = cost
+                    parents[n] = index
+                    push(open_set, (cost + h, -cost, n))
+
+            if index == goal:
+                return self.__get_reversed_step_sequence(goal)
+        return None
+
+    def __get_reversed_step_sequence(self, goal):
+        """Determines the steps leading to the given cell from the initial state.
+
+        Parameters
+        ----------
+        goal : int
+            The index of the cell to be reached.
+
+        Returns
+        -------
+        list of (int, int)
+            The step sequence to take to get to the given cell from the initial
+            state.
+
+        """
+        nb_columns, parents = self.nb_columns, self.parents
+        steps = []
+        current = goal
+        while parents[current] != -1:
+            parent = parents[current]
+            x, y = divmod(current, nb_columns)
+            px, py = divmod(parent, nb_columns)
+            steps.append((x - px, y - py))
+            current = parent
+        return steps
+
+
+class ResumableDistanceOracle:
+    """A Reverse Resumable A* search giving the true distances to a goal.
+
+    The search is rooted at the goal and is only extended on demand, until
+    the queried cell is closed. Its fringe is kept alive between the queries,
+    so that a later query resumes the search where it stopped instead of
+    restarting it. Since the closed cells' distances do not depend on the
+    querying agent, a single oracle may be shared by all the agents pursuing
+    the same goal.
+
+    Parameters
+    ----------
+    goal_state : (int, int)
+        This argument contains the coordinates of the goal, i.e. the root of
+        the search.
+    walls : GridMap or World
+        This argument contains the grid map of the obstacles to be avoided, or
+        the world whose grid map is used.
+    origin : (int, int) or None, optional
+        This argument contains the coordinates of the cell towards which the
+        search is guided, e.g. the initial position of the first agent.
+    world : World or None, optional
+        This argument contains the world whose distance fields receive the
+        complete distance field of the goal.
+
+    Attributes
+    ----------
+    goal_state : (int, int)
+        The storage location of the goal's coordinates.
+    origin : (int, int) or None
+        The storage location of the guiding cell's coordinates.
+    grid_map : GridMap
+        The occupancy grid used to test the neighbours' validity.
+    distance_fields : DistanceFieldCache or None
+        The distance fields of the world, if any.
+    costs : list of int
+        The distance from the goal to each cell, -1 if the cell has not been
+        reached yet.
+    closed : bytearray
+        The flag of each cell telling whether its distance is final.
+    open_set : heap of (int, int, int)
+        The fringe of the search, made of ``(f, tiebreak, index)`` tuples.
+    nb_expansions : int
+        The number of cells extended so far.
+
+    Notes
+    -----
+    Once the search is exhausted, its distances form the complete distance
+    field of the goal, which is then handed to the world's
+    :class:`~coop.tools.DistanceFieldCache`.
+
+    The heuristic is the Manhattan distance to `origin` (none if it is None).
+    As it is consistent and never changes, it does not matter which cell is
+    queried: the distance of a closed cell is always exact, and the fringe
+    never has to be reordered.
+
+    """
+
+    def __init__(self, goal_state, walls, origin=None, world=None):
+        self.goal_state = goal_state
+        self.origin = origin
+        self.grid_map = get_grid_map(walls)
+        self.distance_fields = world.distance_fields if world is not None else None
+        size = self.grid_map.nb_rows * self.grid_map.nb_columns
+        self.costs = [-1] * size
+        self.closed = bytearray(size)
+        self.nb_expansions = 0
+
+        root = self.grid_map.index_of(goal_state)
+        self.costs[root] = 0
+        self.open_set = [(self.h(root), 0, root)]
+
+    def h(self, index):
+        """Calculates the Manhattan heuristic value for the given cell.
+
+        Parameters
+        ----------
+        index : int
+            The index of the cell.
+
+        Returns
+        -------
+        int
+            The distance to `origin` from the cell, or 0 without an origin.
+
+        """
+        if self.origin is None:
+            return 0
+        x, y = self.grid_map.coordinates_of(index)
+        return abs(x - self.origin[0]) + abs(y - self.origin[1])
+
+    def is_exhausted(self):
+        """Tests whether the distances of all the reachable cells are known.
+
+        Returns
+        -------
+        bool
+            True iff the fringe is empty.
+
+        """
+        return self.open_set == []
+
+    def distance(self, position):
+        """Calculates the true distance from the given position to the goal.
+
+        Parameters
+        ----------
+        position : (int, int)
+            The coordinates of the position.
+
+        Returns
+        -------
+        int or float
+            The length of the shortest path between the position and the goal,
+            or infinity if the goal cannot be reached.
+
+        """
+        if not self.grid_map.is_valid(*position):
+            return math.inf
+        index = self.grid_map.index_of(position)
+        if not self.closed[index]:
+            self.__resume(index)
+            if self.is_exhausted() and self.distance_fields is not None and \
+                    self.grid_map.base is self.grid_map:
+                self.distance_fields.put(self.grid_map, self.goal_state,
+                                         array('i', self.costs))
+            if not self.closed[index]:
+                return math.inf
+        return self.costs[index]
+
+    def __resume(self, target):
+        """Extends the search until the given cell is closed.
+
+        Parameters
+        ----------
+        target : int
+            The index of the cell whose distance is needed.
+
+        """
+        grid_map = self.grid_map
+        nb_rows, nb_columns = grid_map.nb_rows, grid_map.nb_columns
+        blocked, closed, costs = grid_map.blocked, self.closed, self.costs
+        open_set = self.open_set
+        push, pop = heapq.heappush, heapq.heappop
+        if self.origin is None:
+            ox = oy = None
+        else:
+            ox, oy = self.origin
+
+        while open_set:
+            _, _, index = pop(open_set)
+            if closed[index]:
+                continue
+            closed[index] = 1
+            self.nb_expansions += 1
+
+            x, y = divmod(index, nb_columns)
+            cost = costs[index] + 1
+            neighbours = []
+            if x + 1 < nb_rows:
+                neighbours.append((index + nb_columns, x + 1, y))
+            if x > 0:
+                neighbours.append((index - nb_columns, x - 1, y))
+            if y + 1 < nb_columns:
+                neighbours.append((index + 1, x, y + 1))
+            if y > 0:
+                neighbours.append((index - 1, x, y - 1))
+            for n, nx, ny in neighbours:
+                if blocked[n] or closed[n]:
+                    continue
+                if costs[n] == -1 or cost < costs[n]:
+                    costs[n] = cost
+                    h = 0 if ox is None else abs(nx - ox) + abs(ny - oy)
+                    push(open_set, (cost + h, -cost, n))
+
+            if index == target:
+                return
+
+
+class JumpPointSearch:
+    """An execution of Jump Point Search on a 4-connected grid.
+
+    Instead of pushing every neighbour of a cell, the search jumps along
+    straight lines and only stops at the jump points, i.e. the goal and the
+    cells with a forced neighbour, so that the symmetric paths across open
+    areas are never extended. A jump from row to row also scans both ways of
+    every row it meets, hence every optimal path is made of straight segments
+    between jump points.
+
+    Parameters
+    ----------
+    initial_state : (int, int)
+        This argument contains the coordinates of the initial node.
+    goal_state : (int, int)
+        This argument contains the coordinates of the goal node.
+    walls : GridMap or World
+        This argument contains the grid map of the obstacles to be avoided, or
+        the world whose grid map is used.
+    world : World or None, optional
+        This keyword argument is only accepted for compatibility with the
+        other search engines, since the jumps need no distance field.
+
+    Attributes
+    ----------
+    initial_state : (int, int)
+        The coordinates of the initial node.
+    goal_state : (int, int)
+        The coordinates of the goal node.
+    walls : GridMap or World
+        The storage location of the walls position.
+    grid_map : GridMap
+        The occupancy grid used to test the cells' validity.
+    costs : dict of int: int
+        The cost of the best known path from the root to each jump point.
+    parents : dict of int: int
+        The jump point preceding each jump point, -1 for the root.
+    open_set : heap of (int, int, int)
+        The fringe of the algorithm.
+    nb_expansions : int
+        The number of jump points extended so far.
+
+    See Also
+    --------
+    GridAStar
+
+    """
+
+    def __init__(self, initial_state, goal_state, walls, world=None):
+        self.initial_state = initial_state
+        self.goal_state = goal_state
+        self.walls = walls
+        self.grid_map = get_grid_map(walls)
+        self.nb_expansions = 0
+
+        root = self.grid_map.index_of(initial_state)
+        self.costs = {root: 0}
+        self.parents = {root: -1}
+        self.open_set = [(distance(initial_state, goal_state), 0, root)]
+
+    def __jump(self, x, y, dx, dy):
+        """Jumps from the given cell in the given direction.
+
+        Parameters
+        ----------
+        x : int
+            The row number of the cell the jump starts from.
+        y : int
+            The column number of the cell the jump starts from.
+        dx : int
+            The step along the rows.
+        dy : int
+            The step along the columns.
+
+        Returns
+        -------
+        (int, int) or None
+            The coordinates of the next jump point in the given direction, or
+            None if an obstacle is met first.
+
+        """
+        if dx == 0:
+            return self.__jump_along_row(x, y, dy)
+
+        nb_rows, nb_columns = self.grid_map.nb_rows, self.grid_map.nb_columns
+        blocked = self.grid_map.blocked
+        gx, gy = self.goal_state
+        back = dx * nb_columns
+        while True:
+            x += dx
+            index = x * nb_columns + y
+            if not 0 <= x < nb_rows or blocked[index]:
+                return None
+            if x == gx and y == gy:
+                return (x, y)
+            # a side cell is a forced neighbour if the one behind it is blocked
+            if y > 0 and not blocked[index - 1] and blocked[index - back - 1]:
+                return (x, y)
+            if y + 1 < nb_columns and not blocked[index + 1] and \
+                    blocked[index - back + 1]:
+                return (x, y)
+            # the perpendicular rows may lead to a jump point
+            if self.__jump_along_row(x, y, 1) is not None or \
+                    self.__jump_along_row(x, y, -1) is not None:
+                return (x, y)
+
+    def __jump_along_row(self, x, y, dy):
+        """Jumps from the given cell along its row.
+
+        Parameters
+        ----------
+        x : int
+            The row number of the cell the jump starts from.
+        y : int
+            The column number of the cell the jump starts from.
+        dy : int
+            The step along the columns.
+
+        Returns
+        -------
+        (int, int) or None
+            The coordinates of the next jump point in the given direction, or
+            None if an obstacle is met first.
+
+        """
+        nb_rows, nb_columns = self.grid_map.nb_rows, self.grid_map.nb_columns
+        blocked = self.grid_map.blocked
+        gx, gy = self.goal_state
+        index = x * nb_columns + y
+        while True:
+            y += dy
+            index += dy
+            if not 0 <= y < nb_columns or blocked[index]:
+                return None
+            if x == gx and y == gy:
+                return (x, y)
+            if x > 0 and not blocked[index - nb_columns] and \
+                    blocked[index - nb_columns - dy]:
+                return (x, y)
+            if x + 1 < nb_rows and not blocked[index + nb_columns] and \
+                    blocked[index + nb_columns - dy]:
+                return (x, y)
+
+    def __get_directions(self, index):
+        """Determines the directions to be explored from the given jump point.
+
+        Parameters
+        ----------
+        index : int
+            The index of the jump point.
+
+        Returns
+        -------
+        list of (int, int)
+            The steps leading to the natural and forced neighbours.
+
+        """
+        parent = self.parents[index]
+        if parent == -1:
+            return [(1, 0), (-1, 0), (0, 1), (0, -1)]
+        x, y = self.grid_map.coordinates_of(index)
+        px, py = self.grid_map.coordinates_of(parent)
+        dx = (x > px) - (x < px)
+        dy = (y > py) - (y < py)
+        if dx != 0:
+            return [(0, -1), (0, 1), (dx, 0)]
+        return [(-1, 0), (1, 0), (0, dy)]
+
+    def run(self):
+        """Runs this Jump Point Search instance.
+
+        Returns
+        -------
+        list of (int, int) or None
+            The reversed list of steps to take to get to the goal state from
+            the initial state, or None if the goal cannot be reached.
+
+        Notes
+        -----
+        The returned step sequence was built as a stack so the agent must use
+        `pop()` in order to obtain the immediate next step to take.
+
+        """
+        grid_map = self.grid_map
+        goal = grid_map.index_of(self.goal_state)
+        costs, parents = self.costs, self.parents
+        closed = set()
+        open_set = self.open_set
+
+        while open_set:
+            _, _, index = heapq.heappop(open_set)
+
+            # ensure unicity in closed set
+            if index in closed:
+                continue
+            closed.add(index)
+            self.nb_expansions += 1
+
+            if index == goal:
+                return self.__get_reversed_step_sequence(goal)
+
+            x, y = grid_map.coordinates_of(index)
+            for dx, dy in self.__get_directions(index):
+                jump_point = self.__jump(x, y, dx, dy)
+                if jump_point is None:
+                    continue
+                successor = grid_map.index_of(jump_point)
+                if successor in closed:
+                    continue
+                cost = costs[index] + distance((x, y), jump_point)
+                if cost < costs.get(successor, math.inf):
+                    costs[successor] = cost
+                    parents[successor] = index
+                    f = cost + distance(jump_point, self.goal_state)
+                    heapq.heappush(open_set, (f, -cost, successor))
+        return None
+
+    def __get_reversed_step_sequence(self, goal):
+        """Determines the unit steps leading to the given jump point.
+
+        Parameters
+        ----------
+        goal : int
+            The index of the jump point to be reached.
+
+        Returns
+        -------
+        list of (int, int)
+            The step sequence to take to get to the given jump point from the
+            initial state, each straight segment being split into unit steps.
+
+        """
+        coordinates_of = self.grid_map.coordinates_of
+        steps = []
+        current = goal
+        while self.parents[current] != -1:
+            parent = self.parents[current]
+            x, y = coordinates_of(current)
+            px, py = coordinates_of(parent)
+            step = ((x > px) - (x < px), (y > py) - (y < py))
+            steps += [step] * distance((x, y), (px, py))
+            current = parent
+        return steps
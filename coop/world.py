@@ -0,0 +1,305 @@
+"""
+.. module:: world
+   :synopsis: This file contains the state shared by the agents of a simulation.
+.. moduleauthor:: Angelo Ortiz <github.com/angelo-ortiz>
+"""
+
+import random
+
+from .advanced_players import TimeAStar
+from .hierarchical import HierarchicalMap
+from .reservations import ReservationTable
+from .tools import DistanceFieldCache, GridAStar, GridMap
+
+
+class World:
+    """The state shared by the cooperative agents of a single simulation.
+
+    The world owns the grid, the players, the reservation table, the clock,
+    the caches of the searches, the settings of the agents and the search
+    counters, so that independent simulations can coexist in one process,
+    run in concurrent threads or be pickled into worker processes.
+
+    Parameters
+    ----------
+    nb_rows : int
+        This argument contains the number of rows of the grid.
+    nb_columns : int
+        This argument contains the number of columns of the grid.
+    walls : list of (int, int), optional
+        This argument contains the list of all the obstacles of the grid.
+    reservation_table : ReservationTable or RingReservationTable or None, optional
+        This argument contains the reservation table shared by the advanced
+        players, by default an empty :class:`~coop.reservations.ReservationTable`.
+    seed : int or None, optional
+        This argument contains the seed of the random choices of the agents.
+
+    Attributes
+    ----------
+    nb_rows : int
+        The number of rows of the grid.
+    nb_columns : int
+        The number of columns of the grid.
+    walls : list of (int, int)
+        The storage location of the walls position.
+    grid_map : GridMap
+        The occupancy grid built from the walls.
+    players : list of CoopPlayer
+        The list of all the agents in the grid, in order of creation.
+    reservation_table : ReservationTable or RingReservationTable
+        A structure used to reserve grid positions at any time.
+    timer : int
+        The clock of the simulation, in epochs.
+    rng : random.Random
+        The random generator of the agents' choices, e.g. the random steps
+        taken to dodge a collision.
+    frequence : int
+        The frequence of pathfinding of the advanced players.
+    window : int or None
+        The depth of the space-time searches in the windowed (WHCA*) mode, or
+        None if it is coupled to the pathfinding frequence.
+    retention_window : int or None
+        The number of past epochs whose reservations are kept, or None to
+        keep them all.
+    distance_oracles : dict of (int, int): ResumableDistanceOracle
+        The backwards searches shared by the agents pursuing the same goal.
+    distance_fields : DistanceFieldCache
+        The bounded cache of the goals' distance fields.
+    abstractions : dict of int: HierarchicalMap
+        The abstractions of the grid map, by cluster size.
+    cut_off_limit : int
+        The length of the path to be cut when handling collisions.
+    search_engine : type
+        The single-agent search algorithm used by the cooperative players.
+    incremental : bool
+        True iff the paths of the cooperative players are repaired by D* Lite.
+    tie_breaking : tuple of str
+        The tie-breaking criteria of the space-time searches.
+    nb_iters : int
+        The number of iterations in all the space-time A* instances.
+    nb_calls : int
+        The number of executions of space-time A*.
+
+    """
+
+    def __init__(self, nb_rows, nb_columns, walls=(), reservation_table=None, seed=None):
+        self.nb_rows = nb_rows
+        self.nb_columns = nb_columns
+        self.walls = list(walls)
+        self.grid_map = GridMap(nb_rows, nb_columns, self.walls)
+        self.players = []
+        self.reservation_table = reservation_table if reservation_table is not None \
+            else ReservationTable()
+        self.timer = 0
+        self.rng = random.Random(seed)
+        self.frequence = 1
+        self.window = None
+        self.retention_window = 0
+        self.distance_oracles = {}
+        self.distance_fields = DistanceFieldCache()
+        self.abstractions = {}
+        self.cut_off_limit = 0
+        self.search_engine = GridAStar
+        self.incremental = False
+        self.tie_breaking = ('depth',)
+        self.nb_iters = 0
+        self.nb_calls = 0
+
+    def add_player(self, player):
+        """Registers a new agent in this world.
+
+        Parameters
+        ----------
+        player : CoopPlayer
+            The agent to be added.
+
+        Returns
+        -------
+        int
+            The id of the agent, i.e. its index in the list of players.
+
+        """
+        self.players.append(player)
+        return len(self.players) - 1
+
+    def get_abstraction(self, cluster_size=10):
+        """Retrieves the abstraction of the grid map shared by the searches.
+
+        Parameters
+        ----------
+        cluster_size : int, optional
+            The side length of the clusters.
+
+        Returns
+        -------
+        HierarchicalMap
+            The abstraction of the grid map, built only once per cluster size
+            and repaired whenever the obstacles have changed.
+
+        """
+        abstraction = self.abstractions.get(cluster_size)
+        if abstraction is None:
+            abstraction = HierarchicalMap(self.grid_map, cluster_size)
+            self.abstractions[cluster_size] = abstraction
+        else:
+            abstraction.refresh()
+        return abstraction
+
+    def set_cut_off_limit(self, cut_point):
+        """Sets the number of immediate steps to be recalculated when handling
+        a collision.
+
+        Parameters
+        ----------
+        cut_point : int
+            The length of path to be replanned when a collision happens.
+
+        """
+        self.cut_off_limit = cut_point
+
+    def set_search_engine(self, engine):
+        """Sets the single-agent search algorithm used to find paths.
+
+        Parameters
+        ----------
+        engine : type
+            A class built from the initial coordinates, the goal coordinates,
+            the obstacles and the `world` keyword argument, whose `run()`
+            method returns the reversed list of steps to the goal. The
+            distance fields of the goals are only computed for the classes
+            whose `USES_DISTANCE_FIELDS` attribute is true.
+
+        """
+        self.search_engine = engine
+
+    def set_incremental_replanning(self, enabled):
+        """Sets whether the paths of the cooperative players are repaired
+        incrementally.
+
+        When enabled, each agent keeps its D* Lite search towards its current
+        goal, and a collision or a change in the other agents' positions only
+        repairs the part of the search depending on the cells concerned. The
+        whole remaining path is then replanned instead of its first
+        :attr:`cut_off_limit` steps.
+
+        Parameters
+        ----------
+        enabled : bool
+            True iff the incremental replanning is to be used.
+
+        """
+        self.incremental = enabled
+
+    def set_pathfinding_frequence(self, frequence):
+        """Sets the pathfinding frequence for the advanced players.
+
+        Parameters
+        ----------
+        frequence : int
+            The time after which an agent must replan its path.
+
+        """
+        self.frequence = frequence
+
+    def set_window(self, window):
+        """Sets the depth of the space-time searches independently of the
+        pathfinding frequence.
+
+        In this windowed mode, i.e. Windowed Hierarchical Cooperative A*, each
+        search reserves the `window` next epochs from the current one, while
+        the agents still replan every `frequence` epochs. Beyond the window,
+        the remaining path is estimated by the true distance heuristic.
+
+        Parameters
+        ----------
+        window : int or None
+            The number of epochs covered by each search, which should not be
+            lower than the pathfinding frequence, or None to couple it to the
+            frequence as originally.
+
+        """
+        self.window = window
+
+    def get_window(self):
+        """Determines the depth of a search started at a search epoch.
+
+        Returns
+        -------
+        int
+            The window if set, otherwise the pathfinding frequence.
+
+        """
+        return self.window if self.window is not None else self.frequence
+
+    def set_reservation_table(self, reservation_table):
+        """Sets the reservation table shared by the advanced players.
+
+        Parameters
+        ----------
+        reservation_table : ReservationTable or RingReservationTable
+            An empty reservation table, e.g. the ring buffer one whose window
+            covers the agents' search horizon.
+
+        """
+        self.reservation_table = reservation_table
+
+    def set_retention_window(self, retention_window):
+        """Sets the number of past epochs kept in the reservation table.
+
+        The reservations of the epochs prior to the timer are never queried
+        again, so they are dropped as the timer goes by unless they are kept
+        for debugging purposes.
+
+        Parameters
+        ----------
+        retention_window : int or None
+            The number of past epochs whose reservations are kept, or None to
+            keep them all.
+
+        """
+        self.retention_window = retention_window
+
+    def set_tie_breaking(self, *criteria):
+        """Sets the tie-breaking policy of the space-time searches.
+
+        Parameters
+        ----------
+        *criteria : str
+            The criteria among
+            :attr:`~coop.advanced_players.TimeAStar.TIE_BREAKERS`, applied in
+            the given order. Without any, ties are broken by insertion order.
+
+        Raises
+        ------
+        ValueError
+            If a criterion is unknown.
+
+        """
+        for criterion in criteria:
+            if criterion not in TimeAStar.TIE_BREAKERS:
+                raise ValueError(f'Unknown tie-breaking criterion: {criterion}')
+        self.tie_breaking = tuple(criteria)
+
+    def set_search_epochs(self):
+        """Initialises the search epoch of each advanced player.
+
+        Notes
+        -----
+        This method interleaves the searches, i.e. there are approximately
+        :math:`n/f` agents replanning at any epoch, where :math:`n` is the
+        number of agents and :math:`f` is the pathfinding frequence.
+
+        """
+        for cnt, player in enumerate(self.players):
+            player.set_search_epoch(cnt % self.frequence)
+
+    def tick(self):
+        """Updates the clock and prunes the reservation table."""
+        self.timer += 1
+        if self.retention_window is not None:
+            self.reservation_table.drop_before(self.timer - self.retention_window)
+
+    def __repr__(self):
+        """Textual representation of this world."""
+        return f'World({self.nb_rows}x{self.nb_columns}, {len(self.players)} players, ' \
+            f't = {self.timer})'
@@ -0,0 +1,58 @@
+"""Profiling harness of the space-time A* expansion step.
+
+The advanced players of the 10-player map pursue their goals headlessly,
+with new goals drawn at random, under the profiler. The cost of an
+expansion, i.e. of :meth:`coop.advanced_players.TimeNode.get_valid_neighbours`,
+is reported per extended node along with the most expensive functions.
+
+Usage: python profile_time_astar.py [epochs] [map]
+"""
+
+import cProfile
+import pstats
+import random
+import sys
+
+from benchmark_node_memory import load_agents
+from benchmark_true_distance import load_walls
+from coop.advanced_players import AdvancedPlayer, TimeNode
+from coop.world import World
+
+
+def simulate(name, nb_epochs, seed=0, tie_breaking=('depth',)):
+    random.seed(seed)
+    nb_rows, nb_columns, walls = load_walls(name)
+    world = World(nb_rows, nb_columns, walls)
+    world.set_tie_breaking(*tie_breaking)
+    initial_positions, goals = load_agents(name)
+    free = [(x, y) for x in range(nb_rows) for y in range(nb_columns)
+            if (x, y) not in set(walls)]
+
+    players = [AdvancedPlayer(init, [goal], world)
+               for init, goal in zip(initial_positions, goals)]
+    world.set_pathfinding_frequence(6)
+    world.set_search_epochs()
+
+    for _ in range(nb_epochs):
+        for player in players:
+            position = player.next()
+            if position == player.current_goal and not player.has_next_goal():
+                player.add_goal(random.choice(free))
+    return world
+
+
+if __name__ == '__main__':
+    nb_epochs = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    name = sys.argv[2] if len(sys.argv) > 2 else 'pathfinding10players'
+
+    profiler = cProfile.Profile()
+    world = profiler.runcall(simulate, name, nb_epochs)
+    expansions = world.nb_iters
+
+    stats = pstats.Stats(profiler)
+    total = sum(timing[3] for func, timing in stats.stats.items()
+                if func[2] == TimeNode.get_valid_neighbours.__name__)
+    print(f'{name}, {nb_epochs} epochs: {expansions} expansions, '
+          f'{1e6 * total / max(expansions, 1):.2f} us per expansion '
+          '(profiled, neighbour generation included)')
+    stats.sort_stats('tottime').print_stats(12)
@@ -6,32 +6,23 @@ from __future__ import absolute_import, print_function, unicode_literals
 
 import random
 import sys
-import time
-from itertools import chain
 
-import numpy as np
-import pygame
-
-import utils.glo as glo
 from coop.players import CoopPlayer
-from coop.tools import Node
-from utils.gameclass import Game, check_init_game_done
-from utils.ontology import Ontology
-from utils.players import Player
-from utils.sprite import MovingSprite
-from utils.spritebuilder import SpriteBuilder
+from coop.maps import load_map
+from coop.simulation import GameObserver, Observer, Simulation
+from coop.world import World
 
 # ---- ---- ---- ---- ---- ----
 # ---- Main                ----
 # ---- ---- ---- ---- ---- ----
 
-game = Game()
 
+def init(name):
+    # the display is only loaded when somebody is watching
+    from utils.gameclass import Game
+    from utils.ontology import Ontology
+    from utils.spritebuilder import SpriteBuilder
 
-def init(n_players):
-    global player, game
-    # pathfindingWorld_MultiPlayer4
-    name = 'pathfinding' + f'{n_players}' + 'players'
     game = Game('../Cartes/' + name + '.json', SpriteBuilder)
     game.O = Ontology(
         True, '../SpriteSheet-32x32/tiny_spritesheet_ontology.csv')
@@ -39,7 +30,18 @@ def init(n_players):
     game.fps = 20  # frames per second
     game.mainiteration()
     game.mask.allow_overlaping_players = True
-    # player = game.player
+    return game
+
+
+class Printer(Observer):
+    """Prints the moves and the collected vials."""
+
+    def on_move(self, simulation, player, position):
+        print("player", player, "in (", *position, ")")
+        print("\tgoal", simulation.goals[player])
+
+    def on_collect(self, simulation, player, position, new_goal):
+        print("\nObjet trouvé par le joueur ", player)
 
 
 def main():
@@ -47,153 +49,65 @@ def main():
     # for arg in sys.argv:
     iterations = 50  # default
     n_players = 4
-    if len(sys.argv) == 3:
+    if len(sys.argv) >= 3:
         iterations = int(sys.argv[1])
         n_players = int(sys.argv[2])
+    headless = 'headless' in sys.argv[3:]
     print("Iterations: ")
     print(iterations)
 
-    init(n_players)
-
-    # -------------------------------
-    # Initialisation
-    # -------------------------------
-
-    players = [o for o in game.layers['joueur']]
-    nbPlayers = len(players)
-    score = [0] * nbPlayers
-
-    # on localise tous les états initiaux (loc du joueur)
-    initStates = [o.get_rowcol() for o in game.layers['joueur']]
-    print("Init states:", initStates)
-
-    # on localise tous les murs
-    wallStates = [w.get_rowcol() for w in game.layers['obstacle']]
-    # print ("Wall states:", wallStates)
+    # pathfindingWorld_MultiPlayer4
+    name = 'pathfinding' + f'{n_players}' + 'players'
+    map_data = load_map(name)
+    nbPlayers = len(map_data.initial_positions)
+    print("Init states:", map_data.initial_positions)
 
     # -------------------------------
     # Placement aleatoire des fioles
     # -------------------------------
-    goalPos = []
-    for o in game.layers['ramassable']:  # les rouges puis jaunes puis bleues
-        # et on met la fiole qqpart au hasard
-        x = random.randint(0, 19)
-        y = random.randint(0, 19)
-        while (x, y) in wallStates + goalPos:
-            x = random.randint(0, 19)
-            y = random.randint(0, 19)
-        o.set_rowcol(x, y)
-        goalPos.append((x, y))
-        game.layers['ramassable'].add(o)
-        game.mainiteration()
-
-    print(game.layers['ramassable'])
-
-    # on localise tous les objets ramassables
-    goalStates = [o.get_rowcol() for o in game.layers['ramassable']]
-    print("Goal states:", goalStates)
+    goalStates = random.sample(map_data.free_cells(), nbPlayers)
 
-    # on donne a chaque joueur une fiole a ramasser
-    # en essayant de faire correspondre les couleurs pour que ce soit plus simple à suivre
+    print("Goal states:", goalStates)
 
     # -------------------------------
     # Boucle principale de déplacements
     # -------------------------------
 
-    goalPos = {i: goalStates[i:i + 1] for i in range(nbPlayers)}
-
-    coop_players = []
+    game = None if headless else init(name)
+    observers = [Printer()] + ([] if headless else [GameObserver(game)])
 
-    t_0 = time.process_time()
+    world = World(map_data.nb_rows, map_data.nb_columns, map_data.walls)
 
-    for i in range(nbPlayers):
-        coop_players.append(CoopPlayer(
-            initStates[i], goalPos[i], wallStates))
+    def make_agents(world, initial_positions, goal_positions):
+        return [CoopPlayer(init, goals, world)
+                for init, goals in zip(initial_positions, goal_positions)]
 
-    Node.set_world_dimensions(game.spriteBuilder.rowsize,
-                              game.spriteBuilder.colsize)
+    world.set_cut_off_limit(5)
 
-    CoopPlayer.set_cut_off_limit(5)
-
-    cpu_time = time.process_time() - t_0
-
-    previous = [(-1, -1)] * nbPlayers
-    epoch = 0
-
-    done = 0
+    # each agent collects a single vial, i.e. there is no respawn
+    simulation = Simulation.build(make_agents, world, map_data.initial_positions,
+                                  goalStates, 1, observers=observers)
 
     for i in range(iterations):
-        epoch += 1
-
-        for j in range(nbPlayers):  # on fait bouger chaque joueur séquentiellement
-            t_0 = time.process_time()
-            next_row, next_col = coop_players[j].next()
-            t_f = time.process_time()
-
-            cpu_time += t_f - t_0
-
-            # and ((next_row,next_col) not in posPlayers)
-            if ((next_row, next_col) not in wallStates) and next_row >= 0 and next_row <= 19 and next_col >= 0 and next_col <= 19:
-                players[j].set_rowcol(next_row, next_col)
-                print("player", j, "in (", next_row, next_col, ")")
-                # game.mainiteration()
-
-            # si on a  trouvé un objet on le ramasse
-            print("\tgoal", goalPos[j])
-            if (next_row, next_col) in goalPos[j]:
-                o = players[j].ramasse(game.layers)
-                # game.mainiteration()
-                print("\nObjet trouvé par le joueur ", j)  # , end='')
-                # on enlève ce goalState de la liste
-                goalPos[j].remove((next_row, next_col))
-                score[j] += 1
-                done += 1
-
-                # et on remet un même objet à un autre endroit
-                # x = random.randint(0, 19)
-                # y = random.randint(0, 19)
-                # while (x, y) in wallStates:
-                #     x = random.randint(0, 19)
-                #     y = random.randint(0, 19)
-                # o.set_rowcol(x, y)
-                # goalPos[j].append((x, y))  # on ajoute ce nouveau goalState
-                # game.layers['ramassable'].add(o)
-                # coop_players[j].add_goal((x, y))
-                # print('\tnew goal at', (x, y))
-
-            if done == nbPlayers:
-                break
-
-        current = [p.current_position for p in coop_players]
-        collision = False
-        concurrent = [(p, q) for p in range(nbPlayers)
-                      for q in range(p + 1, nbPlayers)]
-        for p, q in concurrent:
-            if current[p] == current[q]:
-                collision = True
-                break
-            if previous[p] == current[q] and current[p] == previous[q]:
-                collision = True
-                break
-        if collision:
+        simulation.step()
+        if simulation.last_conflicts != []:
             print("===== collision =====")
-            while True:
-                pass
-        previous = current
-        game.mainiteration()
+            print(simulation.last_conflicts)
+            break
         print("Ended iteration", i + 1)
         print("===================================")
-
-        if done == nbPlayers:
+        if simulation.is_over():
             break
 
     print("===================", "STATS", "===================")
-    print("Total CPU time:", cpu_time)
-    print("Number of epochs needed to complete the tasks:", epoch)
+    print("Total CPU time:", simulation.cpu_time)
+    print("Number of epochs needed to complete the tasks:", simulation.epoch)
     # print("Average number of A* iterations:",
-    #       TimeAStar.NB_ITERS / TimeAStar.NB_CALLS)
-    print("scores:", score)
-    pygame.quit()
+    #       world.nb_iters / world.nb_calls)
+    print("scores:", simulation.scores)
+    if game is not None:
+        import pygame
+        pygame.quit()
 
 
 if __name__ == '__main__':
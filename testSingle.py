@@ -12,7 +12,7 @@ import numpy as np
 import pygame
 
 import utils.glo as glo
-from coop.tools import AStar, Node
+from coop.tools import AStar, GridMap
 from utils.gameclass import Game, check_init_game_done
 from utils.ontology import Ontology
 from utils.players import Player
@@ -84,14 +84,14 @@ def main():
     #row2,col2 = (5,5)
     steps = []
 
-    Node.set_world_dimensions(game.spriteBuilder.rowsize,
-                              game.spriteBuilder.colsize)
+    grid_map = GridMap(game.spriteBuilder.rowsize, game.spriteBuilder.colsize,
+                       wallStates)
 
     for i in range(iterations):
 
         if steps == []:
             steps = AStar(initial_state=(row, col),
-                          goal_state=goalStates[0], walls=wallStates).run()
+                          goal_state=goalStates[0], walls=grid_map).run()
 
         x_inc, y_inc = steps.pop()
         #x_inc, y_inc = random.choice([(0, 1), (0, -1), (1, 0), (-1, 0)])